@@ -0,0 +1,51 @@
+"""add csv_import_jobs table
+
+Revision ID: 003_add_csv_import_jobs
+Revises: 002_add_chat_messages
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = '003_add_csv_import_jobs'
+down_revision = '002_add_chat_messages'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'csv_import_jobs',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('company_id', UUID(as_uuid=True), sa.ForeignKey('companies.id'), nullable=False),
+        sa.Column('created_by', UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('skip_errors', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False, server_default='pending'),  # pending / running / completed / failed
+        sa.Column('total_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('validated_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('hashed_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('inserted_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('skipped_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('committed_chunks', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_row_number', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('error_details', JSONB(), nullable=True),
+        sa.Column('message', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_csv_import_jobs_company_id', 'csv_import_jobs', ['company_id'])
+    # 再開対象（pending / running）のジョブ検索用
+    op.create_index('ix_csv_import_jobs_status', 'csv_import_jobs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_csv_import_jobs_status', table_name='csv_import_jobs')
+    op.drop_index('ix_csv_import_jobs_company_id', table_name='csv_import_jobs')
+    op.drop_table('csv_import_jobs')
@@ -0,0 +1,25 @@
+"""add functional index on lower(users.email)
+
+Revision ID: 004_add_users_email_lower
+Revises: 003_add_csv_import_jobs
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_add_users_email_lower'
+down_revision = '003_add_csv_import_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CSVインポートの重複チェック（lower(email) IN (...)）をインデックスで解決する
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_lower', table_name='users')
@@ -0,0 +1,77 @@
+"""add unique index on departments (company_id, name)
+
+Revision ID: 005_add_departments_company_name
+Revises: 004_add_users_email_lower
+Create Date: 2026-10-19
+
+既存データに同じ会社・同じ名前の部署が複数ある場合は、最も古い部署に統合してから
+一意インデックスを作成します（所属ユーザーを付け替え、重複した部署を削除）。
+統合した部署は downgrade では復元されません。
+"""
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '005_add_departments_company_name'
+down_revision = '004_add_users_email_lower'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# 同じ会社・同じ名前の部署ごとに、最も古い部署（作成日時・IDの順）を残す
+DUPLICATE_DEPARTMENTS = """
+    SELECT id, keep_id, company_id, name
+    FROM (
+        SELECT
+            id,
+            company_id,
+            name,
+            first_value(id) OVER (
+                PARTITION BY company_id, name ORDER BY created_at NULLS LAST, id
+            ) AS keep_id
+        FROM departments
+    ) ranked
+    WHERE id <> keep_id
+"""
+
+
+def dedupe_departments() -> None:
+    """重複した部署を最も古い部署に統合"""
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(DUPLICATE_DEPARTMENTS)).all()
+    if not duplicates:
+        return
+
+    for duplicate in duplicates:
+        logger.warning(
+            "Merging duplicate department %s into %s (company_id=%s, name=%r)",
+            duplicate.id, duplicate.keep_id, duplicate.company_id, duplicate.name
+        )
+
+    bind.execute(sa.text(f"""
+        UPDATE users SET department_id = duplicates.keep_id
+        FROM ({DUPLICATE_DEPARTMENTS}) duplicates
+        WHERE users.department_id = duplicates.id
+    """))
+    bind.execute(sa.text(f"""
+        DELETE FROM departments
+        USING ({DUPLICATE_DEPARTMENTS}) duplicates
+        WHERE departments.id = duplicates.id
+    """))
+
+
+def upgrade() -> None:
+    dedupe_departments()
+
+    # CSVインポートで存在しない部署を INSERT ... ON CONFLICT DO NOTHING で一括作成する
+    op.create_index(
+        'uq_departments_company_name', 'departments', ['company_id', 'name'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_departments_company_name', table_name='departments')
@@ -0,0 +1,33 @@
+"""add rate_limit_counters table
+
+Revision ID: 006_add_rate_limit_counters
+Revises: 005_add_departments_company_name
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_rate_limit_counters'
+down_revision = '005_add_departments_company_name'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 全ワーカーで共有するレート制限カウンター（キー・固定窓ごとに1行）
+    op.create_table(
+        'rate_limit_counters',
+        sa.Column('key', sa.String(), primary_key=True),
+        sa.Column('window_start', sa.BigInteger(), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    # 期限切れカウンターの削除用
+    op.create_index('ix_rate_limit_counters_window_start', 'rate_limit_counters', ['window_start'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_limit_counters_window_start', table_name='rate_limit_counters')
+    op.drop_table('rate_limit_counters')
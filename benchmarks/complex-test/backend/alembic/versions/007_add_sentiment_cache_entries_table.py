@@ -0,0 +1,34 @@
+"""add sentiment_cache_entries table
+
+Revision ID: 007_add_sentiment_cache_entries
+Revises: 006_add_rate_limit_counters
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_sentiment_cache_entries'
+down_revision = '006_add_rate_limit_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 感情分析結果の永続キャッシュ（SENTIMENT_CACHE_PERSISTENT=true の場合に使用）
+    op.create_table(
+        'sentiment_cache_entries',
+        sa.Column('key', sa.String(length=64), primary_key=True),
+        sa.Column('result', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    # 期限切れエントリの削除用
+    op.create_index('ix_sentiment_cache_entries_expires_at', 'sentiment_cache_entries', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sentiment_cache_entries_expires_at', table_name='sentiment_cache_entries')
+    op.drop_table('sentiment_cache_entries')
@@ -0,0 +1,33 @@
+"""add composite index for chat history keyset pagination
+
+Revision ID: 008_add_chat_messages_keyset
+Revises: 007_add_sentiment_cache_entries
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_chat_messages_keyset'
+down_revision = '007_add_sentiment_cache_entries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # チャット履歴のキーセットページング（WHERE user_id = ? AND (created_at, id) > (?, ?)）を
+    # インデックスの範囲走査だけで解決する
+    op.create_index(
+        'ix_chat_messages_user_created_id',
+        'chat_messages',
+        ['user_id', 'created_at', 'id'],
+    )
+    # (user_id, created_at) の検索は新しいインデックスの先頭列で賄える
+    op.drop_index('ix_chat_messages_user_created', table_name='chat_messages')
+
+
+def downgrade() -> None:
+    op.create_index('ix_chat_messages_user_created', 'chat_messages', ['user_id', 'created_at'])
+    op.drop_index('ix_chat_messages_user_created_id', table_name='chat_messages')
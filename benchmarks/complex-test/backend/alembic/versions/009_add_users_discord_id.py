@@ -0,0 +1,27 @@
+"""add discord_id column to users
+
+Revision ID: 009_add_users_discord_id
+Revises: 008_add_chat_messages_keyset
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_users_discord_id'
+down_revision = '008_add_chat_messages_keyset'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Discordのメッセージ送信者（author.id）から連携済みユーザーを検索する
+    op.add_column('users', sa.Column('discord_id', sa.String(), nullable=True))
+    op.create_index('ix_users_discord_id', 'users', ['discord_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_discord_id', table_name='users')
+    op.drop_column('users', 'discord_id')
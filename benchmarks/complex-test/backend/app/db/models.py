@@ -1,7 +1,7 @@
 """
 SQLAlchemyデータベースモデル
 """
-from sqlalchemy import Column, String, Boolean, Integer, Float, Date, DateTime, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import Column, String, Boolean, Integer, BigInteger, Float, Date, DateTime, ForeignKey, Index, Enum as SQLEnum, JSON
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -47,6 +47,11 @@ class Department(Base):
     description = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # 同じ会社内で部署名は一意（CSVインポートの部署一括作成で競合を検出）
+    __table_args__ = (
+        Index("uq_departments_company_name", "company_id", "name", unique=True),
+    )
+
     company = relationship("Company", back_populates="departments")
     users = relationship("User", back_populates="department")
 
@@ -62,10 +67,16 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(SQLEnum(UserRole, values_callable=lambda x: [e.value for e in x], create_constraint=False, native_enum=False), nullable=False, default=UserRole.EMPLOYEE)
     slack_id = Column(String, nullable=True)
+    discord_id = Column(String, nullable=True, index=True)  # Discord連携用
     line_user_id = Column(String, nullable=True, index=True)  # LINE連携用
     link_code = Column(String, nullable=True, unique=True)  # 連携コード
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # 大文字小文字を区別しないメールアドレス検索用（CSVインポートの重複チェック）
+    __table_args__ = (
+        Index("ix_users_email_lower", func.lower(email)),
+    )
+
     company = relationship("Company", back_populates="users")
     department = relationship("Department", back_populates="users")
     stress_checks = relationship("StressCheck", back_populates="user")
@@ -128,4 +139,61 @@ class ChatMessage(Base):
     sentiment_score = Column(Float, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # 履歴のキーセットページング（user_id で絞り込み、(created_at, id) の順に走査）
+        Index("ix_chat_messages_user_created_id", "user_id", "created_at", "id"),
+    )
+
     user = relationship("User", back_populates="chat_messages")
+
+
+class CSVImportJobStatus(str, enum.Enum):
+    """CSVインポートジョブの状態"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class CSVImportJob(Base):
+    """CSVインポートジョブテーブル（チェックポイント付き非同期インポート）"""
+    __tablename__ = "csv_import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False, index=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)  # 永続化したアップロードファイル
+    skip_errors = Column(Boolean, nullable=False, default=False)
+    chunk_size = Column(Integer, nullable=False)
+    status = Column(SQLEnum(CSVImportJobStatus, values_callable=lambda x: [e.value for e in x], create_constraint=False, native_enum=False), nullable=False, default=CSVImportJobStatus.PENDING, index=True)
+    total_rows = Column(Integer, nullable=False, default=0)
+    validated_rows = Column(Integer, nullable=False, default=0)
+    hashed_rows = Column(Integer, nullable=False, default=0)
+    inserted_rows = Column(Integer, nullable=False, default=0)
+    skipped_rows = Column(Integer, nullable=False, default=0)
+    committed_chunks = Column(Integer, nullable=False, default=0)
+    last_row_number = Column(Integer, nullable=False, default=1)  # チェックポイント（処理済みの最終行番号、ヘッダー=1）
+    error_details = Column(JSONB, nullable=True)  # { "validation_errors": [...], "duplicates": [...] }
+    message = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RateLimitCounter(Base):
+    """レート制限カウンターテーブル（スライディングウィンドウの固定窓ごとの回数）"""
+    __tablename__ = "rate_limit_counters"
+
+    key = Column(String, primary_key=True)  # "auth:login:203.0.113.1" など
+    window_start = Column(BigInteger, primary_key=True, index=True)  # 窓の開始時刻（UNIX秒）
+    count = Column(Integer, nullable=False, default=0)
+
+
+class SentimentCacheEntry(Base):
+    """感情分析結果キャッシュテーブル（正規化済みテキストのダイジェストごと）"""
+    __tablename__ = "sentiment_cache_entries"
+
+    key = Column(String(64), primary_key=True)  # 正規化済みテキストのSHA-256（16進）
+    result = Column(String, nullable=False)  # 分析結果（JSON文字列）
+    expires_at = Column(BigInteger, nullable=False, index=True)  # 有効期限（UNIX秒）
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -6,12 +6,13 @@ import logging
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 from app.routers import auth, stress_check, chat, dashboard, admin, department, reports, csv_import, line_webhook, slack_webhook, teams_webhook, discord_webhook, user, reminder, org_analysis
 from app.services.scheduler_service import scheduler_service
+from app.services.csv_import_job_service import csv_import_job_runner
+from app.services.openai_client import close_openai_client
+from app.services.content_screening import content_screener
 import os
+import sys
 
 # ロギング設定
 logging.basicConfig(
@@ -20,24 +21,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# レート制限設定
-limiter = Limiter(key_func=get_remote_address)
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """アプリケーションのライフサイクル管理"""
     # MongoDB接続はスキップ（必要時に設定）
     logger.info("Application started (MongoDB disabled)")
 
+    # 不適切コンテンツの判定語を読み込み、オートマトンを構築
+    content_screener.load()
+
     # スケジューラーを開始
     scheduler_service.start()
     logger.info("Scheduler service started")
 
+    # 未処理・中断されたCSVインポートジョブを再開
+    csv_import_job_runner.start()
+
     yield
 
+    # CSVインポートジョブを停止（次回起動時にチェックポイントから再開）
+    await csv_import_job_runner.shutdown()
+
+    # PDF描画用プロセスプールを停止（ReportLabは初回利用時に読み込むため、読み込み済みの場合のみ）
+    pdf_generator = sys.modules.get("app.services.pdf_generator")
+    if pdf_generator is not None:
+        pdf_generator.shutdown_render_executor()
+
     # スケジューラーを停止
     scheduler_service.shutdown()
+
+    # OpenAIクライアントのコネクションを閉じる
+    await close_openai_client()
     logger.info("Application shutdown")
 
 
@@ -58,10 +72,6 @@ app = FastAPI(
     ]
 )
 
-# レート制限ハンドラ登録
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS設定
 cors_origins_env = os.getenv("CORS_ALLOW_ORIGINS", "")
 cors_origins = [o.strip() for o in cors_origins_env.split(",") if o.strip()]
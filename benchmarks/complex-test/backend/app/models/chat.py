@@ -19,6 +19,7 @@ class ChatResponse(BaseModel):
     topics: List[str]
     urgency: int
     risk_flags: List[str]
+    source: Optional[str] = None  # 分析結果の出所（llm / cache / lexicon / lexicon_fallback）
 
 
 class DailyScoreResponse(BaseModel):
@@ -43,9 +44,10 @@ class ChatHistoryMessage(BaseModel):
 class ChatHistoryResponse(BaseModel):
     """チャット履歴レスポンス"""
     messages: List[ChatHistoryMessage]
-    total: int
+    total: Optional[int] = None  # include_total=true の場合のみ
     limit: int
     offset: int
+    next_cursor: Optional[str] = None  # 次のページのカーソル（最後のページならNone）
 
 
 class SaveChatMessageRequest(BaseModel):
@@ -2,7 +2,8 @@
 CSVインポート関連のPydanticモデル
 """
 from pydantic import BaseModel, EmailStr, Field
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
 
 class CSVRowData(BaseModel):
@@ -28,17 +29,6 @@ class DuplicateEntry(BaseModel):
     duplicate_type: str  # "csv_internal" or "database"
 
 
-class CSVImportResult(BaseModel):
-    """CSVインポート結果"""
-    success: bool
-    total_rows: int
-    imported_count: int
-    skipped_count: int
-    validation_errors: List[CSVValidationError] = []
-    duplicates: List[DuplicateEntry] = []
-    message: str
-
-
 class CSVPreviewRow(BaseModel):
     """CSVプレビュー用の行データ"""
     row_number: int
@@ -59,3 +49,21 @@ class CSVPreviewResponse(BaseModel):
     duplicate_in_db: int
     preview_data: List[CSVPreviewRow]
     can_import: bool
+
+
+class CSVImportJobResponse(BaseModel):
+    """CSVインポートジョブの進捗"""
+    job_id: str
+    status: str  # "pending", "running", "completed", "failed"
+    filename: str
+    total_rows: int = 0
+    validated_rows: int = 0
+    hashed_rows: int = 0
+    inserted_rows: int = 0
+    skipped_rows: int = 0
+    committed_chunks: int = 0
+    validation_errors: List[CSVValidationError] = []
+    duplicates: List[DuplicateEntry] = []
+    message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from typing import List
 from datetime import date
+import asyncio
 from uuid import UUID
 
 from app.db.database import get_db
@@ -21,12 +22,17 @@ from app.models.email import (
     BulkEmailResponse,
 )
 from app.services.email_service import email_service
+from app.services.principal_cache import Principal, principal_cache
+from app.services.ai_service import history_summarizer, sentiment_batcher, sentiment_cache
+from app.services.llm_governor import llm_governor
+from app.services.content_screening import content_screener
+from app.utils.security import password_hash_stats, token_decode_cache
 from app.routers.auth import get_current_user
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
 
-async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """管理者権限チェック"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -39,7 +45,7 @@ async def require_admin(current_user: User = Depends(get_current_user)) -> User:
 @router.post("/email/reminder", response_model=EmailResponse)
 async def send_reminder_email(
     request: ReminderEmailRequest,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """
     リマインドメール送信（単一）
@@ -70,7 +76,7 @@ async def send_reminder_email(
 @router.post("/email/reminder/bulk", response_model=BulkEmailResponse)
 async def send_bulk_reminder_emails(
     request: BulkReminderEmailRequest,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """
     リマインドメール一括送信
@@ -113,7 +119,7 @@ async def send_bulk_reminder_emails(
 @router.post("/email/high-stress-followup", response_model=EmailResponse)
 async def send_high_stress_followup_email(
     request: HighStressFollowupEmailRequest,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """
     高ストレス者フォローアップメール送信
@@ -144,7 +150,7 @@ async def send_high_stress_followup_email(
 @router.post("/email/completion", response_model=EmailResponse)
 async def send_completion_email(
     request: CompletionEmailRequest,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """
     ストレスチェック完了通知メール送信
@@ -177,7 +183,7 @@ async def send_completion_email(
 async def get_incomplete_users(
     period: date,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """
     未受検者一覧取得
@@ -219,7 +225,7 @@ async def get_incomplete_users(
 async def get_high_stress_users(
     period: date,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """
     高ストレス者一覧取得
@@ -254,3 +260,68 @@ async def get_high_stress_users(
         "high_stress_count": len(high_stress_users),
         "users": high_stress_users
     }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: Principal = Depends(require_admin),
+):
+    """
+    キャッシュ統計取得
+
+    プロセス内キャッシュのサイズ・ヒット率などを返す
+    """
+    return {
+        "principal": principal_cache.stats(),
+        "jwt": token_decode_cache.stats(),
+        "sentiment": sentiment_cache.stats(),
+        "history_summary": history_summarizer.stats(),
+    }
+
+
+@router.get("/metrics/password-hashing")
+async def get_password_hashing_metrics(
+    current_user: Principal = Depends(require_admin),
+):
+    """
+    パスワードハッシュ処理の統計取得
+
+    ログイン・登録用と一括処理用のプールごとに、キュー待ち時間などを返す
+    """
+    return password_hash_stats()
+
+
+@router.get("/metrics/llm")
+async def get_llm_metrics(
+    current_user: Principal = Depends(require_admin),
+):
+    """
+    LLM呼び出しの統計取得
+
+    同時実行数・優先度別の待ち行列・サーキットブレーカーの状態、
+    感情分析のマイクロバッチの統計などを返す
+    """
+    return {
+        **llm_governor.stats(),
+        "sentiment_batch": sentiment_batcher.stats(),
+    }
+
+
+@router.post("/content-screening/reload")
+async def reload_content_screening(
+    current_user: Principal = Depends(require_admin),
+):
+    """
+    不適切コンテンツの判定語を再読み込み
+
+    判定語ファイルの更新を自動検知（CONTENT_SCREENING_RELOAD_INTERVAL_SECONDS）を待たずに即時反映する
+    """
+    try:
+        # 判定語が多い場合の構築処理でイベントループを止めない
+        await asyncio.to_thread(content_screener.load)
+    except OSError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"判定語ファイルを読み込めませんでした: {e}"
+        )
+    return content_screener.stats()
@@ -1,19 +1,19 @@
 """
 認証関連エンドポイント
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, Cookie, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, Cookie
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from app.db.database import get_db
 from app.db.models import User, Company, UserRole, PlanType
 from app.models.auth import UserRegister, UserLogin, AuthResponse, AuthUser
 from app.models.user import UserResponse
+from app.services.principal_cache import Principal, principal_cache, PRINCIPAL_CACHE_ENABLED
+from app.services.rate_limiter import rate_limit
 from app.utils.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     create_refresh_token,
     decode_access_token,
@@ -27,9 +27,6 @@ import os
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
-# レート制限設定
-limiter = Limiter(key_func=get_remote_address)
-
 ACCESS_TOKEN_COOKIE = os.getenv("ACCESS_TOKEN_COOKIE", "access_token")
 REFRESH_TOKEN_COOKIE = os.getenv("REFRESH_TOKEN_COOKIE", "refresh_token")
 COOKIE_DOMAIN = os.getenv("COOKIE_DOMAIN") or None
@@ -60,10 +57,12 @@ def _set_auth_cookies(response: Response, access_token: str, refresh_token: str)
     )
 
 
-@router.post("/register", response_model=AuthResponse)
-@limiter.limit("5/minute")
+@router.post(
+    "/register",
+    response_model=AuthResponse,
+    dependencies=[Depends(rate_limit("auth:register", 5, 60))]
+)
 async def register(
-    request: Request,
     user_data: UserRegister,
     response: Response,
     db: AsyncSession = Depends(get_db)
@@ -106,7 +105,7 @@ async def register(
     user = User(
         company_id=company.id,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         role=UserRole.ADMIN
     )
     db.add(user)
@@ -128,10 +127,12 @@ async def register(
     )
 
 
-@router.post("/login", response_model=AuthResponse)
-@limiter.limit("10/minute")
+@router.post(
+    "/login",
+    response_model=AuthResponse,
+    dependencies=[Depends(rate_limit("auth:login", 10, 60))]
+)
 async def login(
-    request: Request,
     credentials: UserLogin,
     response: Response,
     db: AsyncSession = Depends(get_db)
@@ -141,7 +142,7 @@ async def login(
     result = await db.execute(select(User).where(User.email == credentials.email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="メールアドレスまたはパスワードが正しくありません"
@@ -163,10 +164,12 @@ async def login(
     )
 
 
-@router.post("/refresh", response_model=AuthResponse)
-@limiter.limit("30/minute")
+@router.post(
+    "/refresh",
+    response_model=AuthResponse,
+    dependencies=[Depends(rate_limit("auth:refresh", 30, 60))]
+)
 async def refresh_token(
-    request: Request,
     response: Response,
     refresh_token: Optional[str] = Cookie(default=None, alias=REFRESH_TOKEN_COOKIE),
     db: AsyncSession = Depends(get_db)
@@ -227,8 +230,14 @@ async def get_current_user(
     authorization: Optional[str] = Header(None),
     access_token: Optional[str] = Cookie(default=None, alias=ACCESS_TOKEN_COOKIE),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """現在のユーザーを取得（依存性注入用）"""
+) -> Principal:
+    """
+    現在のユーザーを取得（依存性注入用）
+
+    軽量なプリンシパル（id, company_id, department_id, role, email）を返します。
+    プリンシパルはプロセス内にキャッシュされ、キャッシュミス時のみDBを参照します。
+    その他のカラムが必要な場合や更新する場合は get_current_user_record を使用してください。
+    """
     token = None
     if authorization and authorization.startswith("Bearer "):
         token = authorization.replace("Bearer ", "")
@@ -254,20 +263,53 @@ async def get_current_user(
             detail="トークンが無効です"
         )
 
-    result = await db.execute(select(User).where(User.id == UUID(user_id)))
-    user = result.scalar_one_or_none()
-    if user is None:
+    user_uuid = UUID(user_id)
+    if PRINCIPAL_CACHE_ENABLED:
+        principal = principal_cache.get(user_uuid)
+        if principal is not None:
+            return principal
+
+    result = await db.execute(
+        select(User.id, User.company_id, User.department_id, User.role, User.email)
+        .where(User.id == user_uuid)
+    )
+    row = result.one_or_none()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="ユーザーが見つかりません"
         )
 
+    principal = Principal(
+        id=row.id,
+        company_id=row.company_id,
+        department_id=row.department_id,
+        role=row.role,
+        email=row.email,
+    )
+    if PRINCIPAL_CACHE_ENABLED:
+        principal_cache.set(principal)
+    return principal
+
+
+async def get_current_user_record(
+    principal: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """現在のユーザーをORMオブジェクトで取得（全カラムの参照・更新用）"""
+    user = await db.get(User, principal.id)
+    if user is None:
+        principal_cache.invalidate(principal.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="ユーザーが見つかりません"
+        )
     return user
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """現在のユーザー情報を取得"""
@@ -2,9 +2,10 @@
 チャット・AI分析関連エンドポイント
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
-from app.db.models import User, DailyScore
+from app.db.models import DailyScore
 from app.models.chat import (
     ChatMessage,
     ChatResponse,
@@ -15,35 +16,44 @@ from app.models.chat import (
     SaveChatMessageResponse,
     DeleteChatHistoryResponse
 )
-from app.services.ai_service import analyze_sentiment, generate_chat_reply
+from app.services.ai_service import should_block_message
+from app.services.chat_pipeline import run_chat_turn, stream_chat_turn
 from app.services.chat_history_service import (
     save_chat_message as save_chat_message_db,
+    encode_cursor,
     get_chat_history as get_chat_history_db,
+    get_chat_history_page as get_chat_history_page_db,
     get_chat_history_count as get_chat_history_count_db,
+    get_recent_chat_history as get_recent_chat_history_db,
     delete_chat_history as delete_chat_history_db,
     delete_chat_message as delete_chat_message_db
 )
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
+from app.services.rate_limiter import enforce_rate_limit
 from app.services.notification_service import (
     get_notification_service,
-    check_and_notify_high_stress,
     NotificationPayload,
     NotificationType
 )
-from datetime import date, datetime, timedelta
 from pydantic import BaseModel
-from typing import Optional
-from sqlalchemy import select, and_, func
+from typing import Literal, Optional
+from sqlalchemy import select
 from uuid import UUID
 from collections import defaultdict
+import json
+import os
 
 router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
 
+# 1ユーザーあたり1時間に送信できるメッセージ数
+CHAT_RATE_LIMIT_PER_HOUR = int(os.getenv("CHAT_RATE_LIMIT_PER_HOUR", "10"))
+
 
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     message: ChatMessage,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """チャットメッセージを送信"""
@@ -61,70 +71,98 @@ async def send_message(
             detail="メッセージは1000文字以内で入力してください"
         )
 
-    # レート制限チェック: 過去1時間のメッセージ数を確認
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    recent_scores_result = await db.execute(
-        select(func.count(DailyScore.id))
-        .where(
-            and_(
-                DailyScore.user_id == current_user.id,
-                DailyScore.created_at >= one_hour_ago
-            )
+    # レート制限チェック: ユーザーごとに1時間あたりの送信回数を制限
+    await enforce_rate_limit(
+        f"chat:{current_user.id}",
+        CHAT_RATE_LIMIT_PER_HOUR,
+        60 * 60,
+        "送信回数の上限に達しました"
+    )
+
+    # AI分析（1回の推論で返信・日次スコア保存・通知まで行う）
+    turn = await run_chat_turn(message.content, db=db, user_id=current_user.id)
+
+    # 不適切なコンテンツが検出された場合
+    if turn.blocked:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不適切な内容が検出されました"
         )
+
+    analysis = turn.analysis
+
+    return ChatResponse(
+        message=turn.reply,
+        sentiment_score=analysis["sentiment"],
+        topics=analysis["topics"],
+        urgency=analysis["urgency"],
+        risk_flags=analysis["risk_flags"],
+        source=analysis.get("source")
     )
-    recent_count = recent_scores_result.scalar() or 0
 
-    if recent_count >= 10:
+
+def _format_sse(event: str, data: dict) -> str:
+    """Server-Sent Events の1イベントに整形"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/counselor/stream")
+async def stream_counselor_message(
+    message: ChatMessage,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    AIカウンセラーの応答をストリーミング（Server-Sent Events）
+
+    生成されたトークンを "token" イベントで順次送信し、完了時に
+    ユーザーメッセージと応答を履歴に保存して "done" イベント（感情分析結果を含む）を送信します。
+    """
+    if not message.content or len(message.content.strip()) == 0:
         raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="送信回数の上限に達しました"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="メッセージを入力してください"
         )
 
-    # AI分析
-    analysis = await analyze_sentiment(message.content)
+    if len(message.content) > 1000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="メッセージは1000文字以内で入力してください"
+        )
 
-    # 不適切なコンテンツが検出された場合
-    if "inappropriate_content" in analysis.get("risk_flags", []):
+    if should_block_message(message.content):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="不適切な内容が検出されました"
         )
 
-    # 日次スコアを保存
-    today = date.today()
-    daily_score = DailyScore(
-        user_id=current_user.id,
-        date=today,
-        sentiment_score=analysis["sentiment"],
-        fatigue_level=None,  # AI分析から推測可能な場合は設定
-        sleep_hours=None
+    # /message と同じ送信回数の上限を共有
+    await enforce_rate_limit(
+        f"chat:{current_user.id}",
+        CHAT_RATE_LIMIT_PER_HOUR,
+        60 * 60,
+        "送信回数の上限に達しました"
     )
-    db.add(daily_score)
-    await db.commit()
 
-    # AI返信を生成
-    reply = await generate_chat_reply(message.content)
+    history = await get_recent_chat_history_db(db, current_user.id, limit=10)
 
-    # 高ストレス検出時の自動通知
-    await check_and_notify_high_stress(
-        sentiment_score=analysis["sentiment"],
-        urgency=analysis["urgency"],
-        risk_flags=analysis["risk_flags"],
-        topics=analysis["topics"]
-    )
+    async def event_stream():
+        async for event, data in stream_chat_turn(message.content, current_user.id, history):
+            yield _format_sse(event, data)
 
-    return ChatResponse(
-        message=reply,
-        sentiment_score=analysis["sentiment"],
-        topics=analysis["topics"],
-        urgency=analysis["urgency"],
-        risk_flags=analysis["risk_flags"]
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx のバッファリングを無効化
+        }
     )
 
 
 @router.get("/daily-scores", response_model=list[DailyScoreResponse])
 async def get_daily_scores(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """日次スコアを取得"""
@@ -153,26 +191,63 @@ async def get_daily_scores(
 @router.get("/history", response_model=ChatHistoryResponse)
 async def get_history(
     limit: int = Query(default=50, ge=1, le=100),
-    offset: int = Query(default=0, ge=0),
-    current_user: User = Depends(get_current_user),
+    offset: int = Query(default=0, ge=0, description="非推奨: cursor を使用してください"),
+    cursor: Optional[str] = Query(default=None, description="前のページの next_cursor"),
+    order: Literal["asc", "desc"] = Query(default="asc", description="asc: 古い順 / desc: 新しい順"),
+    include_total: bool = Query(default=False, description="総数を含める（キャッシュした値）"),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """チャット履歴を取得"""
-    messages = await get_chat_history_db(db, current_user.id, limit=limit, offset=offset)
-    total = await get_chat_history_count_db(db, current_user.id)
+    """
+    チャット履歴を取得
+
+    next_cursor を cursor に指定して次のページを取得します（キーセットページング）。
+    """
+    if offset and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offsetとcursorは同時に指定できません"
+        )
+    if offset and order == "desc":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offset指定時はorder=ascのみ利用できます（新しい順はcursorを使用してください）"
+        )
+
+    if offset:
+        # 後方互換（古い順のみ）
+        messages = await get_chat_history_db(db, current_user.id, limit=limit, offset=offset)
+        next_cursor = None
+        if len(messages) == limit:
+            next_cursor = encode_cursor(messages[-1]["created_at"], messages[-1]["id"])
+    else:
+        try:
+            messages, next_cursor = await get_chat_history_page_db(
+                db, current_user.id, limit=limit, cursor=cursor, descending=order == "desc"
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="cursorが不正です"
+            )
+
+    total = None
+    if include_total:
+        total = await get_chat_history_count_db(db, current_user.id, use_cache=True)
 
     return ChatHistoryResponse(
         messages=[ChatHistoryMessage(**msg) for msg in messages],
         total=total,
         limit=limit,
-        offset=offset
+        offset=offset,
+        next_cursor=next_cursor
     )
 
 
 @router.post("/history", response_model=SaveChatMessageResponse)
 async def save_message(
     request: SaveChatMessageRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """チャットメッセージを保存"""
@@ -203,7 +278,7 @@ async def save_message(
 
 @router.delete("/history", response_model=DeleteChatHistoryResponse)
 async def clear_history(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """チャット履歴を全削除"""
@@ -214,7 +289,7 @@ async def clear_history(
 @router.delete("/history/{message_id}")
 async def delete_message(
     message_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """特定のチャットメッセージを削除"""
@@ -268,7 +343,7 @@ async def teams_webhook(request: TeamsWebhookRequest):
 
 @router.post("/notify/test")
 async def test_notification(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """通知テスト用エンドポイント（管理者のみ）"""
     if current_user.role.value != "admin":
@@ -1,191 +1,52 @@
 """
 CSV一括インポートエンドポイント
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
-import csv
 import io
-import re
-import secrets
-import string
+import uuid
 
 from app.db.database import get_db
-from app.db.models import User, UserRole
+from app.db.models import UserRole, CSVImportJob, CSVImportJobStatus
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.models.csv_import import (
-    CSVImportResult,
-    CSVValidationError,
-    DuplicateEntry,
     CSVPreviewResponse,
     CSVPreviewRow,
+    CSVImportJobResponse,
+)
+from app.services.csv_import_service import (
+    CSV_IMPORT_CHUNK_SIZE,
+    CSV_PREVIEW_SAMPLE_SIZE,
+    peek_first_row,
+    scan_csv_preview,
+    check_duplicates,
+)
+from app.services.csv_import_job_service import (
+    HEADER_ROW_NUMBER,
+    csv_import_job_runner,
+    persist_upload,
+    to_job_response,
 )
-from app.utils.security import get_password_hash
 
 router = APIRouter(prefix="/api/v1/admin/csv", tags=["csv-import"])
 
-# 必須カラム
-REQUIRED_COLUMNS = ["email", "name", "employee_id", "department"]
-
-
-def generate_temp_password(length: int = 12) -> str:
-    """一時パスワード生成"""
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
-
-
-def validate_email(email: str) -> bool:
-    """メールアドレスの形式チェック"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
-
-
-async def parse_csv_file(file: UploadFile) -> tuple[List[dict], List[CSVValidationError]]:
-    """CSVファイルをパースしてバリデーション"""
-    content = await file.read()
-
-    # エンコーディング検出（UTF-8, Shift-JIS対応）
-    try:
-        text = content.decode('utf-8-sig')
-    except UnicodeDecodeError:
-        try:
-            text = content.decode('shift-jis')
-        except UnicodeDecodeError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="CSVファイルのエンコーディングが不正です。UTF-8またはShift-JISで保存してください。"
-            )
-
-    reader = csv.DictReader(io.StringIO(text))
-
-    # ヘッダーチェック
-    if not reader.fieldnames:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="CSVファイルにヘッダーがありません"
-        )
-
-    missing_columns = [col for col in REQUIRED_COLUMNS if col not in reader.fieldnames]
-    if missing_columns:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"必須カラムがありません: {', '.join(missing_columns)}"
-        )
-
-    rows = []
-    errors = []
-
-    for row_num, row in enumerate(reader, start=2):  # ヘッダーが1行目なので2から開始
-        row_errors = []
-
-        # 各フィールドのバリデーション
-        email = row.get('email', '').strip()
-        name = row.get('name', '').strip()
-        employee_id = row.get('employee_id', '').strip()
-        department = row.get('department', '').strip()
-
-        # 必須チェック
-        if not email:
-            row_errors.append(CSVValidationError(
-                row_number=row_num, column="email", value="", error_message="メールアドレスは必須です"
-            ))
-        elif not validate_email(email):
-            row_errors.append(CSVValidationError(
-                row_number=row_num, column="email", value=email, error_message="メールアドレスの形式が不正です"
-            ))
-
-        if not name:
-            row_errors.append(CSVValidationError(
-                row_number=row_num, column="name", value="", error_message="名前は必須です"
-            ))
-        elif len(name) > 100:
-            row_errors.append(CSVValidationError(
-                row_number=row_num, column="name", value=name[:20] + "...", error_message="名前は100文字以内で入力してください"
-            ))
-
-        if not employee_id:
-            row_errors.append(CSVValidationError(
-                row_number=row_num, column="employee_id", value="", error_message="社員IDは必須です"
-            ))
-        elif len(employee_id) > 50:
-            row_errors.append(CSVValidationError(
-                row_number=row_num, column="employee_id", value=employee_id[:20] + "...", error_message="社員IDは50文字以内で入力してください"
-            ))
-
-        if not department:
-            row_errors.append(CSVValidationError(
-                row_number=row_num, column="department", value="", error_message="部署は必須です"
-            ))
-        elif len(department) > 100:
-            row_errors.append(CSVValidationError(
-                row_number=row_num, column="department", value=department[:20] + "...", error_message="部署は100文字以内で入力してください"
-            ))
-
-        errors.extend(row_errors)
-        rows.append({
-            "row_number": row_num,
-            "email": email,
-            "name": name,
-            "employee_id": employee_id,
-            "department": department,
-            "is_valid": len(row_errors) == 0,
-            "errors": [e.error_message for e in row_errors]
-        })
-
-    return rows, errors
-
-
-async def check_duplicates(
-    rows: List[dict],
-    company_id: str,
-    db: AsyncSession
-) -> tuple[List[DuplicateEntry], List[DuplicateEntry]]:
-    """重複チェック（CSV内重複とDB重複）"""
-    csv_duplicates = []
-    db_duplicates = []
-
-    # CSV内の重複チェック
-    email_counts = {}
-    for row in rows:
-        email = row["email"].lower()
-        if email in email_counts:
-            csv_duplicates.append(DuplicateEntry(
-                row_number=row["row_number"],
-                email=row["email"],
-                duplicate_type="csv_internal"
-            ))
-        else:
-            email_counts[email] = row["row_number"]
-
-    # DBの重複チェック
-    if rows:
-        emails = [row["email"].lower() for row in rows]
-        result = await db.execute(
-            select(User).where(User.email.in_(emails))
-        )
-        existing_users = result.scalars().all()
-        existing_emails = {u.email.lower() for u in existing_users}
-
-        for row in rows:
-            if row["email"].lower() in existing_emails:
-                db_duplicates.append(DuplicateEntry(
-                    row_number=row["row_number"],
-                    email=row["email"],
-                    duplicate_type="database"
-                ))
-
-    return csv_duplicates, db_duplicates
-
 
 @router.post("/preview", response_model=CSVPreviewResponse)
 async def preview_csv(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    sample_size: int = Query(default=CSV_PREVIEW_SAMPLE_SIZE, ge=1, le=1000),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """CSVファイルのプレビュー（インポート前確認）"""
+    """CSVファイルのプレビュー（インポート前確認）
+
+    先頭sample_size行の行データを返します。件数の集計は1パスの走査で行い、
+    それ以降の行はメールアドレスのみを重複チェックに使います。
+    """
     # 管理者権限チェック
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -200,25 +61,27 @@ async def preview_csv(
             detail="CSVファイルのみアップロード可能です"
         )
 
-    # CSVパース
-    rows, validation_errors = await parse_csv_file(file)
+    # CSVパース（先頭行のみ保持）
+    sample_rows, total_rows, invalid_row_numbers, email_entries = await run_in_threadpool(
+        scan_csv_preview, file.file, sample_size
+    )
 
-    if not rows:
+    if total_rows == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="CSVファイルにデータがありません"
         )
 
-    # 重複チェック
+    # 重複チェック（メールアドレスのみ）
     csv_duplicates, db_duplicates = await check_duplicates(
-        rows, str(current_user.company_id), db
+        email_entries, str(current_user.company_id), db
     )
 
-    # 重複情報をrowsに反映
+    # 重複情報をプレビュー行に反映
     csv_dup_rows = {d.row_number for d in csv_duplicates}
     db_dup_rows = {d.row_number for d in db_duplicates}
 
-    for row in rows:
+    for row in sample_rows:
         if row["row_number"] in csv_dup_rows:
             row["errors"].append("CSV内で重複しています")
             row["is_valid"] = False
@@ -226,32 +89,33 @@ async def preview_csv(
             row["errors"].append("既にデータベースに登録されています")
             row["is_valid"] = False
 
-    valid_rows = sum(1 for r in rows if r["is_valid"])
-    invalid_rows = len(rows) - valid_rows
-
-    preview_data = [
-        CSVPreviewRow(**row) for row in rows[:100]  # 最大100件表示
-    ]
+    invalid_rows = len(invalid_row_numbers | csv_dup_rows | db_dup_rows)
+    valid_rows = total_rows - invalid_rows
 
     return CSVPreviewResponse(
-        total_rows=len(rows),
+        total_rows=total_rows,
         valid_rows=valid_rows,
         invalid_rows=invalid_rows,
         duplicate_in_csv=len(csv_duplicates),
         duplicate_in_db=len(db_duplicates),
-        preview_data=preview_data,
+        preview_data=[CSVPreviewRow(**row) for row in sample_rows],
         can_import=valid_rows > 0
     )
 
 
-@router.post("/import", response_model=CSVImportResult)
+@router.post("/import", response_model=CSVImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def import_csv(
     file: UploadFile = File(...),
     skip_errors: bool = False,
-    current_user: User = Depends(get_current_user),
+    chunk_size: int = Query(default=CSV_IMPORT_CHUNK_SIZE, ge=1, le=10000),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """CSVファイルから従業員を一括登録"""
+    """CSVファイルから従業員を一括登録（非同期ジョブ）
+
+    ファイルを保存してジョブIDを即時に返します。登録はバックグラウンドで
+    chunk_size行ごとにコミットされ、進捗は GET /import/{job_id} で確認できます。
+    """
     # 管理者権限チェック
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -266,84 +130,81 @@ async def import_csv(
             detail="CSVファイルのみアップロード可能です"
         )
 
-    # CSVパース
-    rows, validation_errors = await parse_csv_file(file)
-
-    if not rows:
+    # エンコーディング・ヘッダーを先に検証（不正なファイルはジョブを作成しない）
+    first_row = await run_in_threadpool(peek_first_row, file.file)
+    if first_row is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="CSVファイルにデータがありません"
         )
 
-    # 重複チェック
-    csv_duplicates, db_duplicates = await check_duplicates(
-        rows, str(current_user.company_id), db
+    job_id = uuid.uuid4()
+    file_path = await run_in_threadpool(persist_upload, file.file, job_id)
+
+    job = CSVImportJob(
+        id=job_id,
+        company_id=current_user.company_id,
+        created_by=current_user.id,
+        filename=file.filename,
+        file_path=file_path,
+        skip_errors=skip_errors,
+        chunk_size=chunk_size,
+        status=CSVImportJobStatus.PENDING,
+        total_rows=0,
+        validated_rows=0,
+        hashed_rows=0,
+        inserted_rows=0,
+        skipped_rows=0,
+        committed_chunks=0,
+        last_row_number=HEADER_ROW_NUMBER,
     )
+    db.add(job)
+    await db.commit()
 
-    all_duplicates = csv_duplicates + db_duplicates
-
-    # skip_errors=Falseで、エラーがある場合は処理中止
-    if not skip_errors and (validation_errors or all_duplicates):
-        return CSVImportResult(
-            success=False,
-            total_rows=len(rows),
-            imported_count=0,
-            skipped_count=len(rows),
-            validation_errors=validation_errors,
-            duplicates=all_duplicates,
-            message="バリデーションエラーまたは重複があります。skip_errors=trueで再実行するとエラー行をスキップしてインポートします。"
-        )
-
-    # インポート対象の行を特定
-    error_row_numbers = {e.row_number for e in validation_errors}
-    csv_dup_rows = {d.row_number for d in csv_duplicates}
-    db_dup_rows = {d.row_number for d in db_duplicates}
-    skip_rows = error_row_numbers | csv_dup_rows | db_dup_rows
-
-    # 既にインポート済みのメールアドレス（CSV内重複対策）
-    imported_emails = set()
-    imported_count = 0
-    skipped_count = 0
-
-    for row in rows:
-        if row["row_number"] in skip_rows:
-            skipped_count += 1
-            continue
+    csv_import_job_runner.enqueue(job.id)
 
-        email_lower = row["email"].lower()
-        if email_lower in imported_emails:
-            skipped_count += 1
-            continue
+    return to_job_response(job)
 
-        # 一時パスワード生成
-        temp_password = generate_temp_password()
 
-        # ユーザー作成
-        new_user = User(
-            company_id=current_user.company_id,
-            email=row["email"],
-            hashed_password=get_password_hash(temp_password),
-            role=UserRole.EMPLOYEE,
+@router.get("/import/{job_id}", response_model=CSVImportJobResponse)
+async def get_import_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """CSVインポートジョブの進捗取得"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="管理者権限が必要です"
         )
-        db.add(new_user)
-        imported_emails.add(email_lower)
-        imported_count += 1
 
-    await db.commit()
+    try:
+        job_uuid = uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="インポートジョブが見つかりません"
+        )
 
-    return CSVImportResult(
-        success=True,
-        total_rows=len(rows),
-        imported_count=imported_count,
-        skipped_count=skipped_count,
-        validation_errors=validation_errors if skip_errors else [],
-        duplicates=all_duplicates if skip_errors else [],
-        message=f"{imported_count}件のユーザーを登録しました。{skipped_count}件はスキップされました。"
+    result = await db.execute(
+        select(CSVImportJob).where(
+            CSVImportJob.id == job_uuid,
+            CSVImportJob.company_id == current_user.company_id
+        )
     )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="インポートジョブが見つかりません"
+        )
+
+    return to_job_response(job)
 
 
 @router.get("/template")
-async def download_template(current_user: User = Depends(get_current_user)):
+async def download_template(current_user: Principal = Depends(get_current_user)):
     """CSVテンプレートのダウンロード"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -8,6 +8,7 @@ from app.db.database import get_db
 from app.db.models import User, StressCheck, DailyScore, UserRole, Department
 from app.models.dashboard import DashboardResponse, DashboardStats, DepartmentStat, AlertItem, RecommendationItem
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from datetime import date, timedelta
 from typing import Optional
 from uuid import UUID
@@ -60,7 +61,7 @@ async def get_company_dashboard(
     period: Optional[PeriodFilter] = Query(None, description="期間フィルター"),
     start_date: Optional[date] = Query(None, description="開始日（YYYY-MM-DD形式）"),
     end_date: Optional[date] = Query(None, description="終了日（YYYY-MM-DD形式）"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """会社全体の統計データ取得（部署・期間フィルター対応）"""
@@ -225,7 +226,7 @@ async def get_company_dashboard(
 
 @router.get("/alerts", response_model=list[AlertItem])
 async def get_alerts(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """高ストレスアラート一覧取得"""
@@ -244,7 +245,7 @@ async def get_alerts(
 @router.post("/alerts/{alert_id}/read")
 async def mark_alert_read(
     alert_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """アラートを既読にする"""
@@ -262,7 +263,7 @@ async def mark_alert_read(
 @router.delete("/alerts/{alert_id}/read")
 async def mark_alert_unread(
     alert_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """アラートを未読に戻す"""
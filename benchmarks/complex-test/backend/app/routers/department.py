@@ -13,6 +13,7 @@ from app.models.department import (
     DepartmentListResponse
 )
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from uuid import UUID
 
 router = APIRouter(prefix="/api/v1/departments", tags=["departments"])
@@ -20,7 +21,7 @@ router = APIRouter(prefix="/api/v1/departments", tags=["departments"])
 
 @router.get("", response_model=DepartmentListResponse)
 async def get_departments(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """会社の部署一覧を取得"""
@@ -56,7 +57,7 @@ async def get_departments(
 @router.get("/{department_id}", response_model=DepartmentResponse)
 async def get_department(
     department_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """部署詳細を取得"""
@@ -93,7 +94,7 @@ async def get_department(
 @router.post("", response_model=DepartmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_department(
     department_data: DepartmentCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """部署を作成（管理者のみ）"""
@@ -140,7 +141,7 @@ async def create_department(
 async def update_department(
     department_id: str,
     department_data: DepartmentUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """部署を更新（管理者のみ）"""
@@ -206,7 +207,7 @@ async def update_department(
 @router.delete("/{department_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_department(
     department_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """部署を削除（管理者のみ）"""
@@ -11,10 +11,10 @@ from typing import Dict, Any
 from datetime import date
 import logging
 
-from app.db.database import get_db
+from app.db.database import get_db, AsyncSessionLocal
 from app.db.models import User, StressCheck
 from app.services.discord_service import discord_service
-from app.services.ai_service import generate_chat_reply
+from app.services.chat_pipeline import run_chat_turn
 
 logger = logging.getLogger(__name__)
 
@@ -388,12 +388,21 @@ async def handle_chat_message(channel_id: str, user_id: str, text: str):
         )
         return
 
-    # AI応答を生成
-    try:
-        reply = await generate_chat_reply(text)
-    except Exception as e:
-        logger.error(f"AI応答生成エラー: {e}")
-        reply = "お話しいただきありがとうございます。もう少し詳しく聞かせていただけますか？"
+    # バックグラウンドタスクのためリクエストとは別のセッションを使用
+    async with AsyncSessionLocal() as db:
+        # 連携済みユーザーなら日次スコアを保存
+        result = await db.execute(
+            select(User.id).where(User.discord_id == user_id)
+        )
+        linked_user_id = result.scalar_one_or_none()
+
+        # AI応答を生成（分析・保存・通知を1回の推論で行う）
+        try:
+            turn = await run_chat_turn(text, db=db, user_id=linked_user_id)
+            reply = turn.reply
+        except Exception as e:
+            logger.error(f"AI応答生成エラー: {e}")
+            reply = "お話しいただきありがとうございます。もう少し詳しく聞かせていただけますか？"
 
     response_msg = discord_service.create_ai_response_embed(reply)
     await discord_service.send_message(
@@ -7,11 +7,14 @@ from sqlalchemy import select
 from typing import Dict, Any
 from urllib.parse import parse_qs
 from datetime import date
+import asyncio
 
 from app.db.database import get_db
 from app.db.models import User, StressCheck, Company
 from app.services.line_service import line_service
-from app.services.ai_service import generate_counselor_response
+from app.services.chat_pipeline import run_chat_turn
+from app.services.ai_service import generate_counselor_response, history_summarizer, should_block_message
+from app.services.conversation_history import HISTORY_TOKEN_BUDGET, trim_history
 
 router = APIRouter(prefix="/api/v1/line", tags=["line"])
 
@@ -27,6 +30,10 @@ STRESS_QUESTIONS = [
 # ユーザーごとの回答状態を一時保存（本番ではRedis推奨）
 user_sessions: Dict[str, Dict[str, Any]] = {}
 
+# セッションに保持する会話履歴の推定トークン数の上限
+# （LLMには予算内の直近の発言と、それより古い発言の要約を送る）
+LINE_HISTORY_STORE_TOKENS = HISTORY_TOKEN_BUDGET * 2
+
 
 @router.post("/webhook")
 async def line_webhook(request: Request, db: AsyncSession = Depends(get_db)):
@@ -257,6 +264,7 @@ async def complete_stress_check(reply_token: str, user_id: str, session: Dict[st
 
 async def start_chat_mode(reply_token: str, user_id: str):
     """AI相談モードを開始"""
+    history_summarizer.forget(f"line:{user_id}")
     user_sessions[user_id] = {
         "mode": "chat",
         "history": []
@@ -275,6 +283,7 @@ async def handle_chat_message(reply_token: str, user_id: str, text: str, db: Asy
     """チャットメッセージを処理"""
     if text == "終了":
         user_sessions.pop(user_id, None)
+        history_summarizer.forget(f"line:{user_id}")
         messages = [{"type": "text", "text": "相談を終了しました。またいつでもお話しください。"}]
         await line_service.reply_message(reply_token, messages)
         return
@@ -283,16 +292,44 @@ async def handle_chat_message(reply_token: str, user_id: str, text: str, db: Asy
     session = user_sessions.get(user_id, {"mode": "chat", "history": []})
     conversation_history = session.get("history", [])
 
-    # OpenAI APIを使用してAI応答を生成
-    ai_response = await generate_counselor_response(text, conversation_history)
+    # 連携済みユーザーなら日次スコアを保存
+    result = await db.execute(
+        select(User.id).where(User.line_user_id == user_id)
+    )
+    linked_user_id = result.scalar_one_or_none()
+
+    # 感情分析（1回のみ）・日次スコア保存・通知は、カウンセラー応答の生成と並行して実行
+    conversation_key = f"line:{user_id}"
+    analysis_task = asyncio.ensure_future(run_chat_turn(
+        text,
+        db=db,
+        user_id=linked_user_id,
+        conversation_history=conversation_history,
+        conversation_key=conversation_key
+    ))
+    try:
+        if should_block_message(text):
+            # 不適切な内容はカウンセラーに渡さず、遮断時の返信を使う
+            ai_response = (await analysis_task).reply
+        else:
+            # OpenAI APIを使用してAI応答を生成
+            ai_response = await generate_counselor_response(
+                text,
+                conversation_history,
+                conversation_key=conversation_key
+            )
+            # リクエストのDBセッションを使うため、応答前に保存・通知の完了を待つ
+            await analysis_task
+    finally:
+        if not analysis_task.done():
+            analysis_task.cancel()
 
     # 会話履歴を更新（セッションに保存）
     conversation_history.append({"role": "user", "content": text})
     conversation_history.append({"role": "assistant", "content": ai_response})
 
-    # 履歴が長くなりすぎないように制限（最大20件）
-    if len(conversation_history) > 20:
-        conversation_history = conversation_history[-20:]
+    # 履歴が長くなりすぎないように制限（古い発言は要約として引き継がれる）
+    conversation_history = trim_history(conversation_history, LINE_HISTORY_STORE_TOKENS)
 
     session["history"] = conversation_history
     user_sessions[user_id] = session
@@ -7,8 +7,9 @@ from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from app.db.database import get_db
-from app.db.models import User, StressCheck, Department, UserRole
+from app.db.models import StressCheck, Department, UserRole
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.org_analysis_service import OrgAnalysisService
 from pydantic import BaseModel
 from typing import List, Literal, Optional
@@ -66,7 +67,7 @@ class DepartmentDetailResponse(BaseModel):
 
 # --- Helper Functions ---
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """管理者権限を要求"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -81,7 +82,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
 @router.get("", response_model=OrgAnalysisResponse)
 async def get_org_analysis(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     組織全体の分析データを取得
@@ -96,7 +97,7 @@ async def get_org_analysis(
 @router.post("/generate-report", response_model=ReportGenerationResponse)
 async def generate_report(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     組織分析PDFレポートを生成
@@ -113,7 +114,7 @@ async def generate_report(
 @router.get("/reports/{filename}")
 async def download_report(
     filename: str,
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     生成されたレポートをダウンロード
@@ -138,7 +139,7 @@ async def download_report(
 async def get_department_detail(
     department_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     特定部署の詳細分析データを取得
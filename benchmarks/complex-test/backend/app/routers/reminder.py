@@ -8,8 +8,9 @@ from typing import List, Optional
 from datetime import date
 
 from app.db.database import get_db
-from app.db.models import User, UserRole
+from app.db.models import UserRole
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.reminder_service import reminder_service
 from app.services.scheduler_service import scheduler_service
 
@@ -46,7 +47,7 @@ class NonTakenUsersPreviewResponse(BaseModel):
 
 @router.get("/jobs", response_model=List[ScheduledJobResponse])
 async def get_scheduled_jobs(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     スケジュールされているリマインダージョブ一覧を取得
@@ -63,7 +64,7 @@ async def get_scheduled_jobs(
 
 @router.post("/trigger", response_model=ReminderStatsResponse)
 async def trigger_reminder(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     リマインダーを即時実行（管理者専用）
@@ -82,7 +83,7 @@ async def trigger_reminder(
 @router.post("/send/{company_id}", response_model=ReminderStatsResponse)
 async def send_reminder_to_company(
     company_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -109,7 +110,7 @@ async def send_reminder_to_company(
 
 @router.get("/preview", response_model=NonTakenUsersPreviewResponse)
 async def preview_reminder_targets(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
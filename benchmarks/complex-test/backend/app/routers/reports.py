@@ -1,27 +1,51 @@
 """
 PDFレポート生成エンドポイント
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 from datetime import date
+from typing import Literal
 from uuid import UUID
+from collections import defaultdict
+import logging
+import os
 
 from app.db.database import get_db
 from app.db.models import User, StressCheck, Company, UserRole, Department
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.stress_check_service import calculate_stress_scores
-from app.services.pdf_generator import (
-    get_stress_check_pdf_generator,
-    get_group_analysis_pdf_generator,
-    get_department_report_pdf_generator
-)
 from app.services.ai_service import generate_improvement_recommendations
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/v1/reports", tags=["reports"])
 
 
+def _stream_file_response(pdf_buffer, filename: str, media_type: str = "application/pdf") -> StreamingResponse:
+    """出力バッファをチャンク単位でストリーミング返却"""
+    from app.services.pdf_generator import iter_pdf_chunks
+
+    pdf_buffer.seek(0, os.SEEK_END)
+    content_length = pdf_buffer.tell()
+
+    return StreamingResponse(
+        iter_pdf_chunks(pdf_buffer),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(content_length)
+        }
+    )
+
+
+def _safe_filename(name: str) -> str:
+    """ファイル名に使えない文字を置換"""
+    return "".join("_" if c in '\\/:*?"<>|' else c for c in name)
+
+
 async def _get_latest_period(db: AsyncSession, user_ids: list[UUID]) -> date | None:
     if not user_ids:
         return None
@@ -31,6 +55,30 @@ async def _get_latest_period(db: AsyncSession, user_ids: list[UUID]) -> date | N
     return latest_period_result.scalar()
 
 
+def _summarize_department_checks(checks) -> dict:
+    """部署のストレスチェック結果から高ストレス者数・平均スコアを集計"""
+    count = len(checks)
+    job_stress_total = 0.0
+    stress_reaction_total = 0.0
+    support_total = 0.0
+    satisfaction_total = 0.0
+    for check in checks:
+        scores = calculate_stress_scores(check.answers)
+        job_stress_total += scores["job_stress_score"]
+        stress_reaction_total += scores["stress_reaction_score"]
+        support_total += scores["support_score"]
+        satisfaction_total += scores["satisfaction_score"]
+
+    return {
+        "high_stress_count": sum(1 for c in checks if c.is_high_stress),
+        "average_score": sum(c.total_score for c in checks) / count,
+        "job_stress_avg": job_stress_total / count,
+        "stress_reaction_avg": stress_reaction_total / count,
+        "support_avg": support_total / count,
+        "satisfaction_avg": satisfaction_total / count,
+    }
+
+
 async def _get_department_stats_for_period(
     db: AsyncSession,
     company_id: UUID,
@@ -88,7 +136,7 @@ async def _get_department_stats_for_period(
 @router.get("/stress-check/{check_id}/pdf")
 async def download_stress_check_pdf(
     check_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """個人のストレスチェック結果PDFをダウンロード"""
@@ -110,7 +158,8 @@ async def download_stress_check_pdf(
     # スコアを計算
     scores = calculate_stress_scores(check.answers)
 
-    # PDF生成
+    # PDF生成（ReportLabは初回利用時に読み込む）
+    from app.services.pdf_generator import get_stress_check_pdf_generator
     pdf_generator = get_stress_check_pdf_generator()
     pdf_buffer = pdf_generator.generate_individual_report(
         user_name=current_user.email.split('@')[0],  # 簡易的にメールからユーザー名を取得
@@ -126,19 +175,13 @@ async def download_stress_check_pdf(
     # ファイル名生成
     filename = f"stress_check_report_{check.period.strftime('%Y%m')}.pdf"
 
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
-    )
+    return _stream_file_response(pdf_buffer, filename)
 
 
 @router.get("/company/{company_id}/group-analysis/pdf")
 async def download_group_analysis_pdf(
     company_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """集団分析レポートPDFをダウンロード（管理者専用）"""
@@ -235,7 +278,8 @@ async def download_group_analysis_pdf(
         overall_stats
     )
 
-    # PDF生成
+    # PDF生成（ReportLabは初回利用時に読み込む）
+    from app.services.pdf_generator import get_group_analysis_pdf_generator
     pdf_generator = get_group_analysis_pdf_generator()
     pdf_buffer = pdf_generator.generate_company_report(
         company_name=company.name,
@@ -251,20 +295,14 @@ async def download_group_analysis_pdf(
     # ファイル名生成
     filename = f"group_analysis_report_{latest_period.strftime('%Y%m')}.pdf"
 
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
-    )
+    return _stream_file_response(pdf_buffer, filename)
 
 
 @router.get("/company/{company_id}/department/{department_name}/pdf")
 async def download_department_report_pdf(
     company_id: str,
     department_name: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """部署別統計レポートPDFをダウンロード（管理者専用）"""
@@ -336,49 +374,147 @@ async def download_department_report_pdf(
             detail="部署のストレスチェックデータがありません"
         )
 
-    high_stress_count = sum(1 for c in checks if c.is_high_stress)
-    average_score = sum(c.total_score for c in checks) / len(checks)
-
-    # 詳細スコア平均
-    job_stress_total = 0.0
-    stress_reaction_total = 0.0
-    support_total = 0.0
-    satisfaction_total = 0.0
-    for check in checks:
-        scores = calculate_stress_scores(check.answers)
-        job_stress_total += scores["job_stress_score"]
-        stress_reaction_total += scores["stress_reaction_score"]
-        support_total += scores["support_score"]
-        satisfaction_total += scores["satisfaction_score"]
-
-    count = len(checks)
-    job_stress_avg = job_stress_total / count
-    stress_reaction_avg = stress_reaction_total / count
-    support_avg = support_total / count
-    satisfaction_avg = satisfaction_total / count
-
-    # PDF生成
+    # PDF生成（ReportLabは初回利用時に読み込む）
+    from app.services.pdf_generator import get_department_report_pdf_generator
     pdf_generator = get_department_report_pdf_generator()
     pdf_buffer = pdf_generator.generate_department_report(
         company_name=company.name,
         department_name=department.name,
         period=latest_period,
         employee_count=employee_count,
-        high_stress_count=high_stress_count,
-        average_score=average_score,
-        job_stress_avg=job_stress_avg,
-        stress_reaction_avg=stress_reaction_avg,
-        support_avg=support_avg,
-        satisfaction_avg=satisfaction_avg
+        **_summarize_department_checks(checks)
     )
 
     # ファイル名生成
     filename = f"department_report_{department.name}_{latest_period.strftime('%Y%m')}.pdf"
 
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
+    return _stream_file_response(pdf_buffer, filename)
+
+
+@router.get("/company/{company_id}/departments/pdf-pack")
+async def download_department_report_pack(
+    company_id: str,
+    format: Literal["zip", "pdf"] = Query(default="zip"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """全部署の部署別レポートを一括ダウンロード（管理者専用）
+
+    - format=zip: 部署ごとのPDFをZIPにまとめて返す（部署単位で並列描画）
+    - format=pdf: 全部署を1つのPDFに結合して返す
+    """
+    # 管理者権限チェック
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="アクセス権限がありません"
+        )
+
+    company_result = await db.execute(
+        select(Company).where(Company.id == UUID(company_id))
+    )
+    company = company_result.scalar_one_or_none()
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="会社が見つかりません"
+        )
+
+    dept_result = await db.execute(
+        select(Department)
+        .where(Department.company_id == company.id)
+        .order_by(Department.name)
+    )
+    departments = dept_result.scalars().all()
+    if not departments:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="部署が見つかりません"
+        )
+
+    # 部署別の所属人数（1クエリ）
+    emp_count_result = await db.execute(
+        select(User.department_id, func.count(User.id))
+        .where(
+            User.company_id == company.id,
+            User.department_id.isnot(None)
+        )
+        .group_by(User.department_id)
+    )
+    employee_counts = dict(emp_count_result.all())
+
+    # 部署ごとの最新実施期間（/department/{name}/pdf と同じく部署単位で判定）
+    latest_by_department = (
+        select(
+            User.department_id.label("department_id"),
+            func.max(StressCheck.period).label("period")
+        )
+        .join(User, StressCheck.user_id == User.id)
+        .where(
+            User.company_id == company.id,
+            User.department_id.isnot(None)
+        )
+        .group_by(User.department_id)
+        .subquery()
+    )
+
+    # 各部署の最新期間のチェックを1クエリで取得し、部署ごとにメモリ上でグループ化
+    checks_result = await db.execute(
+        select(StressCheck, User.department_id)
+        .join(User, StressCheck.user_id == User.id)
+        .join(
+            latest_by_department,
+            and_(
+                latest_by_department.c.department_id == User.department_id,
+                latest_by_department.c.period == StressCheck.period
+            )
+        )
+        .where(User.company_id == company.id)
+    )
+    checks_by_department: dict = defaultdict(list)
+    for check, department_id in checks_result.all():
+        checks_by_department[department_id].append(check)
+
+    reports = []
+    skipped_departments = []
+    for department in departments:
+        checks = checks_by_department.get(department.id)
+        if not checks:
+            skipped_departments.append(department.name)
+            continue
+        reports.append({
+            "company_name": company.name,
+            "department_name": department.name,
+            "period": checks[0].period,
+            "employee_count": employee_counts.get(department.id, 0),
+            **_summarize_department_checks(checks)
+        })
+
+    if not reports:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="部署のストレスチェックデータがありません"
+        )
+    if skipped_departments:
+        logger.info(
+            f"Department report pack for company {company.id}: "
+            f"skipped {len(skipped_departments)} department(s) without stress checks: {skipped_departments}"
+        )
+
+    from app.services.pdf_generator import render_department_pack, render_department_archive
+
+    # 一括ファイル名は最も新しい期間、部署ごとのファイル名は各部署の期間
+    period_label = max(r["period"] for r in reports).strftime('%Y%m')
+    if format == "pdf":
+        pdf_buffer = await render_department_pack(reports)
+        return _stream_file_response(pdf_buffer, f"department_reports_{period_label}.pdf")
+
+    archive = await render_department_archive(reports, [
+        f"department_report_{_safe_filename(r['department_name'])}_{r['period'].strftime('%Y%m')}.pdf"
+        for r in reports
+    ])
+    return _stream_file_response(
+        archive,
+        f"department_reports_{period_label}.zip",
+        media_type="application/zip"
     )
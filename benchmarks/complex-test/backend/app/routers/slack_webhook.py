@@ -14,7 +14,7 @@ import logging
 from app.db.database import get_db
 from app.db.models import User, StressCheck
 from app.services.slack_service import slack_service
-from app.services.ai_service import analyze_sentiment, generate_chat_reply
+from app.services.chat_pipeline import run_chat_turn
 
 logger = logging.getLogger(__name__)
 
@@ -376,9 +376,16 @@ async def handle_chat_message(
         )
         return
 
-    # AI応答を生成
+    # 連携済みユーザーなら日次スコアを保存
+    result = await db.execute(
+        select(User.id).where(User.slack_id == user_id)
+    )
+    linked_user_id = result.scalar_one_or_none()
+
+    # AI応答を生成（分析・保存・通知を1回の推論で行う）
     try:
-        reply = await generate_chat_reply(text)
+        turn = await run_chat_turn(text, db=db, user_id=linked_user_id)
+        reply = turn.reply
     except Exception as e:
         logger.error(f"AI応答生成エラー: {e}")
         reply = "お話しいただきありがとうございます。もう少し詳しく聞かせていただけますか？"
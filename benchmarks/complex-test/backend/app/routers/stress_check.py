@@ -25,6 +25,7 @@ from app.services.stress_check_service import (
     check_duplicate_stress_check
 )
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from uuid import UUID
 
 router = APIRouter(prefix="/api/v1/stress-check", tags=["stress-check"])
@@ -94,7 +95,7 @@ STRESS_CHECK_QUESTIONS = [
 
 @router.get("/questions")
 async def get_questions(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """57項目の質問を取得"""
@@ -113,7 +114,7 @@ async def get_questions(
 @router.post("/submit", response_model=StressCheckResult)
 async def submit_stress_check(
     answer_data: StressCheckAnswer,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """ストレスチェック回答を送信"""
@@ -186,7 +187,7 @@ async def submit_stress_check(
 
 @router.get("/history", response_model=list[StressCheckHistoryItem])
 async def get_stress_check_history(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """ストレスチェック履歴を取得"""
@@ -211,7 +212,7 @@ async def get_stress_check_history(
 @router.get("/result/{check_id}", response_model=StressCheckResult)
 async def get_stress_check_result(
     check_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """ストレスチェック結果を取得"""
@@ -246,7 +247,7 @@ async def get_stress_check_result(
 
 @router.get("/draft", response_model=DraftAnswerResponse)
 async def get_draft_answer(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """途中保存された回答を取得"""
@@ -267,7 +268,7 @@ async def get_draft_answer(
 @router.post("/draft", response_model=DraftAnswerResponse)
 async def save_draft_answer(
     data: DraftAnswerRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """回答を途中保存"""
@@ -307,7 +308,7 @@ async def save_draft_answer(
 
 @router.delete("/draft")
 async def delete_draft_answer(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """途中保存を削除"""
@@ -326,7 +327,7 @@ async def delete_draft_answer(
 @router.post("/draft/migrate", response_model=DraftAnswerResponse)
 async def migrate_draft_from_localstorage(
     data: MigrateDraftRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """localStorageからの途中保存データを移行"""
@@ -372,7 +373,7 @@ async def migrate_draft_from_localstorage(
 
 @router.get("/non-taken", response_model=NonTakenUsersResponse)
 async def get_non_taken_users(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     deadline: Optional[date] = Query(None, description="受検期限")
 ):
@@ -6,8 +6,8 @@ Microsoft Teams Webhook通知APIエンドポイント
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from typing import Optional
-from app.db.models import User
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.teams_service import teams_service
 import logging
 
@@ -38,7 +38,7 @@ class CompletionRequest(BaseModel):
     completion_rate: float
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """管理者権限を要求"""
     if current_user.role.value != "admin":
         raise HTTPException(
@@ -51,7 +51,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
 @router.post("/send-reminder")
 async def send_reminder(
     request: ReminderRequest,
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     ストレスチェックリマインダーをTeamsに送信
@@ -85,7 +85,7 @@ async def send_reminder(
 @router.post("/send-alert")
 async def send_alert(
     request: AlertRequest,
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     高ストレスアラートをTeamsに送信
@@ -125,7 +125,7 @@ async def send_alert(
 @router.post("/send-completion")
 async def send_completion(
     request: CompletionRequest,
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     ストレスチェック完了通知をTeamsに送信
@@ -166,7 +166,7 @@ async def send_completion(
 
 @router.post("/test")
 async def test_teams_connection(
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Teams連携のテスト通知を送信
@@ -193,7 +193,7 @@ async def test_teams_connection(
 
 @router.get("/status")
 async def get_teams_status(
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Teams連携の設定状態を確認
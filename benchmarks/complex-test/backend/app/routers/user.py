@@ -11,7 +11,7 @@ import string
 
 from app.db.database import get_db
 from app.db.models import User
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user_record
 
 router = APIRouter(prefix="/api/v1/user", tags=["user"])
 
@@ -36,7 +36,7 @@ def generate_link_code(length: int = 8) -> str:
 
 @router.get("/line/status", response_model=LineStatusResponse)
 async def get_line_status(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db)
 ):
     """LINE連携状態を確認"""
@@ -50,7 +50,7 @@ async def get_line_status(
 
 @router.post("/line/generate-code", response_model=LineLinkCodeResponse)
 async def generate_line_link_code(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db)
 ):
     """LINE連携コードを生成"""
@@ -83,7 +83,7 @@ async def generate_line_link_code(
 
 @router.delete("/line/unlink")
 async def unlink_line(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db)
 ):
     """LINE連携を解除"""
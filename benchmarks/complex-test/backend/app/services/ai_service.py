@@ -1,16 +1,38 @@
 """
 AI分析サービス（OpenAI API連携）
 """
-from typing import Dict, List, Optional
-from openai import OpenAI
-import os
+from typing import AsyncIterator, Dict, List, Optional, Set
 from dotenv import load_dotenv
 from app.utils.pii_filter import clean_pii
+from app.services.lexicon_sentiment import LexiconResult, merge_risk_signals, score_text
+from app.services.openai_client import get_openai_client
+from app.services.llm_governor import LLMPriority, llm_governor
+from app.services.micro_batcher import MicroBatcher
+from app.services.conversation_history import HistorySummarizer
+from app.services.content_screening import content_screener
+from app.services.sentiment_cache import SENTIMENT_CACHE_ENABLED, SentimentCache
+import asyncio
+import hashlib
 import json
+import logging
+import os
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+# 短い・明確なメッセージはLLMを使わずに辞書ベースの分析で即答する
+LEXICON_FAST_PATH_ENABLED = os.getenv("LEXICON_FAST_PATH_ENABLED", "true").lower() == "true"
+# LLMの感情分析を待つ最大時間（秒）。超過時は辞書ベースの結果を返す
+SENTIMENT_LLM_DEADLINE_SECONDS = float(os.getenv("SENTIMENT_LLM_DEADLINE_SECONDS", "6"))
+
+# 会話履歴を伴わない感情分析をまとめてLLMに送る（Botの定期チェックなどの集中時）
+SENTIMENT_BATCH_ENABLED = os.getenv("SENTIMENT_BATCH_ENABLED", "true").lower() == "true"
+SENTIMENT_BATCH_MAX_SIZE = int(os.getenv("SENTIMENT_BATCH_MAX_SIZE", "16"))
+SENTIMENT_BATCH_MAX_WAIT_MS = float(os.getenv("SENTIMENT_BATCH_MAX_WAIT_MS", "20"))
+
+# 期限後も継続しているLLM呼び出し（結果をキャッシュに登録する）
+_background_tasks: Set["asyncio.Task"] = set()
 
 
 SYSTEM_PROMPT = """あなたはプロフェッショナルな産業カウンセラーのアシスタントAIです。
@@ -26,101 +48,291 @@ SYSTEM_PROMPT = """あなたはプロフェッショナルな産業カウンセ
 }
 """
 
+# 複数メッセージをまとめて分析する場合のシステムプロンプト
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+複数の発言をまとめて分析する場合、入力は {"messages": [{"id": int, "text": string}]} の形式です。
+各発言を独立して分析し、以下のJSON形式のみを出力してください。
+{
+  "results": [{"id": int, "sentiment": float, "topics": array, "urgency": int, "reply_suggestion": string, "risk_flags": array}]
+}
+"""
+
+SENTIMENT_MODEL = "gpt-4o-mini"
+
+# 感情分析結果のキャッシュ（Webチャット・各Botで共有）
+# モデル・プロンプトが変わった場合は別のキーになる
+sentiment_cache = SentimentCache(
+    namespace=f"{SENTIMENT_MODEL}:{hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:16]}"
+)
+
 
 def contains_inappropriate_content(text: str) -> bool:
     """
-    不適切なコンテンツを検出（簡易実装）
-    
+    不適切なコンテンツを検出
+
+    判定語は app/data/inappropriate_keywords.txt（CONTENT_SCREENING_KEYWORDS_PATH）で管理し、
+    1回の走査で全ての判定語を照合します（content_screening を参照）。
+
     Args:
         text: チェック対象のテキスト
-    
+
     Returns:
         不適切なコンテンツが含まれている場合True
     """
-    inappropriate_keywords = [
-        '暴力', '殺', '死', '自殺', '暴力的',
-        '差別', '侮辱', '誹謗'
-    ]
-    text_lower = text.lower()
-    return any(keyword in text_lower for keyword in inappropriate_keywords)
+    return content_screener.contains(text)
+
+
+def should_block_message(text: str) -> bool:
+    """
+    チャットメッセージを不適切なコンテンツとして遮断するか
 
+    自傷リスクを示す発言（「死にたい」「自殺したい」など）は判定語を含んでも遮断せず、
+    感情分析で self_harm_risk フラグを付けて高ストレス通知につなげます。
+
+    Args:
+        text: チェック対象のテキスト
 
-async def analyze_sentiment(message: str, reaction_time: Optional[float] = None) -> Dict:
+    Returns:
+        遮断する場合True
+    """
+    return contains_inappropriate_content(text) and not score_text(text).urgent
+
+
+def _parse_sentiment(result: Dict) -> Dict:
+    """LLMの出力をデフォルト値で補完して分析結果に変換"""
+    return {
+        "sentiment": float(result.get("sentiment", 0.0)),
+        "topics": result.get("topics", []),
+        "urgency": int(result.get("urgency", 1)),
+        "reply_suggestion": result.get("reply_suggestion", "お疲れ様です。"),
+        "risk_flags": result.get("risk_flags", []),
+        "source": "llm",
+    }
+
+
+async def _request_sentiment(messages: List[Dict[str, str]]) -> Optional[Dict]:
+    """LLMで感情分析を実行（失敗時はNone）"""
+    try:
+        response = await llm_governor.call(
+            LLMPriority.INTERACTIVE,
+            get_openai_client().chat.completions.create,
+            model=SENTIMENT_MODEL,
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0.7,
+        )
+
+        result_text = response.choices[0].message.content
+        return _parse_sentiment(json.loads(result_text))
+    except Exception as e:
+        logger.warning(f"Sentiment analysis failed: {e}")
+        return None
+
+
+def _build_sentiment_messages(
+    cleaned_message: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None
+) -> List[Dict[str, str]]:
+    """感情分析用のメッセージを構築（会話履歴は history_summarizer で圧縮済みのもの）"""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    messages.extend(conversation_history or [])
+    messages.append({"role": "user", "content": cleaned_message})
+    return messages
+
+
+async def _request_sentiment_batch(cleaned_messages: List[str]) -> List[Optional[Dict]]:
+    """
+    複数のメッセージを1回のLLM呼び出しで感情分析
+
+    1件のみの場合は通常のリクエストを送ります。バッチの結果に含まれなかった
+    メッセージ（出力の欠落・形式不正）は個別のリクエストで分析し直します。
+    呼び出し自体が失敗した場合は、障害時の負荷を増やさないよう再試行せずNoneを返します。
+    """
+    if len(cleaned_messages) == 1:
+        return [await _request_sentiment(_build_sentiment_messages(cleaned_messages[0]))]
+
+    results: List[Optional[Dict]] = [None] * len(cleaned_messages)
+    try:
+        response = await llm_governor.call(
+            LLMPriority.INTERACTIVE,
+            get_openai_client().chat.completions.create,
+            model=SENTIMENT_MODEL,
+            messages=[
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(
+                    {"messages": [{"id": i, "text": text} for i, text in enumerate(cleaned_messages)]},
+                    ensure_ascii=False
+                )},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.7,
+        )
+        items = json.loads(response.choices[0].message.content).get("results", [])
+    except Exception as e:
+        logger.warning(f"Batch sentiment analysis failed: {e}")
+        return results
+
+    for item in items:
+        try:
+            index = int(item["id"])
+            if 0 <= index < len(results) and results[index] is None:
+                results[index] = _parse_sentiment(item)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        retried = await asyncio.gather(*(
+            _request_sentiment(_build_sentiment_messages(cleaned_messages[i])) for i in missing
+        ))
+        for i, result in zip(missing, retried):
+            results[i] = result
+    return results
+
+
+# 会話履歴を伴わない感情分析のマイクロバッチ（Webチャット・各Botで共有）
+sentiment_batcher: MicroBatcher[str, Optional[Dict]] = MicroBatcher(
+    _request_sentiment_batch,
+    max_batch_size=SENTIMENT_BATCH_MAX_SIZE,
+    max_wait_seconds=SENTIMENT_BATCH_MAX_WAIT_MS / 1000,
+)
+
+
+async def _cache_late_result(task: "asyncio.Task", cleaned_message: str, local: LexiconResult) -> None:
+    """期限後に完了したLLMの結果をキャッシュに登録（次回以降に利用）"""
+    analysis = await task
+    if analysis is not None:
+        await sentiment_cache.set(cleaned_message, merge_risk_signals(analysis, local))
+
+
+async def analyze_sentiment(
+    message: str,
+    reaction_time: Optional[float] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    conversation_key: Optional[str] = None
+) -> Dict:
     """
     チャットメッセージから感情分析を実行
-    
+
+    返信案（reply_suggestion）も同じ推論で生成するため、返信のために再度呼び出す必要はありません。
+    短い・明確なメッセージは辞書ベースの分析で即答し、LLMが期限
+    （SENTIMENT_LLM_DEADLINE_SECONDS）内に応答しない・失敗した場合も辞書ベースの結果を返します。
+
     Args:
         message: ユーザーのメッセージ
         reaction_time: 反応速度（秒、オプション）
-    
+        conversation_history: 会話履歴（オプション、返信案の文脈として使用）
+            [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+        conversation_key: 会話の識別子（オプション、長い履歴の要約をキャッシュする単位）
+
     Returns:
-        感情分析結果
+        感情分析結果。"source" は結果の出所
+            llm: LLM / cache: キャッシュ / lexicon: 辞書ベースで即答 /
+            lexicon_fallback: LLMの遅延・失敗時の辞書ベースの結果 / rule: 不適切コンテンツ判定
     """
-    # 不適切なコンテンツチェック
-    if contains_inappropriate_content(message):
+    # 不適切なコンテンツチェック（自傷リスクを示す発言は遮断せずに分析する）
+    if should_block_message(message):
         return {
             "sentiment": -0.5,
             "topics": [],
             "urgency": 3,
             "reply_suggestion": "不適切な内容が検出されました。",
-            "risk_flags": ["inappropriate_content"]
+            "risk_flags": ["inappropriate_content"],
+            "source": "rule",
         }
-    
+
     # PIIクリーニング
     cleaned_message = clean_pii(message)
 
-    # OpenAI API呼び出し
+    # 会話履歴に依存しない分析はキャッシュを利用
+    use_cache = SENTIMENT_CACHE_ENABLED and not conversation_history
+    if use_cache:
+        cached = await sentiment_cache.get(cleaned_message)
+        if cached is not None:
+            cached["source"] = "cache"
+            return cached
+
+    # 辞書ベースの分析（短い・明確なメッセージはそのまま返す）
+    local = score_text(cleaned_message)
+    if LEXICON_FAST_PATH_ENABLED and not conversation_history and local.is_obvious:
+        return local.to_analysis("lexicon")
+
+    # OpenAI API呼び出し（期限を過ぎたら辞書ベースの結果で応答し、LLMの結果は後でキャッシュ）
+    # 会話履歴を伴わない分析は、同時期の他のメッセージとまとめて送る
+    if SENTIMENT_BATCH_ENABLED and not conversation_history:
+        request = sentiment_batcher.submit(cleaned_message)
+    else:
+        # 履歴の要約の再生成も期限の対象に含める
+        async def request_with_history() -> Optional[Dict]:
+            history = await history_summarizer.prepare(conversation_history, conversation_key)
+            return await _request_sentiment(_build_sentiment_messages(cleaned_message, history))
+        request = request_with_history()
+    task = asyncio.ensure_future(request)
+    try:
+        analysis = await asyncio.wait_for(asyncio.shield(task), SENTIMENT_LLM_DEADLINE_SECONDS)
+    except asyncio.TimeoutError:
+        if use_cache:
+            background = asyncio.ensure_future(_cache_late_result(task, cleaned_message, local))
+            _background_tasks.add(background)
+            background.add_done_callback(_background_tasks.discard)
+        else:
+            # 結果を使わない（会話履歴つきはキャッシュしない）ため、LLM呼び出しを中止して実行枠を解放する
+            task.cancel()
+        return local.to_analysis("lexicon_fallback")
+
+    # エラー時は辞書ベースの結果を返す（キャッシュしない）
+    if analysis is None:
+        return local.to_analysis("lexicon_fallback")
+
+    # LLMが見落としたリスクシグナルを補完
+    analysis = merge_risk_signals(analysis, local)
+    if use_cache:
+        await sentiment_cache.set(cleaned_message, analysis)
+    return analysis
+
+
+# 会話履歴の要約用のシステムプロンプト
+HISTORY_SUMMARY_SYSTEM_PROMPT = """あなたは産業カウンセラーの記録係です。
+従業員とAIカウンセラーの会話を、以降の相談で文脈として使えるように要約してください。
+- 従業員の悩み・状況・気持ちの変化、AIが提案した内容を中心にまとめる
+- 以前の要約がある場合は、その内容を引き継いで1つの要約にまとめる
+- 日本語で300文字以内、要約本文のみを出力する
+"""
+
+
+async def _summarize_history(
+    previous_summary: Optional[str],
+    messages: List[Dict[str, str]]
+) -> Optional[str]:
+    """以前の要約と新たな発言から会話の要約を生成（失敗時はNone）"""
+    transcript = "\n".join(
+        f"{'従業員' if entry['role'] == 'user' else 'AI'}: {clean_pii(entry['content'])}"
+        for entry in messages
+        if entry["role"] in ("user", "assistant")
+    )
+    content = f"以前の要約:\n{previous_summary}\n\n" if previous_summary else ""
+    content += f"新しい会話:\n{transcript}"
+
     try:
-        response = client.chat.completions.create(
+        response = await llm_governor.call(
+            LLMPriority.INTERACTIVE,
+            get_openai_client().chat.completions.create,
             model="gpt-4o-mini",
             messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": cleaned_message}
+                {"role": "system", "content": HISTORY_SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": content},
             ],
-            response_format={"type": "json_object"},
-            temperature=0.7,
+            temperature=0.3,
+            max_tokens=400,
         )
-
-        result_text = response.choices[0].message.content
-        result = json.loads(result_text)
-
-        # デフォルト値の設定
-        sentiment = result.get("sentiment", 0.0)
-        topics = result.get("topics", [])
-        urgency = result.get("urgency", 1)
-        reply_suggestion = result.get("reply_suggestion", "お疲れ様です。")
-        risk_flags = result.get("risk_flags", [])
-
-        return {
-            "sentiment": float(sentiment),
-            "topics": topics,
-            "urgency": int(urgency),
-            "reply_suggestion": reply_suggestion,
-            "risk_flags": risk_flags,
-        }
+        return response.choices[0].message.content
     except Exception as e:
-        # エラー時はデフォルト値を返す
-        return {
-            "sentiment": 0.0,
-            "topics": [],
-            "urgency": 1,
-            "reply_suggestion": "お疲れ様です。",
-            "risk_flags": [],
-        }
-
-
-async def generate_chat_reply(user_message: str) -> str:
-    """
-    チャットへの返信を生成
+        logger.warning(f"Conversation summary failed: {e}")
+        return None
 
-    Args:
-        user_message: ユーザーのメッセージ
 
-    Returns:
-        AIからの返信
-    """
-    analysis = await analyze_sentiment(user_message)
-    return analysis.get("reply_suggestion", "お疲れ様です。")
+# 会話履歴のトークン予算と要約（感情分析・カウンセラー応答で共有）
+history_summarizer = HistorySummarizer(_summarize_history)
 
 
 # メンタルヘルス相談用のシステムプロンプト
@@ -142,9 +354,33 @@ COUNSELOR_SYSTEM_PROMPT = """あなたは、企業で働く従業員のメンタ
 返答は日本語で行い、敬語を使いつつも親しみやすいトーンで話してください。"""
 
 
-async def generate_counselor_response(
+# LLM呼び出しに失敗した場合のカウンセラー応答
+COUNSELOR_FALLBACK_REPLY = "お話しいただきありがとうございます。そのお気持ち、よく分かります。もう少し詳しく聞かせていただけますか？"
+# LLMが空の応答を返した場合のカウンセラー応答
+COUNSELOR_EMPTY_REPLY = "お話を聞いています。もう少し詳しく教えていただけますか？"
+
+
+def _build_counselor_messages(
     user_message: str,
     conversation_history: Optional[List[Dict[str, str]]] = None
+) -> List[Dict[str, str]]:
+    """カウンセラー応答用のメッセージを構築（会話履歴は history_summarizer で圧縮済みのもの）"""
+    # PIIクリーニング
+    cleaned_message = clean_pii(user_message)
+
+    # 会話履歴を構築
+    messages = [{"role": "system", "content": COUNSELOR_SYSTEM_PROMPT}]
+    messages.extend(conversation_history or [])
+
+    # 現在のメッセージを追加
+    messages.append({"role": "user", "content": cleaned_message})
+    return messages
+
+
+async def generate_counselor_response(
+    user_message: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    conversation_key: Optional[str] = None
 ) -> str:
     """
     メンタルヘルス相談に対するAI応答を生成
@@ -153,29 +389,18 @@ async def generate_counselor_response(
         user_message: ユーザーのメッセージ
         conversation_history: 会話履歴（オプション）
             [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+        conversation_key: 会話の識別子（オプション、長い履歴の要約をキャッシュする単位）
 
     Returns:
         AIカウンセラーからの応答
     """
-    # PIIクリーニング
-    cleaned_message = clean_pii(user_message)
-
-    # 会話履歴を構築
-    messages = [{"role": "system", "content": COUNSELOR_SYSTEM_PROMPT}]
-
-    # 過去の会話履歴を追加（最大10件まで）
-    if conversation_history:
-        for entry in conversation_history[-10:]:
-            messages.append({
-                "role": entry.get("role", "user"),
-                "content": entry.get("content", "")
-            })
-
-    # 現在のメッセージを追加
-    messages.append({"role": "user", "content": cleaned_message})
+    history = await history_summarizer.prepare(conversation_history, conversation_key)
+    messages = _build_counselor_messages(user_message, history)
 
     try:
-        response = client.chat.completions.create(
+        response = await llm_governor.call(
+            LLMPriority.INTERACTIVE,
+            get_openai_client().chat.completions.create,
             model="gpt-4o-mini",
             messages=messages,
             temperature=0.8,
@@ -183,11 +408,66 @@ async def generate_counselor_response(
         )
 
         reply = response.choices[0].message.content
-        return reply if reply else "お話を聞いています。もう少し詳しく教えていただけますか？"
+        return reply if reply else COUNSELOR_EMPTY_REPLY
 
     except Exception as e:
         # エラー時はフォールバック応答を返す
-        return "お話しいただきありがとうございます。そのお気持ち、よく分かります。もう少し詳しく聞かせていただけますか？"
+        return COUNSELOR_FALLBACK_REPLY
+
+
+async def stream_counselor_response(
+    user_message: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    conversation_key: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    メンタルヘルス相談に対するAI応答をトークンごとに生成（ストリーミング）
+
+    LLMへの接続に失敗した場合はフォールバック応答を1件返します。
+    途中で失敗した場合は、それまでに生成された部分で終了します。
+
+    Args:
+        user_message: ユーザーのメッセージ
+        conversation_history: 会話履歴（オプション）
+        conversation_key: 会話の識別子（オプション、長い履歴の要約をキャッシュする単位）
+
+    Yields:
+        応答テキストの断片
+    """
+    history = await history_summarizer.prepare(conversation_history, conversation_key)
+    messages = _build_counselor_messages(user_message, history)
+
+    # 応答を読み終えるまでガバナーの実行枠を保持する
+    chunks = llm_governor.stream(
+        LLMPriority.INTERACTIVE,
+        get_openai_client().chat.completions.create,
+        model="gpt-4o-mini",
+        messages=messages,
+        temperature=0.8,
+        max_tokens=500,
+        stream=True,
+    )
+
+    received = False
+    try:
+        async for chunk in chunks:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                received = True
+                yield content
+    except Exception as e:
+        logger.warning(f"Counselor stream failed: {e}")
+        if not received:
+            yield COUNSELOR_FALLBACK_REPLY
+            return
+    finally:
+        # クライアント切断時も実行枠と上流の接続を解放する
+        await chunks.aclose()
+
+    if not received:
+        yield COUNSELOR_EMPTY_REPLY
 
 
 # 改善アクション提案用のシステムプロンプト
@@ -262,7 +542,9 @@ async def generate_improvement_recommendations(
 """
 
     try:
-        response = client.chat.completions.create(
+        response = await llm_governor.call(
+            LLMPriority.DASHBOARD,
+            get_openai_client().chat.completions.create,
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": RECOMMENDATION_SYSTEM_PROMPT},
@@ -2,17 +2,97 @@
 チャット履歴サービス（PostgreSQL版）
 
 チャット履歴をPostgreSQLに保存・取得します。
+
+履歴の取得は (created_at, id) のキーセットページングで行い、ページの最後のメッセージを
+カーソルとして次のページを取得します。OFFSET と異なり前のページの行を読み飛ばさないため、
+どのページも (user_id, created_at, id) の複合インデックスの範囲走査だけで取得できます。
 """
+import base64
+import os
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 import uuid as uuid_module
 
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import ChatMessage
 
+# 履歴の総数をキャッシュする時間（秒）。他のワーカーでの追加・削除はこの時間内に反映される
+CHAT_HISTORY_COUNT_CACHE_TTL_SECONDS = int(os.getenv("CHAT_HISTORY_COUNT_CACHE_TTL_SECONDS", "60"))
+CHAT_HISTORY_COUNT_CACHE_MAX_SIZE = 10000
+
+
+class ChatHistoryCountCache:
+    """ユーザーごとの履歴の総数のTTL付きキャッシュ"""
+
+    def __init__(
+        self,
+        ttl_seconds: int = CHAT_HISTORY_COUNT_CACHE_TTL_SECONDS,
+        max_size: int = CHAT_HISTORY_COUNT_CACHE_MAX_SIZE,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: Dict[UUID, Tuple[float, int]] = {}
+
+    def get(self, user_id: UUID) -> Optional[int]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, count = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        return count
+
+    def set(self, user_id: UUID, count: int) -> None:
+        if len(self._entries) >= self.max_size:
+            self._entries.clear()
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, count)
+
+    def invalidate(self, user_id: UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# シングルトンインスタンス
+chat_history_count_cache = ChatHistoryCountCache()
+
+
+def encode_cursor(created_at: str, message_id: str) -> str:
+    """メッセージの (created_at, id) からカーソルを生成"""
+    raw = f"{created_at}|{message_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    カーソルを (created_at, id) に復元
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, message_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(message_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _to_dict(msg: ChatMessage) -> dict:
+    return {
+        "id": str(msg.id),
+        "role": msg.role,
+        "content": msg.content,
+        "sentiment_score": msg.sentiment_score,
+        "created_at": msg.created_at.isoformat() if msg.created_at else None
+    }
+
 
 async def save_chat_message(
     db: AsyncSession,
@@ -44,6 +124,7 @@ async def save_chat_message(
     db.add(message)
     await db.commit()
     await db.refresh(message)
+    chat_history_count_cache.invalidate(user_id)
     return str(message.id)
 
 
@@ -54,7 +135,9 @@ async def get_chat_history(
     offset: int = 0
 ) -> List[dict]:
     """
-    ユーザーのチャット履歴を取得
+    ユーザーのチャット履歴を取得（OFFSET指定。後方互換のため残している）
+
+    深いページほど読み飛ばす行が増えるため、get_chat_history_page を使用してください。
 
     Args:
         db: データベースセッション
@@ -68,40 +151,125 @@ async def get_chat_history(
     result = await db.execute(
         select(ChatMessage)
         .where(ChatMessage.user_id == user_id)
-        .order_by(ChatMessage.created_at.asc())
+        .order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
         .offset(offset)
         .limit(limit)
     )
-    messages = result.scalars().all()
+    return [_to_dict(msg) for msg in result.scalars().all()]
+
+
+def build_chat_history_page_query(
+    user_id: UUID,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False
+):
+    """
+    キーセットページングのクエリを構築（次ページの有無の判定用に limit + 1 件を取得）
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    key = tuple_(ChatMessage.created_at, ChatMessage.id)
+    query = select(ChatMessage).where(ChatMessage.user_id == user_id)
+    if cursor is not None:
+        position = tuple_(*decode_cursor(cursor))
+        query = query.where(key < position if descending else key > position)
+    if descending:
+        query = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+    else:
+        query = query.order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+    return query.limit(limit + 1)
+
+
+async def get_chat_history_page(
+    db: AsyncSession,
+    user_id: UUID,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    descending: bool = False
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    ユーザーのチャット履歴を1ページ取得（キーセットページング）
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        limit: 取得する最大件数
+        cursor: 前のページの next_cursor（Noneの場合は先頭から）
+        descending: Trueの場合は新しい順
+
+    Returns:
+        (チャットメッセージのリスト, 次のページのカーソル。最後のページならNone)
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    result = await db.execute(build_chat_history_page_query(user_id, limit, cursor, descending))
+    rows = result.scalars().all()
+
+    messages = [_to_dict(msg) for msg in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = messages[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return messages, next_cursor
+
+
+async def get_recent_chat_history(
+    db: AsyncSession,
+    user_id: UUID,
+    limit: int = 10
+) -> List[dict]:
+    """
+    直近のチャット履歴をLLMのメッセージ形式で取得（古い順）
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+        limit: 取得する最大件数
+
+    Returns:
+        [{"role": "user" | "assistant", "content": "..."}]
+    """
+    result = await db.execute(
+        select(ChatMessage.role, ChatMessage.content)
+        .where(ChatMessage.user_id == user_id)
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        .limit(limit)
+    )
+    rows = result.all()
 
     return [
-        {
-            "id": str(msg.id),
-            "role": msg.role,
-            "content": msg.content,
-            "sentiment_score": msg.sentiment_score,
-            "created_at": msg.created_at.isoformat() if msg.created_at else None
-        }
-        for msg in messages
+        {"role": "assistant" if role == "ai" else "user", "content": content}
+        for role, content in reversed(rows)
     ]
 
 
-async def get_chat_history_count(db: AsyncSession, user_id: UUID) -> int:
+async def get_chat_history_count(db: AsyncSession, user_id: UUID, use_cache: bool = False) -> int:
     """
     ユーザーのチャット履歴の総数を取得
 
     Args:
         db: データベースセッション
         user_id: ユーザーID
+        use_cache: キャッシュした値を使用するか（CHAT_HISTORY_COUNT_CACHE_TTL_SECONDS 以内）
 
     Returns:
         チャット履歴の総数
     """
+    if use_cache:
+        cached = chat_history_count_cache.get(user_id)
+        if cached is not None:
+            return cached
+
     result = await db.execute(
         select(func.count(ChatMessage.id))
         .where(ChatMessage.user_id == user_id)
     )
-    return result.scalar() or 0
+    count = result.scalar() or 0
+    chat_history_count_cache.set(user_id, count)
+    return count
 
 
 async def delete_chat_history(db: AsyncSession, user_id: UUID) -> int:
@@ -123,6 +291,7 @@ async def delete_chat_history(db: AsyncSession, user_id: UUID) -> int:
         delete(ChatMessage).where(ChatMessage.user_id == user_id)
     )
     await db.commit()
+    chat_history_count_cache.invalidate(user_id)
 
     return count
 
@@ -155,4 +324,5 @@ async def delete_chat_message(db: AsyncSession, user_id: UUID, message_id: str)
 
     await db.delete(message)
     await db.commit()
+    chat_history_count_cache.invalidate(user_id)
     return True
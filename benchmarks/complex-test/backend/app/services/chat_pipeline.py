@@ -0,0 +1,141 @@
+"""
+チャット処理パイプライン
+
+1件のチャットメッセージに対して感情分析（LLM推論）を1回だけ実行し、その結果を
+返信・日次スコアの保存・高ストレス通知に使い回します。
+Webチャット・Slack・Discord・LINE の各ハンドラーから共通で利用します。
+LINEの相談モードは返信にカウンセラー応答（generate_counselor_response）を使い、
+感情分析は応答の生成と並行して実行します。
+
+Webのカウンセラーはストリーミング版（stream_chat_turn）を使い、
+カウンセラー応答をトークン単位で返しながら、感情分析を並行して実行します。
+"""
+import asyncio
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import DailyScore
+from app.services.ai_service import analyze_sentiment, stream_counselor_response
+from app.services.chat_history_service import save_chat_message
+from app.services.notification_service import check_and_notify_high_stress
+
+DEFAULT_REPLY = "お疲れ様です。"
+
+
+@dataclass
+class ChatTurn:
+    """チャット1往復の処理結果"""
+    reply: str
+    analysis: Dict
+    blocked: bool = False  # 不適切なコンテンツのため保存・通知を行わなかった
+
+
+async def run_chat_turn(
+    text: str,
+    db: Optional[AsyncSession] = None,
+    user_id: Optional[uuid.UUID] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    conversation_key: Optional[str] = None
+) -> ChatTurn:
+    """
+    チャットメッセージを分析し、返信を決定して日次スコア保存・通知を行う
+
+    Args:
+        text: ユーザーのメッセージ
+        db: DBセッション（日次スコアを保存する場合）
+        user_id: ユーザーID（連携済みユーザーのみ。Noneの場合は保存しない）
+        conversation_history: 会話履歴（オプション）
+        conversation_key: 会話の識別子（オプション、長い履歴の要約をキャッシュする単位）
+
+    Returns:
+        返信と分析結果
+    """
+    analysis = await analyze_sentiment(
+        text, conversation_history=conversation_history, conversation_key=conversation_key
+    )
+    reply = analysis.get("reply_suggestion") or DEFAULT_REPLY
+
+    if "inappropriate_content" in analysis.get("risk_flags", []):
+        return ChatTurn(reply=reply, analysis=analysis, blocked=True)
+
+    # 日次スコアを保存
+    if db is not None and user_id is not None:
+        db.add(DailyScore(
+            user_id=user_id,
+            date=date.today(),
+            sentiment_score=analysis["sentiment"],
+            fatigue_level=None,  # AI分析から推測可能な場合は設定
+            sleep_hours=None
+        ))
+        await db.commit()
+
+    # 高ストレス検出時の自動通知
+    await check_and_notify_high_stress(
+        sentiment_score=analysis["sentiment"],
+        urgency=analysis["urgency"],
+        risk_flags=analysis["risk_flags"],
+        topics=analysis["topics"]
+    )
+
+    return ChatTurn(reply=reply, analysis=analysis)
+
+
+async def stream_chat_turn(
+    text: str,
+    user_id: uuid.UUID,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    session_factory=AsyncSessionLocal
+) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    カウンセラー応答をストリーミングし、完了時にメッセージを保存
+
+    感情分析・日次スコア保存・通知（run_chat_turn）は応答の生成と並行して実行します。
+    ストリームがレスポンス送信後も続くため、DBセッションはリクエストとは別に生成します。
+
+    Args:
+        text: ユーザーのメッセージ
+        user_id: ユーザーID
+        conversation_history: 会話履歴（オプション）
+        session_factory: DBセッションの生成関数
+
+    Yields:
+        ("token", {"content": 断片}) を応答の生成に合わせて返し、
+        最後に ("done", {保存したメッセージID・分析結果}) を返す
+    """
+    async def _analyze() -> ChatTurn:
+        async with session_factory() as db:
+            return await run_chat_turn(text, db=db, user_id=user_id)
+
+    analysis_task = asyncio.ensure_future(_analyze())
+    chunks: List[str] = []
+    try:
+        async for content in stream_counselor_response(text, conversation_history, f"web:{user_id}"):
+            chunks.append(content)
+            yield "token", {"content": content}
+        turn = await analysis_task
+    finally:
+        # クライアントが途中で切断した場合は分析も中止し、何も保存しない
+        if not analysis_task.done():
+            analysis_task.cancel()
+
+    reply = "".join(chunks)
+    analysis = turn.analysis
+    async with session_factory() as db:
+        user_message_id = await save_chat_message(db, user_id, "user", text)
+        message_id = await save_chat_message(db, user_id, "ai", reply, analysis["sentiment"])
+
+    yield "done", {
+        "message_id": message_id,
+        "user_message_id": user_message_id,
+        "message": reply,
+        "sentiment_score": analysis["sentiment"],
+        "topics": analysis["topics"],
+        "urgency": analysis["urgency"],
+        "risk_flags": analysis["risk_flags"],
+        "source": analysis.get("source"),
+    }
@@ -0,0 +1,203 @@
+"""
+チャット入力の不適切コンテンツ判定
+
+判定語をファイル（1行に1語）から読み込み、Aho-Corasick オートマトンに変換して
+テキストを1回走査するだけで全ての判定語を照合します。判定語が数千語に増えても、
+1メッセージあたりの処理時間はテキストの長さにほぼ比例します。
+
+オートマトンは起動時に1回だけ構築し、ファイルの更新を検知すると作り直して差し替えます
+（CONTENT_SCREENING_RELOAD_INTERVAL_SECONDS ごとに更新日時を確認）。
+管理者APIから即時に再読み込みすることもできます。
+"""
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEYWORDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "inappropriate_keywords.txt"
+)
+CONTENT_SCREENING_KEYWORDS_PATH = os.getenv("CONTENT_SCREENING_KEYWORDS_PATH", DEFAULT_KEYWORDS_PATH)
+# 判定語ファイルの更新を確認する間隔（秒）。0の場合は自動で再読み込みしない
+CONTENT_SCREENING_RELOAD_INTERVAL_SECONDS = float(os.getenv("CONTENT_SCREENING_RELOAD_INTERVAL_SECONDS", "30"))
+
+
+def normalize_for_screening(text: str) -> str:
+    """照合用にテキストを正規化（NFKC正規化・小文字化）"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+class AhoCorasick:
+    """複数の判定語を1回の走査で照合するオートマトン"""
+
+    def __init__(self, keywords: Iterable[str]):
+        # ノードごとの遷移・失敗遷移・そのノードで一致が確定する判定語
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self.size = sum(1 for outputs in self._output if outputs)
+        self._build()
+
+    def _add(self, keyword: str) -> None:
+        node = 0
+        for ch in keyword:
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        if keyword not in self._output[node]:
+            self._output[node].append(keyword)
+
+    def _build(self) -> None:
+        """幅優先で失敗遷移を構築し、失敗先で一致する判定語も出力に含める"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def _step(self, node: int, ch: str) -> int:
+        goto = self._goto
+        while node and ch not in goto[node]:
+            node = self._fail[node]
+        return goto[node].get(ch, 0)
+
+    def contains(self, text: str) -> bool:
+        """いずれかの判定語を含むか（最初の一致で終了）"""
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                return True
+        return False
+
+    def find_all(self, text: str) -> List[str]:
+        """含まれる判定語（出現順、重複なし）"""
+        found: List[str] = []
+        node = 0
+        for ch in text:
+            node = self._step(node, ch)
+            for keyword in self._output[node]:
+                if keyword not in found:
+                    found.append(keyword)
+        return found
+
+
+def load_keywords(path: str) -> List[str]:
+    """判定語ファイルを読み込む（空行・"#" で始まる行は無視、正規化済み）"""
+    keywords = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            keyword = normalize_for_screening(line.strip())
+            if keyword and not keyword.startswith("#"):
+                keywords.append(keyword)
+    return keywords
+
+
+class ContentScreener:
+    """判定語ファイルから構築したオートマトンでテキストを判定（ファイル更新時に再構築）"""
+
+    def __init__(
+        self,
+        path: str = CONTENT_SCREENING_KEYWORDS_PATH,
+        reload_interval: float = CONTENT_SCREENING_RELOAD_INTERVAL_SECONDS,
+    ):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._automaton: Optional[AhoCorasick] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def load(self) -> int:
+        """
+        判定語ファイルを読み込んでオートマトンを構築・差し替え
+
+        読み込みに失敗した場合は、構築済みのオートマトンがあればそれを使い続けます。
+
+        Returns:
+            判定語の数
+        """
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+                automaton = AhoCorasick(load_keywords(self.path))
+            except OSError as e:
+                if self._automaton is None:
+                    raise
+                logger.error(f"Failed to reload content screening keywords from {self.path}: {e}")
+                return self._automaton.size
+
+            # 参照の差し替えのみのため、判定中のリクエストは古いオートマトンで完了する
+            self._automaton = automaton
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+            logger.info(f"Loaded {automaton.size} content screening keywords from {self.path}")
+            return automaton.size
+
+    def _reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if self.reload_interval <= 0 or now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return
+        if changed:
+            self.load()
+
+    def _current(self) -> AhoCorasick:
+        if self._automaton is None:
+            self.load()
+        else:
+            self._reload_if_changed()
+        return self._automaton
+
+    def contains(self, text: str) -> bool:
+        """不適切な判定語を含むか"""
+        if not text:
+            return False
+        return self._current().contains(normalize_for_screening(text))
+
+    def find_all(self, text: str) -> List[str]:
+        """含まれる判定語"""
+        if not text:
+            return []
+        return self._current().find_all(normalize_for_screening(text))
+
+    def stats(self) -> Dict[str, object]:
+        """判定語の数・読み込み回数"""
+        return {
+            "path": self.path,
+            "keywords": self._automaton.size if self._automaton is not None else 0,
+            "reloads": self.reloads,
+            "reload_interval_seconds": self.reload_interval,
+        }
+
+
+# シングルトンインスタンス
+content_screener = ContentScreener()
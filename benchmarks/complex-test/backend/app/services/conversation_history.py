@@ -0,0 +1,222 @@
+"""
+会話履歴の圧縮（トークン予算と要約）
+
+LLMに送る会話履歴を推定トークン数の予算（HISTORY_TOKEN_BUDGET）内に収め、
+予算を超える古い発言は要約（ローリングサマリー）に置き換えます。
+長い会話でもプロンプトの大きさ（＝レイテンシー・コスト）がほぼ一定になります。
+
+要約は会話ごと（LINEのユーザー、Webチャットのユーザーなど）にプロセス内でキャッシュし、
+要約済みの範囲より後の発言が予算を超えた場合にだけ、前回の要約と新たにあふれた発言から
+作り直します。再生成後は予算から HISTORY_SUMMARY_REFRESH_TOKENS 分の余裕を残すため、
+以降の数往復は要約を再利用できます。
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# LLMに送る会話履歴の推定トークン数の上限（要約を除く）
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1000"))
+# 要約の再生成後に残す余裕（推定トークン数）。大きいほど再生成の頻度が下がる
+HISTORY_SUMMARY_REFRESH_TOKENS = int(os.getenv("HISTORY_SUMMARY_REFRESH_TOKENS", "400"))
+HISTORY_SUMMARY_ENABLED = os.getenv("HISTORY_SUMMARY_ENABLED", "true").lower() == "true"
+HISTORY_SUMMARY_CACHE_MAX_SIZE = int(os.getenv("HISTORY_SUMMARY_CACHE_MAX_SIZE", "5000"))
+
+# 1メッセージあたりの固定のトークン数（role などの付加情報）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "これまでの会話の要約:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    テキストのトークン数を推定
+
+    日本語などの非ASCII文字は1文字あたり約1トークン、ASCIIは約4文字で1トークンとして数えます。
+    """
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
+def message_tokens(entry: Dict[str, str]) -> int:
+    """会話履歴1件の推定トークン数"""
+    return estimate_tokens(entry.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def trim_history(history: List[Dict[str, str]], budget: int) -> List[Dict[str, str]]:
+    """新しい発言から予算内に収まる分だけを残す（順序は維持）"""
+    total = 0
+    start = len(history)
+    for i in range(len(history) - 1, -1, -1):
+        total += message_tokens(history[i])
+        if total > budget:
+            break
+        start = i
+    return history[start:]
+
+
+def _fingerprint(entries: List[Dict[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for entry in entries:
+        digest.update(f"{entry.get('role', '')}\n{entry.get('content', '')}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class RollingSummary:
+    """会話の要約と、要約済みの最後の発言（直前の発言と合わせた指紋）"""
+    text: str
+    fingerprint: str
+
+
+class HistorySummarizer:
+    """会話履歴をトークン予算内に収め、あふれた発言を要約に置き換える"""
+
+    def __init__(
+        self,
+        summarize: Callable[[Optional[str], List[Dict[str, str]]], Awaitable[Optional[str]]],
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        refresh_tokens: int = HISTORY_SUMMARY_REFRESH_TOKENS,
+        max_size: int = HISTORY_SUMMARY_CACHE_MAX_SIZE,
+    ):
+        """
+        Args:
+            summarize: 前回の要約（なければNone）と新たな発言から要約を生成する非同期関数（失敗時はNone）
+            token_budget: 会話履歴の推定トークン数の上限
+            refresh_tokens: 要約の再生成後に残す余裕
+            max_size: 要約をキャッシュする会話数の上限
+        """
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.refresh_tokens = min(refresh_tokens, token_budget)
+        self.max_size = max_size
+        self._summaries: "OrderedDict[str, RollingSummary]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    async def prepare(
+        self,
+        history: Optional[List[Dict[str, str]]],
+        conversation_key: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        LLMに送る会話履歴を作成
+
+        予算内ならそのまま返します。超える場合は要約（system メッセージ）と直近の発言を返し、
+        会話を識別できない場合（conversation_key なし）は直近の発言のみを返します。
+
+        Args:
+            history: 会話履歴（古い順）
+            conversation_key: 要約をキャッシュする会話の識別子（"line:<ユーザーID>" など）
+        """
+        history = [
+            {"role": entry.get("role", "user"), "content": entry.get("content", "")}
+            for entry in history or []
+        ]
+        if sum(message_tokens(entry) for entry in history) <= self.token_budget:
+            return history
+        if not HISTORY_SUMMARY_ENABLED or conversation_key is None:
+            return trim_history(history, self.token_budget)
+
+        summary = self._summaries.get(conversation_key)
+        uncovered_from = 0
+        if summary is not None:
+            self._summaries.move_to_end(conversation_key)
+            covered = self._find_covered(history, summary)
+            if covered is not None:
+                tail = history[covered:]
+                if sum(message_tokens(entry) for entry in tail) <= self.token_budget:
+                    self.hits += 1
+                    return [self._summary_message(summary.text)] + tail
+                uncovered_from = covered
+
+        # 予算から余裕を残した分だけを直近の発言として残し、それより古い発言を要約に追加
+        recent = trim_history(history, self.token_budget - self.refresh_tokens)
+        split = len(history) - len(recent)
+        text = await self._refresh(
+            conversation_key,
+            summary.text if summary is not None else None,
+            history[uncovered_from:split],
+            _fingerprint(history[max(0, split - 2):split]),
+        )
+        if text is None:
+            # 要約に失敗した場合は直近の発言のみ（前回の要約があれば併用）
+            recent = trim_history(history, self.token_budget)
+            return ([self._summary_message(summary.text)] if summary is not None else []) + recent
+        return [self._summary_message(text)] + recent
+
+    @staticmethod
+    def _find_covered(history: List[Dict[str, str]], summary: RollingSummary) -> Optional[int]:
+        """要約済みの範囲の次の位置（見つからなければNone）"""
+        for i in range(len(history), 0, -1):
+            if _fingerprint(history[max(0, i - 2):i]) == summary.fingerprint:
+                return i
+        return None
+
+    async def _refresh(
+        self,
+        conversation_key: str,
+        previous: Optional[str],
+        overflow: List[Dict[str, str]],
+        fingerprint: str
+    ) -> Optional[str]:
+        """要約を再生成してキャッシュ（同じ会話の再生成が進行中ならその結果を待つ）"""
+        task = self._refreshing.get(conversation_key)
+        if task is None:
+            task = asyncio.ensure_future(self._summarize(conversation_key, previous, overflow, fingerprint))
+            self._refreshing[conversation_key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(conversation_key, None))
+        return await asyncio.shield(task)
+
+    async def _summarize(
+        self,
+        conversation_key: str,
+        previous: Optional[str],
+        overflow: List[Dict[str, str]],
+        fingerprint: str
+    ) -> Optional[str]:
+        try:
+            text = await self.summarize(previous, overflow)
+        except Exception as e:
+            logger.warning(f"Conversation summary failed: {e}")
+            text = None
+        if not text:
+            self.failures += 1
+            return None
+
+        self.refreshes += 1
+        self._summaries[conversation_key] = RollingSummary(text=text, fingerprint=fingerprint)
+        self._summaries.move_to_end(conversation_key)
+        while len(self._summaries) > self.max_size:
+            self._summaries.popitem(last=False)
+        return text
+
+    @staticmethod
+    def _summary_message(text: str) -> Dict[str, str]:
+        return {"role": "system", "content": SUMMARY_PREFIX + text}
+
+    def forget(self, conversation_key: str) -> None:
+        """会話の要約を破棄（相談の終了時など）"""
+        self._summaries.pop(conversation_key, None)
+
+    def clear(self) -> None:
+        """全ての要約を破棄"""
+        self._summaries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """要約の再利用・再生成の統計"""
+        return {
+            "size": len(self._summaries),
+            "max_size": self.max_size,
+            "token_budget": self.token_budget,
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
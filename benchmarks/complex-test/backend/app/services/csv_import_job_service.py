@@ -0,0 +1,461 @@
+"""
+CSVインポートジョブサービス
+
+アップロードされたCSVをディスクに永続化し、バックグラウンドで
+チャンク単位に登録します。各チャンクの登録とチェックポイント
+（処理済みの最終行番号・進捗カウンタ）は同一トランザクションでコミットするため、
+プロセスが途中で停止しても、再起動後にチェックポイントの続きから再開できます。
+"""
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import CSVImportJob, CSVImportJobStatus
+from app.models.csv_import import CSVImportJobResponse
+from app.services.csv_import_service import (
+    CSV_SNIFF_BYTES,
+    iter_validated_rows,
+    check_duplicates,
+    generate_temp_password,
+    build_user_records,
+    insert_user_chunk,
+    resolve_departments,
+)
+from app.utils.security import hash_passwords
+
+logger = logging.getLogger(__name__)
+
+# アップロードファイルの保存先（ジョブ完了まで保持）
+CSV_IMPORT_UPLOAD_DIR = os.getenv("CSV_IMPORT_UPLOAD_DIR") or os.path.join(
+    tempfile.gettempdir(), "stressagent_csv_imports"
+)
+
+# 同時に実行するインポートジョブ数（プロセスごと）
+CSV_IMPORT_MAX_CONCURRENT_JOBS = int(os.getenv("CSV_IMPORT_MAX_CONCURRENT_JOBS", "1"))
+
+# 実行中のまま更新が途絶えたジョブを中断扱いにするまでの秒数（1チャンクの処理時間より長くする）
+CSV_IMPORT_JOB_STALE_SECONDS = int(os.getenv("CSV_IMPORT_JOB_STALE_SECONDS", "300"))
+
+# 未処理・中断ジョブを再開する間隔（秒）
+CSV_IMPORT_JOB_POLL_SECONDS = int(os.getenv("CSV_IMPORT_JOB_POLL_SECONDS", "60"))
+
+# ジョブに保存するバリデーションエラー・重複の最大件数
+CSV_IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("CSV_IMPORT_MAX_REPORTED_ERRORS", "100"))
+
+# ヘッダー行の行番号（チェックポイントの初期値）
+HEADER_ROW_NUMBER = 1
+
+
+def persist_upload(raw: BinaryIO, job_id: uuid.UUID) -> str:
+    """
+    アップロードファイルをディスクに保存
+
+    書き込み途中のファイルを読まないよう、一時ファイルに書いてからリネームします。
+
+    Returns:
+        保存先のパス
+    """
+    os.makedirs(CSV_IMPORT_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(CSV_IMPORT_UPLOAD_DIR, f"{job_id}.csv")
+    partial_path = f"{path}.part"
+
+    raw.seek(0)
+    with open(partial_path, "wb") as f:
+        shutil.copyfileobj(raw, f, CSV_SNIFF_BYTES)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial_path, path)
+    return path
+
+
+def remove_upload(path: str) -> None:
+    """保存したアップロードファイルを削除"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def iter_pending_chunks(
+    raw: BinaryIO,
+    skip_rows: Set[int],
+    last_row_number: int,
+    chunk_size: int
+) -> Iterator[Tuple[List[dict], int, int]]:
+    """
+    チェックポイント以降の行をチャンク単位で返す
+
+    Args:
+        raw: CSVファイル
+        skip_rows: スキップする行番号（エラー行・重複行）
+        last_row_number: チェックポイント（処理済みの最終行番号）
+        chunk_size: 1チャンクあたりの登録行数
+
+    Yields:
+        (登録対象の行, スキップした行数, チャンクの最終行番号)
+    """
+    rows = []
+    skipped = 0
+    row_number = last_row_number
+    for row, _ in iter_validated_rows(raw):
+        row_number = row["row_number"]
+        if row_number <= last_row_number:
+            continue
+
+        if row_number in skip_rows:
+            skipped += 1
+        else:
+            rows.append(row)
+
+        if len(rows) >= chunk_size:
+            yield rows, skipped, row_number
+            rows = []
+            skipped = 0
+
+    if rows or skipped:
+        yield rows, skipped, row_number
+
+
+def _take(iterator: Iterator, count: int) -> list:
+    """イテレータから最大count件を取り出す"""
+    items = []
+    for item in iterator:
+        items.append(item)
+        if len(items) >= count:
+            break
+    return items
+
+
+def _heartbeat(job: CSVImportJob) -> None:
+    """
+    ジョブの更新日時を進める（次のコミットで反映）
+
+    中断ジョブの判定は updated_at で行うため、進捗カウンタが変わらない場合
+    （再開時の再バリデーションなど）もチェックポイントごとに明示的に更新します。
+    """
+    job.updated_at = datetime.now(timezone.utc)
+
+
+def to_job_response(job: CSVImportJob) -> CSVImportJobResponse:
+    """ジョブをレスポンスに変換"""
+    error_details = job.error_details or {}
+    return CSVImportJobResponse(
+        job_id=str(job.id),
+        status=job.status.value if isinstance(job.status, CSVImportJobStatus) else job.status,
+        filename=job.filename,
+        total_rows=job.total_rows or 0,
+        validated_rows=job.validated_rows or 0,
+        hashed_rows=job.hashed_rows or 0,
+        inserted_rows=job.inserted_rows or 0,
+        skipped_rows=job.skipped_rows or 0,
+        committed_chunks=job.committed_chunks or 0,
+        validation_errors=error_details.get("validation_errors", []),
+        duplicates=error_details.get("duplicates", []),
+        message=job.message,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+async def _validate_file(db: AsyncSession, job: CSVImportJob, raw: BinaryIO) -> Tuple[int, List[dict], list]:
+    """
+    1パス目: 全行をバリデーションし、チャンクごとに進捗を記録
+
+    Returns:
+        (総行数, 重複チェック用のメールアドレスと部署名, バリデーションエラー)
+    """
+    total_rows = 0
+    email_entries = []
+    validation_errors = []
+
+    rows = iter_validated_rows(raw)
+    try:
+        while True:
+            batch = await run_in_threadpool(_take, rows, job.chunk_size)
+            if not batch:
+                break
+
+            for row, row_errors in batch:
+                validation_errors.extend(row_errors)
+                if row["email"]:
+                    email_entries.append({
+                        "row_number": row["row_number"],
+                        "email": row["email"],
+                        "department": row["department"],
+                    })
+            total_rows += len(batch)
+
+            # 再開時は前回の進捗を巻き戻さない
+            job.validated_rows = max(job.validated_rows or 0, total_rows)
+            _heartbeat(job)
+            await db.commit()
+    finally:
+        rows.close()
+
+    job.total_rows = total_rows
+    return total_rows, email_entries, validation_errors
+
+
+async def _finish_job(db: AsyncSession, job: CSVImportJob, job_status: CSVImportJobStatus, message: str) -> None:
+    """ジョブを終了状態にしてアップロードファイルを削除"""
+    job.status = job_status
+    job.message = message
+    await db.commit()
+    remove_upload(job.file_path)
+    logger.info(f"CSV import job {job.id} {job_status.value}: {message}")
+
+
+async def process_import_job(db: AsyncSession, job: CSVImportJob) -> None:
+    """
+    インポートジョブを実行（チェックポイントから再開可能）
+
+    1パス目で全行のバリデーションと重複チェック、部署の解決・作成を行い、
+    2パス目でチェックポイント以降の行をチャンクごとにハッシュ化・登録します。
+    チャンクの登録と進捗の更新は同一トランザクションでコミットします。
+
+    Args:
+        db: データベースセッション
+        job: 実行するジョブ（RUNNINGに更新済み）
+    """
+    resuming = job.last_row_number > HEADER_ROW_NUMBER
+
+    with open(job.file_path, "rb") as raw:
+        total_rows, email_entries, validation_errors = await _validate_file(db, job, raw)
+        if total_rows == 0:
+            await _finish_job(db, job, CSVImportJobStatus.FAILED, "CSVファイルにデータがありません")
+            return
+
+        # 重複チェック（チェックポイント以前の行は自身が登録済みのためDB重複から除外）
+        csv_duplicates, db_duplicates = await check_duplicates(
+            email_entries, str(job.company_id), db
+        )
+        db_duplicates = [d for d in db_duplicates if d.row_number > job.last_row_number]
+        all_duplicates = csv_duplicates + db_duplicates
+
+        if job.error_details is None:
+            job.error_details = {
+                "validation_errors": [e.model_dump() for e in validation_errors[:CSV_IMPORT_MAX_REPORTED_ERRORS]],
+                "duplicates": [d.model_dump() for d in all_duplicates[:CSV_IMPORT_MAX_REPORTED_ERRORS]],
+            }
+        else:
+            # 中断から再開までの間に他の登録で重複となった行を追記
+            reported = job.error_details.get("duplicates", [])
+            reported_rows = {d["row_number"] for d in reported}
+            new_duplicates = [d.model_dump() for d in all_duplicates if d.row_number not in reported_rows]
+            if new_duplicates:
+                job.error_details = {
+                    **job.error_details,
+                    "duplicates": (reported + new_duplicates)[:CSV_IMPORT_MAX_REPORTED_ERRORS],
+                }
+
+        # skip_errors=Falseで、エラーがある場合は処理中止（再開時も再判定する）
+        if not job.skip_errors and (validation_errors or all_duplicates):
+            job.skipped_rows = total_rows - job.inserted_rows
+            if resuming:
+                message = (
+                    f"再開時に重複が見つかったため中止しました（登録済みの{job.inserted_rows}件はそのまま残ります）。"
+                    "skip_errors=trueで再実行するとエラー行をスキップしてインポートします。"
+                )
+            else:
+                message = "バリデーションエラーまたは重複があります。skip_errors=trueで再実行するとエラー行をスキップしてインポートします。"
+            await _finish_job(db, job, CSVImportJobStatus.FAILED, message)
+            return
+
+        skip_rows = {e.row_number for e in validation_errors} | {d.row_number for d in all_duplicates}
+
+        # 登録対象の行の部署をまとめて解決（存在しない部署は一括作成）
+        department_ids = await resolve_departments(
+            db, job.company_id,
+            (e["department"] for e in email_entries if e["row_number"] not in skip_rows)
+        )
+
+        # コミットされなかったハッシュ化件数は破棄
+        job.hashed_rows = job.inserted_rows
+        _heartbeat(job)
+        await db.commit()
+
+        # 2パス目: チェックポイント以降をチャンク単位で登録
+        chunks = iter_pending_chunks(raw, skip_rows, job.last_row_number, job.chunk_size)
+        try:
+            while True:
+                chunk = await run_in_threadpool(next, chunks, None)
+                if chunk is None:
+                    break
+                rows, skipped, last_row_number = chunk
+
+                records = []
+                if rows:
+                    hashed_passwords = await hash_passwords([generate_temp_password() for _ in rows])
+                    records = build_user_records(rows, hashed_passwords, job.company_id, department_ids)
+                    job.hashed_rows += len(rows)
+                    _heartbeat(job)
+                    await db.commit()
+
+                # チェックポイントを先にflushし、ユーザー登録と同一トランザクションでコミット
+                job.inserted_rows += len(records)
+                job.skipped_rows += skipped
+                job.last_row_number = last_row_number
+                job.committed_chunks += 1
+                _heartbeat(job)
+                await db.flush()
+                await insert_user_chunk(db, records)
+                await db.commit()
+
+                logger.info(
+                    f"CSV import job {job.id}: chunk {job.committed_chunks} committed "
+                    f"(row {last_row_number}, {job.inserted_rows} inserted)"
+                )
+        finally:
+            chunks.close()
+
+    await _finish_job(
+        db, job, CSVImportJobStatus.COMPLETED,
+        f"{job.inserted_rows}件のユーザーを登録しました。{job.skipped_rows}件はスキップされました。"
+    )
+
+
+async def claim_job(db: AsyncSession, job_id: uuid.UUID) -> Optional[CSVImportJob]:
+    """
+    ジョブの実行権を取得
+
+    未処理のジョブ、または更新が途絶えた実行中ジョブのみRUNNINGに更新します
+    （複数プロセスでの二重実行を防ぐ）。
+
+    Returns:
+        取得したジョブ（取得できなければNone）
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=CSV_IMPORT_JOB_STALE_SECONDS)
+    result = await db.execute(
+        update(CSVImportJob)
+        .where(
+            CSVImportJob.id == job_id,
+            or_(
+                CSVImportJob.status == CSVImportJobStatus.PENDING,
+                and_(
+                    CSVImportJob.status == CSVImportJobStatus.RUNNING,
+                    CSVImportJob.updated_at < stale_before,
+                ),
+            ),
+        )
+        .values(status=CSVImportJobStatus.RUNNING, updated_at=func.now())
+    )
+    await db.commit()
+    if result.rowcount == 0:
+        return None
+    return await db.get(CSVImportJob, job_id)
+
+
+class CSVImportJobRunner:
+    """CSVインポートジョブのバックグラウンド実行"""
+
+    def __init__(self):
+        self._tasks: Dict[uuid.UUID, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._watcher: Optional[asyncio.Task] = None
+
+    def enqueue(self, job_id: uuid.UUID) -> None:
+        """ジョブを実行キューに追加（実行中のジョブは二重に追加しない）"""
+        task = self._tasks.get(job_id)
+        if task and not task.done():
+            return
+
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _run(self, job_id: uuid.UUID) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(CSV_IMPORT_MAX_CONCURRENT_JOBS)
+
+        async with self._semaphore:
+            async with AsyncSessionLocal() as db:
+                job = await claim_job(db, job_id)
+                if job is None:
+                    return
+
+                logger.info(f"CSV import job {job_id} started (checkpoint: row {job.last_row_number})")
+                try:
+                    await process_import_job(db, job)
+                except asyncio.CancelledError:
+                    # シャットダウン時は未処理に戻し、次回起動時にチェックポイントから再開
+                    await db.rollback()
+                    await db.refresh(job)
+                    job.status = CSVImportJobStatus.PENDING
+                    await db.commit()
+                    raise
+                except Exception as e:
+                    logger.error(f"CSV import job {job_id} failed: {e}")
+                    await db.rollback()
+                    await db.refresh(job)
+                    message = e.detail if isinstance(e, HTTPException) else "インポート中にエラーが発生しました"
+                    await _finish_job(db, job, CSVImportJobStatus.FAILED, message)
+
+    async def resume_pending_jobs(self) -> int:
+        """
+        未処理・中断されたジョブを再開
+
+        Returns:
+            キューに追加したジョブ数
+        """
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=CSV_IMPORT_JOB_STALE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(CSVImportJob.id).where(
+                    or_(
+                        CSVImportJob.status == CSVImportJobStatus.PENDING,
+                        and_(
+                            CSVImportJob.status == CSVImportJobStatus.RUNNING,
+                            CSVImportJob.updated_at < stale_before,
+                        ),
+                    )
+                )
+            )
+            job_ids = result.scalars().all()
+
+        for job_id in job_ids:
+            self.enqueue(job_id)
+        return len(job_ids)
+
+    async def _watch(self) -> None:
+        """定期的に未処理・中断ジョブを再開"""
+        while True:
+            try:
+                resumed = await self.resume_pending_jobs()
+                if resumed:
+                    logger.info(f"Resumed {resumed} CSV import job(s)")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to resume CSV import jobs: {e}")
+            await asyncio.sleep(CSV_IMPORT_JOB_POLL_SECONDS)
+
+    def start(self) -> None:
+        """ジョブの監視を開始"""
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def shutdown(self) -> None:
+        """監視と実行中のジョブを停止（実行中のジョブは次回起動時に再開）"""
+        tasks = list(self._tasks.values())
+        if self._watcher is not None:
+            tasks.append(self._watcher)
+            self._watcher = None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# シングルトンインスタンス
+csv_import_job_runner = CSVImportJobRunner()
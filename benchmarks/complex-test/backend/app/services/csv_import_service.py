@@ -0,0 +1,465 @@
+"""
+CSVインポートサービス
+
+アップロードされたCSVをストリーミングでデコード・パースし、
+1行ずつバリデーションします（ファイル全体をメモリに載せない）。
+"""
+import codecs
+import csv
+import enum
+import io
+import os
+import re
+import secrets
+import string
+import uuid
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Department, User, UserRole
+from app.models.csv_import import CSVValidationError, DuplicateEntry
+
+# 必須カラム
+REQUIRED_COLUMNS = ["email", "name", "employee_id", "department"]
+
+# エンコーディング判定に使う先頭チャンクのサイズ
+CSV_SNIFF_BYTES = 64 * 1024
+
+# 対応エンコーディング（判定順）
+SUPPORTED_ENCODINGS = ("utf-8-sig", "shift-jis")
+
+ENCODING_ERROR_MESSAGE = "CSVファイルのエンコーディングが不正です。UTF-8またはShift-JISで保存してください。"
+
+# インポートジョブの1チャンクあたりの行数（チャンクごとにコミット）
+CSV_IMPORT_CHUNK_SIZE = int(os.getenv("CSV_IMPORT_CHUNK_SIZE", "500"))
+
+# PostgreSQL(asyncpg)ではCOPYで一括登録する
+CSV_IMPORT_USE_COPY = os.getenv("CSV_IMPORT_USE_COPY", "true").lower() == "true"
+
+# プレビューで行データを返す行数（デフォルト）
+CSV_PREVIEW_SAMPLE_SIZE = int(os.getenv("CSV_PREVIEW_SAMPLE_SIZE", "100"))
+
+# 重複チェックで1クエリのIN句に含めるメールアドレス数
+CSV_DUPLICATE_CHECK_BATCH_SIZE = int(os.getenv("CSV_DUPLICATE_CHECK_BATCH_SIZE", "1000"))
+
+# この件数以上のメールアドレスは一時テーブルとの結合で重複チェックする（PostgreSQL）
+CSV_DUPLICATE_CHECK_TEMP_TABLE_THRESHOLD = int(os.getenv("CSV_DUPLICATE_CHECK_TEMP_TABLE_THRESHOLD", "20000"))
+
+# 一括登録で書き込むusersテーブルのカラム
+USER_INSERT_COLUMNS = ("id", "company_id", "department_id", "email", "hashed_password", "role")
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+def validate_email(email: str) -> bool:
+    """メールアドレスの形式チェック"""
+    return bool(EMAIL_PATTERN.match(email))
+
+
+def generate_temp_password(length: int = 12) -> str:
+    """一時パスワード生成"""
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+def detect_encoding(head: bytes) -> str:
+    """
+    先頭チャンクからエンコーディングを判定
+
+    チャンク境界で分断されたマルチバイト文字はエラーとしないよう、
+    インクリメンタルデコーダで判定します。
+
+    Args:
+        head: ファイル先頭のバイト列
+
+    Returns:
+        エンコーディング名
+    """
+    for encoding in SUPPORTED_ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ENCODING_ERROR_MESSAGE
+    )
+
+
+def validate_csv_row(row_num: int, row: dict) -> Tuple[dict, List[CSVValidationError]]:
+    """
+    CSVの1行をバリデーション
+
+    Args:
+        row_num: 行番号（ヘッダーが1行目）
+        row: csv.DictReaderの行データ
+
+    Returns:
+        (行データ, バリデーションエラーのリスト)
+    """
+    row_errors = []
+
+    # 各フィールドのバリデーション（列が不足している行はNoneになる）
+    email = (row.get('email') or '').strip()
+    name = (row.get('name') or '').strip()
+    employee_id = (row.get('employee_id') or '').strip()
+    department = (row.get('department') or '').strip()
+
+    # 必須チェック
+    if not email:
+        row_errors.append(CSVValidationError(
+            row_number=row_num, column="email", value="", error_message="メールアドレスは必須です"
+        ))
+    elif not validate_email(email):
+        row_errors.append(CSVValidationError(
+            row_number=row_num, column="email", value=email, error_message="メールアドレスの形式が不正です"
+        ))
+
+    if not name:
+        row_errors.append(CSVValidationError(
+            row_number=row_num, column="name", value="", error_message="名前は必須です"
+        ))
+    elif len(name) > 100:
+        row_errors.append(CSVValidationError(
+            row_number=row_num, column="name", value=name[:20] + "...", error_message="名前は100文字以内で入力してください"
+        ))
+
+    if not employee_id:
+        row_errors.append(CSVValidationError(
+            row_number=row_num, column="employee_id", value="", error_message="社員IDは必須です"
+        ))
+    elif len(employee_id) > 50:
+        row_errors.append(CSVValidationError(
+            row_number=row_num, column="employee_id", value=employee_id[:20] + "...", error_message="社員IDは50文字以内で入力してください"
+        ))
+
+    if not department:
+        row_errors.append(CSVValidationError(
+            row_number=row_num, column="department", value="", error_message="部署は必須です"
+        ))
+    elif len(department) > 100:
+        row_errors.append(CSVValidationError(
+            row_number=row_num, column="department", value=department[:20] + "...", error_message="部署は100文字以内で入力してください"
+        ))
+
+    return {
+        "row_number": row_num,
+        "email": email,
+        "name": name,
+        "employee_id": employee_id,
+        "department": department,
+        "is_valid": len(row_errors) == 0,
+        "errors": [e.error_message for e in row_errors]
+    }, row_errors
+
+
+def iter_validated_rows(raw: BinaryIO) -> Iterator[Tuple[dict, List[CSVValidationError]]]:
+    """
+    CSVファイルをストリーミングでパースし、バリデーション済みの行を順に返す
+
+    先頭チャンクでエンコーディングを判定した後、TextIOWrapperで
+    チャンク単位にデコードしながら1行ずつ処理します。
+    呼び出しごとにファイル先頭から読み直すため、複数回の走査が可能です。
+
+    Args:
+        raw: アップロードファイルのバイナリストリーム（シーク可能）
+
+    Yields:
+        (行データ, バリデーションエラーのリスト)
+    """
+    raw.seek(0)
+    encoding = detect_encoding(raw.read(CSV_SNIFF_BYTES))
+    raw.seek(0)
+
+    text = io.TextIOWrapper(raw, encoding=encoding, newline="")
+    try:
+        reader = csv.DictReader(text)
+
+        # ヘッダーチェック
+        if not reader.fieldnames:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="CSVファイルにヘッダーがありません"
+            )
+
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in reader.fieldnames]
+        if missing_columns:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"必須カラムがありません: {', '.join(missing_columns)}"
+            )
+
+        for row_num, row in enumerate(reader, start=2):  # ヘッダーが1行目なので2から開始
+            yield validate_csv_row(row_num, row)
+    except UnicodeDecodeError:
+        # 先頭チャンク以降で判定と異なるバイト列が現れた場合
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ENCODING_ERROR_MESSAGE
+        )
+    finally:
+        # ラッパーのGC時に元ファイルが閉じられないよう切り離す
+        text.detach()
+
+
+def peek_first_row(raw: BinaryIO) -> Optional[Tuple[dict, List[CSVValidationError]]]:
+    """
+    エンコーディング・ヘッダーを検証し、先頭のデータ行を返す
+
+    Returns:
+        先頭行（データ行がなければNone）
+    """
+    rows = iter_validated_rows(raw)
+    try:
+        return next(rows, None)
+    finally:
+        rows.close()
+
+
+def scan_csv_preview(raw: BinaryIO, sample_size: int) -> Tuple[List[dict], int, Set[int], List[dict]]:
+    """
+    プレビュー用にCSVを1パスで走査
+
+    先頭sample_size行のみ行データを保持し、それ以降は件数集計と
+    重複チェックに必要なメールアドレスのみを収集します。
+
+    Args:
+        raw: CSVファイル
+        sample_size: 行データを返す先頭の行数
+
+    Returns:
+        (先頭の行データ, 総行数, バリデーションエラーのある行番号, 重複チェック用のメールアドレス)
+    """
+    sample_rows = []
+    total_rows = 0
+    invalid_row_numbers = set()
+    email_entries = []
+    for row, row_errors in iter_validated_rows(raw):
+        total_rows += 1
+        if len(sample_rows) < sample_size:
+            sample_rows.append(row)
+        if row_errors:
+            invalid_row_numbers.add(row["row_number"])
+        if row["email"]:
+            email_entries.append({"row_number": row["row_number"], "email": row["email"]})
+    return sample_rows, total_rows, invalid_row_numbers, email_entries
+
+
+async def _find_existing_emails_in_batches(db: AsyncSession, emails: List[str]) -> Set[str]:
+    """lower(email) IN (...) をバッチに分けて既存のメールアドレスを検索"""
+    existing = set()
+    for start in range(0, len(emails), CSV_DUPLICATE_CHECK_BATCH_SIZE):
+        batch = emails[start:start + CSV_DUPLICATE_CHECK_BATCH_SIZE]
+        result = await db.execute(
+            select(func.lower(User.email)).where(func.lower(User.email).in_(batch))
+        )
+        existing.update(result.scalars().all())
+    return existing
+
+
+async def _find_existing_emails_with_temp_table(db: AsyncSession, emails: List[str]) -> Set[str]:
+    """一時テーブルにCOPYしたメールアドレスとusersを結合して既存のメールアドレスを検索"""
+    await db.execute(text(
+        "CREATE TEMPORARY TABLE IF NOT EXISTS csv_import_emails (email TEXT PRIMARY KEY) ON COMMIT DROP"
+    ))
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        "csv_import_emails",
+        records=[(email,) for email in emails],
+        columns=["email"],
+    )
+    result = await db.execute(text(
+        "SELECT e.email FROM csv_import_emails e JOIN users u ON lower(u.email) = e.email"
+    ))
+    existing = set(result.scalars().all())
+    await db.execute(text("DROP TABLE csv_import_emails"))
+    return existing
+
+
+async def find_existing_emails(db: AsyncSession, emails: Iterable[str]) -> Set[str]:
+    """
+    DBに登録済みのメールアドレス（小文字）を返す
+
+    Userオブジェクトは生成せず lower(email) のみを取得します
+    （ix_users_email_lower インデックスを使用）。
+    件数が多い場合、PostgreSQL(asyncpg)では一時テーブルとの結合で検索します。
+
+    Args:
+        db: データベースセッション
+        emails: 検索するメールアドレス
+
+    Returns:
+        登録済みのメールアドレス（小文字）
+    """
+    unique_emails = sorted({email.lower() for email in emails})
+    if not unique_emails:
+        return set()
+
+    if len(unique_emails) >= CSV_DUPLICATE_CHECK_TEMP_TABLE_THRESHOLD and _supports_copy(db):
+        return await _find_existing_emails_with_temp_table(db, unique_emails)
+    return await _find_existing_emails_in_batches(db, unique_emails)
+
+
+async def check_duplicates(
+    rows: List[dict],
+    company_id: str,
+    db: AsyncSession
+) -> Tuple[List[DuplicateEntry], List[DuplicateEntry]]:
+    """重複チェック（CSV内重複とDB重複）"""
+    csv_duplicates = []
+    db_duplicates = []
+
+    # CSV内の重複チェック
+    email_counts = {}
+    for row in rows:
+        email = row["email"].lower()
+        if email in email_counts:
+            csv_duplicates.append(DuplicateEntry(
+                row_number=row["row_number"],
+                email=row["email"],
+                duplicate_type="csv_internal"
+            ))
+        else:
+            email_counts[email] = row["row_number"]
+
+    # DBの重複チェック
+    existing_emails = await find_existing_emails(db, email_counts.keys())
+    for row in rows:
+        if row["email"].lower() in existing_emails:
+            db_duplicates.append(DuplicateEntry(
+                row_number=row["row_number"],
+                email=row["email"],
+                duplicate_type="database"
+            ))
+
+    return csv_duplicates, db_duplicates
+
+
+async def resolve_departments(
+    db: AsyncSession,
+    company_id: uuid.UUID,
+    names: Iterable[str]
+) -> Dict[str, uuid.UUID]:
+    """
+    部署名をIDに解決し、存在しない部署はまとめて作成
+
+    既存の部署は1クエリで取得し、存在しない部署は1回の一括INSERTで作成します
+    （PostgreSQLでは ON CONFLICT DO NOTHING で同時作成と競合しても失敗しない）。
+
+    Args:
+        db: データベースセッション
+        company_id: 企業ID
+        names: 部署名
+
+    Returns:
+        {部署名: 部署ID}
+    """
+    unique_names = sorted({name for name in names if name})
+    if not unique_names:
+        return {}
+
+    result = await db.execute(
+        select(Department.name, Department.id).where(
+            Department.company_id == company_id,
+            Department.name.in_(unique_names)
+        )
+    )
+    department_ids = {name: department_id for name, department_id in result.all()}
+
+    missing = [name for name in unique_names if name not in department_ids]
+    if not missing:
+        return department_ids
+
+    records = [{"id": uuid.uuid4(), "company_id": company_id, "name": name} for name in missing]
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        result = await db.execute(
+            pg_insert(Department)
+            .values(records)
+            .on_conflict_do_nothing(index_elements=["company_id", "name"])
+            .returning(Department.name, Department.id)
+        )
+        department_ids.update({name: department_id for name, department_id in result.all()})
+
+        # 競合でスキップされた部署（同時に作成されたもの）を取得
+        conflicted = [name for name in missing if name not in department_ids]
+        if conflicted:
+            result = await db.execute(
+                select(Department.name, Department.id).where(
+                    Department.company_id == company_id,
+                    Department.name.in_(conflicted)
+                )
+            )
+            department_ids.update({name: department_id for name, department_id in result.all()})
+    else:
+        await db.execute(insert(Department), records)
+        department_ids.update({r["name"]: r["id"] for r in records})
+
+    return department_ids
+
+
+def build_user_records(
+    rows: List[dict],
+    hashed_passwords: List[str],
+    company_id: uuid.UUID,
+    department_ids: Optional[Dict[str, uuid.UUID]] = None
+) -> List[dict]:
+    """CSV行とハッシュ済みパスワードから一括登録用のレコードを作成"""
+    department_ids = department_ids or {}
+    return [
+        {
+            "id": uuid.uuid4(),
+            "company_id": company_id,
+            "department_id": department_ids.get(row.get("department")),
+            "email": row["email"],
+            "hashed_password": hashed_password,
+            "role": UserRole.EMPLOYEE,
+        }
+        for row, hashed_password in zip(rows, hashed_passwords)
+    ]
+
+
+def _supports_copy(db: AsyncSession) -> bool:
+    """COPYによる一括登録が使えるか（PostgreSQL + asyncpg）"""
+    dialect = db.get_bind().dialect
+    return CSV_IMPORT_USE_COPY and dialect.name == "postgresql" and dialect.driver == "asyncpg"
+
+
+def _copy_value(value):
+    """COPY用に値を変換（Enumは格納値に変換）"""
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+async def insert_user_chunk(db: AsyncSession, records: List[dict]) -> None:
+    """
+    ユーザーレコードをまとめて登録
+
+    ORMオブジェクトを生成しないため、セッションのidentity mapは肥大化しません。
+    PostgreSQL(asyncpg)では copy_records_to_table、それ以外は
+    INSERT ... VALUES のバッチで登録します。
+
+    Args:
+        db: データベースセッション
+        records: build_user_recordsで作成したレコード
+    """
+    if not records:
+        return
+
+    if _supports_copy(db):
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            User.__tablename__,
+            records=[tuple(_copy_value(r[c]) for c in USER_INSERT_COLUMNS) for r in records],
+            columns=list(USER_INSERT_COLUMNS),
+        )
+    else:
+        await db.execute(insert(User), records)
@@ -0,0 +1,213 @@
+"""
+辞書ベースの感情分析（ローカル・外部依存なし）
+
+日本語の感情語辞書と簡易ルール（否定・強調）でテキストをスコアリングします。
+LLMを呼び出さずに数十マイクロ秒で結果を返すため、以下に使用します。
+
+- 短い・明確なメッセージ（「疲れた」「元気です」など）への即答
+- LLMが遅延・失敗した場合の代替結果（緊急度の高いシグナルを失わないため）
+
+形態素解析は行わず、NFKC正規化したテキストに対する部分一致で判定します。
+"""
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+# この文字数以下で感情語を含むメッセージは辞書の結果で即答する
+LEXICON_FAST_PATH_MAX_LENGTH = int(os.getenv("LEXICON_FAST_PATH_MAX_LENGTH", "15"))
+# この強さ以上で極性が一貫していれば、長いメッセージでも即答する
+LEXICON_FAST_PATH_MIN_STRENGTH = float(os.getenv("LEXICON_FAST_PATH_MIN_STRENGTH", "0.8"))
+
+# 感情語（語幹）と重み（-1.0 ~ 1.0）
+SENTIMENT_LEXICON: Dict[str, float] = {
+    # ポジティブ
+    "嬉し": 0.7, "うれし": 0.7, "楽し": 0.7, "たのし": 0.7, "幸せ": 0.8,
+    "元気": 0.6, "絶好調": 0.9, "好調": 0.6, "順調": 0.6, "充実": 0.7,
+    "よかった": 0.6, "良かった": 0.6, "最高": 0.8, "安心": 0.5,
+    "すっきり": 0.5, "リフレッシュ": 0.6, "ぐっすり": 0.6, "よく眠れ": 0.6,
+    "調子がいい": 0.7, "調子いい": 0.7, "調子が良い": 0.7,
+    "ありがと": 0.5, "助かっ": 0.5, "大丈夫": 0.4, "まあまあ": 0.1,
+    # ネガティブ
+    "疲れ": -0.6, "つかれ": -0.6, "しんど": -0.7, "つら": -0.7, "辛い": -0.7, "辛く": -0.7,
+    "だるい": -0.5, "眠れな": -0.7, "寝れな": -0.7, "寝不足": -0.6, "不眠": -0.7,
+    "不安": -0.6, "憂鬱": -0.8, "ゆううつ": -0.8, "落ち込": -0.7, "いらいら": -0.6, "イライラ": -0.6,
+    "ストレス": -0.6, "忙し": -0.4, "残業": -0.4, "徹夜": -0.6, "休めな": -0.6,
+    "きつい": -0.6, "キツ": -0.6, "嫌": -0.5, "悲し": -0.7, "泣き": -0.7, "泣い": -0.7, "怖い": -0.6,
+    "限界": -0.9, "無理": -0.6, "最悪": -0.8, "孤独": -0.7,
+    "体調が悪": -0.7, "体調不良": -0.7, "頭痛": -0.5, "吐き気": -0.7,
+    "パワハラ": -0.8, "セクハラ": -0.8, "いじめ": -0.8,
+    "休みたい": -0.6, "辞めたい": -0.8, "やめたい": -0.7,
+    "消えたい": -1.0, "死にたい": -1.0, "いなくなりたい": -1.0, "生きるのがつら": -1.0,
+}
+
+# 直後に続くと極性を反転する否定表現（「楽しくない」「大丈夫じゃない」）
+NEGATIONS: Tuple[str, ...] = (
+    "くなかった", "くない", "じゃなかった", "じゃない", "ではない",
+    "ていない", "てない", "なかった", "ない", "なく", "ません",
+)
+# 否定で反転した場合の重みの係数（「疲れてない」は「元気」ほど強くない）
+NEGATION_FACTOR = -0.5
+
+# 直前にあると重みを強める表現
+INTENSIFIERS: Tuple[str, ...] = ("とても", "すごく", "凄く", "めちゃ", "本当に", "ほんとに", "かなり", "超", "まじで")
+INTENSIFIER_FACTOR = 1.5
+INTENSIFIER_WINDOW = 4
+
+# リスクフラグとその判定語
+RISK_TERMS: Dict[str, Tuple[str, ...]] = {
+    "self_harm_risk": ("消えたい", "死にたい", "いなくなりたい", "生きるのがつら", "自殺"),
+    "sleep_deprivation": ("眠れな", "寝れな", "寝不足", "不眠"),
+    "overwork": ("残業", "徹夜", "休めな", "休みがない", "働きすぎ"),
+    "harassment": ("パワハラ", "セクハラ", "いじめ"),
+    "burnout": ("限界", "辞めたい", "やめたい", "もう無理"),
+}
+# 即座に専門家への相談を促すべきフラグ
+URGENT_RISK_FLAGS: Set[str] = {"self_harm_risk"}
+
+# トピックとその判定語
+TOPIC_TERMS: Dict[str, Tuple[str, ...]] = {
+    "業務量": ("残業", "忙し", "仕事量", "締め切り", "締切", "納期", "徹夜", "休めな"),
+    "人間関係": ("上司", "同僚", "部下", "人間関係", "パワハラ", "セクハラ", "いじめ"),
+    "睡眠": ("眠", "寝"),
+    "体調": ("体調", "頭痛", "だるい", "吐き気", "熱", "風邪"),
+}
+
+REPLIES = {
+    "urgent": "とてもつらい状況なのですね。一人で抱え込まず、産業医・保健師や専門の相談窓口にぜひ相談してください。",
+    "negative": "お疲れ様です。無理をせず、少し休息をとってくださいね。",
+    "positive": "良いですね！その調子で、ご自身のペースを大切にしてください。",
+    "neutral": "お疲れ様です。",
+}
+
+# 長い語から順に照合し、短い語の重複カウントを防ぐ
+_LEXICON_PATTERN = re.compile(
+    "|".join(re.escape(term) for term in sorted(SENTIMENT_LEXICON, key=len, reverse=True))
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+@dataclass
+class LexiconResult:
+    """辞書ベースの分析結果"""
+    sentiment: float
+    topics: List[str] = field(default_factory=list)
+    urgency: int = 1
+    risk_flags: List[str] = field(default_factory=list)
+    hits: int = 0           # 一致した感情語の数
+    mixed: bool = False     # ポジティブ・ネガティブが混在、または否定で反転した
+    length: int = 0         # 正規化後の文字数
+
+    @property
+    def urgent(self) -> bool:
+        return any(flag in URGENT_RISK_FLAGS for flag in self.risk_flags)
+
+    @property
+    def is_obvious(self) -> bool:
+        """LLMを使わずに即答してよいか（短い、または極性が明確。リスク検出時は除く）"""
+        if self.hits == 0 or self.mixed or self.risk_flags:
+            return False
+        return self.length <= LEXICON_FAST_PATH_MAX_LENGTH or abs(self.sentiment) >= LEXICON_FAST_PATH_MIN_STRENGTH
+
+    def reply(self) -> str:
+        if self.urgent:
+            return REPLIES["urgent"]
+        if self.sentiment <= -0.3:
+            return REPLIES["negative"]
+        if self.sentiment >= 0.3:
+            return REPLIES["positive"]
+        return REPLIES["neutral"]
+
+    def to_analysis(self, source: str) -> Dict:
+        """analyze_sentiment と同じ形式の結果に変換"""
+        return {
+            "sentiment": self.sentiment,
+            "topics": list(self.topics),
+            "urgency": self.urgency,
+            "reply_suggestion": self.reply(),
+            "risk_flags": list(self.risk_flags),
+            "source": source,
+        }
+
+
+def score_text(text: str) -> LexiconResult:
+    """
+    辞書とルールでテキストの感情をスコアリング
+
+    Args:
+        text: 分析対象のテキスト（PII除去済み）
+
+    Returns:
+        分析結果（感情語がなければ sentiment=0.0, urgency=1）
+    """
+    normalized = _normalize(text)
+
+    total = 0.0
+    hits = 0
+    polarities = set()
+    flipped = False
+    for match in _LEXICON_PATTERN.finditer(normalized):
+        weight = SENTIMENT_LEXICON[match.group()]
+        start, end = match.span()
+
+        if normalized.startswith(NEGATIONS, end):
+            weight *= NEGATION_FACTOR
+            flipped = True
+
+        preceding = normalized[max(0, start - INTENSIFIER_WINDOW):start]
+        if any(intensifier in preceding for intensifier in INTENSIFIERS):
+            weight *= INTENSIFIER_FACTOR
+
+        total += weight
+        hits += 1
+        if weight:
+            polarities.add(weight > 0)
+
+    risk_flags = [
+        flag for flag, terms in RISK_TERMS.items()
+        if any(term in normalized for term in terms)
+    ]
+    topics = [
+        topic for topic, terms in TOPIC_TERMS.items()
+        if any(term in normalized for term in terms)
+    ]
+
+    sentiment = round(max(-1.0, min(1.0, total)), 2)
+    if any(flag in URGENT_RISK_FLAGS for flag in risk_flags):
+        urgency = 5
+    elif risk_flags or sentiment <= -0.8:
+        urgency = 3
+    elif sentiment <= -0.4:
+        urgency = 2
+    else:
+        urgency = 1
+
+    return LexiconResult(
+        sentiment=sentiment,
+        topics=topics,
+        urgency=urgency,
+        risk_flags=risk_flags,
+        hits=hits,
+        mixed=len(polarities) > 1 or flipped,
+        length=len(normalized),
+    )
+
+
+def merge_risk_signals(analysis: Dict, local: LexiconResult) -> Dict:
+    """
+    LLMの結果に辞書で検出したリスクフラグと緊急度を反映
+
+    LLMが見落とした場合でも、緊急度の高いシグナルを失わないようにします。
+    """
+    if not local.risk_flags:
+        return analysis
+    analysis["risk_flags"] = list(analysis.get("risk_flags", [])) + [
+        flag for flag in local.risk_flags if flag not in analysis.get("risk_flags", [])
+    ]
+    analysis["urgency"] = max(int(analysis.get("urgency", 1)), local.urgency)
+    return analysis
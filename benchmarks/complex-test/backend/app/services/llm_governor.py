@@ -0,0 +1,326 @@
+"""
+LLM呼び出しの同時実行制御
+
+全てのOpenAI呼び出しをプロセス内で1つのガバナー経由にし、以下を行います。
+
+- 同時実行数の上限（LLM_MAX_CONCURRENCY）
+- 優先度付きの待ち行列: 対話チャット > ダッシュボード提案 > バッチ分析
+- 429（レート制限）時の適応的バックオフ: 同時実行数を半減して一定時間待機し、
+  成功が続くと1ずつ上限まで戻す
+- サーキットブレーカー: 失敗が続いた場合は一定時間呼び出さずに即座に失敗させ、
+  呼び出し元の既存のフォールバックに切り替える
+
+ストリーミング（stream=True）の呼び出しは stream() を使い、応答を最後まで読み終えるまで
+実行枠を保持します。
+ガバナーが呼び出しを拒否した場合は LLMUnavailableError を送出します。
+"""
+import asyncio
+import enum
+import heapq
+import itertools
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 同時にLLMへ送るリクエスト数の上限
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# 実行枠を待つ最大時間（秒）。超過時はフォールバックに切り替える
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# 429受信時のバックオフ（Retry-Afterがない場合は指数的に延長）
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+
+# 連続失敗がこの回数に達したら遮断し、LLM_CIRCUIT_RESET_SECONDS後に1件だけ試行する
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+
+class LLMPriority(enum.IntEnum):
+    """LLM呼び出しの優先度（値が小さいほど優先）"""
+    INTERACTIVE = 0  # チャット・Botの応答
+    DASHBOARD = 1    # ダッシュボードの改善提案
+    BATCH = 2        # 組織分析などのバッチ処理
+
+
+class CircuitState(str, enum.Enum):
+    """サーキットブレーカーの状態"""
+    CLOSED = "closed"        # 正常
+    OPEN = "open"            # 遮断中（即座に失敗）
+    HALF_OPEN = "half_open"  # 復旧確認中（1件のみ試行）
+
+
+class LLMUnavailableError(Exception):
+    """LLMプロバイダーが利用できない（遮断中・待機タイムアウト）"""
+    pass
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """429レスポンスのRetry-Afterヘッダー（秒）"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGovernor:
+    """優先度付きの同時実行制御とサーキットブレーカー"""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+        failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = LLM_CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+
+        self._condition = asyncio.Condition()
+        self._queue: List[Tuple[int, int]] = []  # (優先度, 到着順)
+        self._sequence = itertools.count()
+        self._wake_tasks: Set[asyncio.Task] = set()
+
+        self.limit = max_concurrency  # 現在の同時実行上限（429で縮小）
+        self.in_flight = 0
+        self._backoff_until = 0.0
+        self._backoff_seconds = 0.0
+
+        self.state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.completed = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def call(
+        self,
+        priority: LLMPriority,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        **kwargs: Any
+    ) -> Any:
+        """
+        実行枠を確保してLLM呼び出しを実行
+
+        Args:
+            priority: 優先度
+            func: 呼び出す非同期関数（client.chat.completions.create など）
+
+        Returns:
+            funcの戻り値
+
+        Raises:
+            LLMUnavailableError: 遮断中、または実行枠の待機がタイムアウトした場合
+        """
+        probe = await self._enter(priority)
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        else:
+            self._record_success()
+            return result
+        finally:
+            await self._exit(probe)
+
+    async def stream(
+        self,
+        priority: LLMPriority,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        """
+        実行枠を確保してストリーミングのLLM呼び出しを実行し、チャンクを順に返す
+
+        funcは応答ヘッダーを受信した時点で返るため、実行枠はストリームを読み終えるか
+        閉じられるまで保持し、成否もストリームの終了時に記録します（途中の失敗も
+        サーキットブレーカーの対象）。途中で読むのをやめる場合は aclose() を呼んでください。
+
+        Args:
+            priority: 優先度
+            func: ストリームを返す非同期関数（stream=True の client.chat.completions.create など）
+
+        Yields:
+            ストリームのチャンク
+
+        Raises:
+            LLMUnavailableError: 遮断中、または実行枠の待機がタイムアウトした場合
+        """
+        probe = await self._enter(priority)
+        stream = None
+        try:
+            stream = await func(*args, **kwargs)
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        else:
+            self._record_success()
+        finally:
+            # 呼び出し元が途中で閉じた場合は成否を記録せず、上流の接続と実行枠を解放する
+            response = getattr(stream, "response", None)
+            if response is not None:
+                await response.aclose()
+            await self._exit(probe)
+
+    async def _enter(self, priority: LLMPriority) -> bool:
+        """サーキットブレーカーの判定と実行枠の確保（復旧確認の試行ならTrue）"""
+        probe = self._admit()
+        try:
+            await self._acquire(priority)
+        except BaseException:
+            if probe:
+                self._probe_in_flight = False
+            raise
+        return probe
+
+    async def _exit(self, probe: bool) -> None:
+        if probe:
+            self._probe_in_flight = False
+        await self._release()
+
+    def _admit(self) -> bool:
+        """サーキットブレーカーの判定（復旧確認の試行ならTrue）"""
+        if self.state == CircuitState.OPEN:
+            if self._clock() - self._opened_at < self.reset_seconds:
+                self.rejected += 1
+                raise LLMUnavailableError("LLM circuit is open")
+            self.state = CircuitState.HALF_OPEN
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise LLMUnavailableError("LLM circuit is half-open")
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def _is_next(self, entry: Tuple[int, int]) -> bool:
+        return (
+            self._queue[0] == entry
+            and self.in_flight < self.limit
+            and self._clock() >= self._backoff_until
+        )
+
+    async def _wait_turn(self, entry: Tuple[int, int]) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._is_next(entry))
+            heapq.heappop(self._queue)
+            self.in_flight += 1
+            # 枠が残っていれば次の待機者も起こす
+            self._condition.notify_all()
+
+    async def _acquire(self, priority: LLMPriority) -> None:
+        entry = (int(priority), next(self._sequence))
+        heapq.heappush(self._queue, entry)
+        try:
+            await asyncio.wait_for(self._wait_turn(entry), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise LLMUnavailableError("Timed out waiting for an LLM slot")
+        finally:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._schedule_wake(0)
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def _wake(self, delay: float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with self._condition:
+            self._condition.notify_all()
+
+    def _schedule_wake(self, delay: float) -> None:
+        """待機者を（バックオフ終了後に）起こす"""
+        task = asyncio.get_running_loop().create_task(self._wake(delay))
+        self._wake_tasks.add(task)
+        task.add_done_callback(self._wake_tasks.discard)
+
+    def _record_success(self) -> None:
+        self.completed += 1
+        self._consecutive_failures = 0
+        self._backoff_seconds = 0.0
+        if self.state != CircuitState.CLOSED:
+            logger.info("LLM circuit closed")
+            self.state = CircuitState.CLOSED
+        # 加算的に同時実行数を回復
+        self.limit = min(self.max_concurrency, self.limit + 1)
+
+    def _record_failure(self, error: Exception) -> None:
+        status_code = _status_code(error)
+        if status_code == 429:
+            self.rate_limited += 1
+            self._back_off(_retry_after_seconds(error))
+        elif status_code is not None and 400 <= status_code < 500:
+            # リクエスト自体の問題はプロバイダーの障害として扱わない
+            return
+
+        self.failed += 1
+        self._consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning(f"LLM circuit opened after {self._consecutive_failures} consecutive failures: {error}")
+            self.state = CircuitState.OPEN
+            self._opened_at = self._clock()
+
+    def _back_off(self, retry_after: Optional[float]) -> None:
+        """429受信時: 同時実行数を半減し、一定時間新規の呼び出しを止める"""
+        self.limit = max(1, self.limit // 2)
+        self._backoff_seconds = min(
+            LLM_BACKOFF_MAX_SECONDS,
+            max(LLM_BACKOFF_BASE_SECONDS, self._backoff_seconds * 2)
+        )
+        delay = retry_after if retry_after is not None else self._backoff_seconds
+        self._backoff_until = max(self._backoff_until, self._clock() + delay)
+        self._schedule_wake(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """同時実行数・待ち行列・遮断状態などの統計"""
+        queued = {priority.name.lower(): 0 for priority in LLMPriority}
+        for priority, _ in self._queue:
+            queued[LLMPriority(priority).name.lower()] += 1
+        return {
+            "state": self.state.value,
+            "in_flight": self.in_flight,
+            "limit": self.limit,
+            "max_concurrency": self.max_concurrency,
+            "queued": queued,
+            "backoff_remaining_seconds": max(0.0, self._backoff_until - self._clock()),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+# シングルトンインスタンス
+llm_governor = LLMGovernor()
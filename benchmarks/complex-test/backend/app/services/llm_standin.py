@@ -0,0 +1,310 @@
+"""
+OpenAI API のローカル代替（記録・再生）
+
+共有OpenAIクライアントのHTTPトランスポートを差し替え、ネットワークなしで
+チャット・ダッシュボード・組織分析の負荷試験を行えるようにします。
+
+LLM_STANDIN_MODE:
+    off:    通常どおりOpenAI APIを呼び出す（デフォルト）
+    record: OpenAI APIを呼び出し、応答を LLM_STANDIN_RECORDINGS_PATH（JSONL）に追記
+    replay: 記録した応答を返す（OpenAI APIは呼び出さない）
+
+再生時は同一リクエスト（モデル・メッセージ・応答形式）の記録を優先し、なければ
+同じシステムプロンプトの記録から1件を選びます。該当する記録がない場合は404を返し、
+呼び出し元の既存のフォールバックに切り替わります。
+応答までの遅延（LLM_STANDIN_LATENCY）とエラー率（LLM_STANDIN_ERROR_RATE）を指定でき、
+stream=True のリクエストには記録した応答を分割してSSEで返します。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+LLM_STANDIN_MODE = os.getenv("LLM_STANDIN_MODE", "off").lower()
+LLM_STANDIN_RECORDINGS_PATH = os.getenv("LLM_STANDIN_RECORDINGS_PATH", "llm_recordings.jsonl")
+
+# 応答までの遅延の分布（ミリ秒）
+#   fixed:<ms> / uniform:<最小ms>:<最大ms> / lognormal:<中央値ms>:<sigma>
+LLM_STANDIN_LATENCY = os.getenv("LLM_STANDIN_LATENCY", "lognormal:800:0.5")
+# エラーを返す割合（0.0 ~ 1.0）と、返すステータスコード（いずれかを無作為に選択）
+LLM_STANDIN_ERROR_RATE = float(os.getenv("LLM_STANDIN_ERROR_RATE", "0"))
+LLM_STANDIN_ERROR_STATUSES = os.getenv("LLM_STANDIN_ERROR_STATUSES", "429,500,503")
+# ストリーミング時のチャンク間隔（ミリ秒）と1チャンクの文字数
+LLM_STANDIN_STREAM_INTERVAL_MS = float(os.getenv("LLM_STANDIN_STREAM_INTERVAL_MS", "30"))
+LLM_STANDIN_STREAM_CHUNK_CHARS = int(os.getenv("LLM_STANDIN_STREAM_CHUNK_CHARS", "4"))
+# 乱数シード（指定すると遅延・エラー・記録の選択が再現可能になる）
+LLM_STANDIN_SEED = os.getenv("LLM_STANDIN_SEED")
+
+CHAT_COMPLETIONS_PATH = "/chat/completions"
+
+
+def request_key(body: Dict) -> str:
+    """同一リクエストの判定キー（モデル・メッセージ・応答形式。温度やstreamは含めない）"""
+    payload = {
+        "model": body.get("model"),
+        "messages": body.get("messages"),
+        "response_format": body.get("response_format"),
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def prompt_key(body: Dict) -> str:
+    """リクエストの種類の判定キー（システムプロンプト）"""
+    system = next(
+        (m.get("content", "") for m in body.get("messages", []) if m.get("role") == "system"),
+        ""
+    )
+    return hashlib.sha256(system.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class Recording:
+    """記録した応答1件"""
+    key: str
+    prompt: str
+    model: str
+    content: str
+
+
+class RecordingStore:
+    """記録ファイル（JSONL）の読み書き"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._by_key: Dict[str, Recording] = {}
+        self._by_prompt: Dict[str, List[Recording]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(Recording(**json.loads(line)))
+
+    def _index(self, recording: Recording) -> None:
+        self._by_key[recording.key] = recording
+        self._by_prompt[recording.prompt].append(recording)
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def find(self, body: Dict, rng: random.Random) -> Optional[Recording]:
+        """リクエストに対応する記録（同一リクエスト → 同じシステムプロンプトの順に検索）"""
+        recording = self._by_key.get(request_key(body))
+        if recording is not None:
+            return recording
+        candidates = self._by_prompt.get(prompt_key(body))
+        return rng.choice(candidates) if candidates else None
+
+    def append(self, recording: Recording) -> None:
+        """記録を追加してファイルに追記"""
+        with self._lock:
+            self._index(recording)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(recording), ensure_ascii=False) + "\n")
+
+
+class LatencyModel:
+    """応答までの遅延の分布"""
+
+    def __init__(self, spec: str):
+        kind, _, args = spec.partition(":")
+        params = [float(a) for a in args.split(":") if a]
+        if kind == "fixed" and len(params) == 1:
+            self._sample = lambda rng: params[0]
+        elif kind == "uniform" and len(params) == 2:
+            self._sample = lambda rng: rng.uniform(params[0], params[1])
+        elif kind == "lognormal" and len(params) == 2:
+            # 中央値と対数の標準偏差で指定
+            self._sample = lambda rng: rng.lognormvariate(0.0, params[1]) * params[0]
+        else:
+            raise ValueError(f"Invalid LLM_STANDIN_LATENCY: {spec}")
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        """遅延（秒）を1つ生成"""
+        return max(0.0, self._sample(rng)) / 1000
+
+
+def _completion(recording: Recording, model: str) -> Dict:
+    return {
+        "id": f"chatcmpl-standin-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model or recording.model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": recording.content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _error(status_code: int, message: str) -> httpx.Response:
+    headers = {"retry-after": "1"} if status_code == 429 else {}
+    return httpx.Response(
+        status_code,
+        headers=headers,
+        json={"error": {"message": message, "type": "standin_error", "code": None}},
+    )
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """記録した応答を返すトランスポート"""
+
+    def __init__(
+        self,
+        store: RecordingStore,
+        latency: LatencyModel,
+        error_rate: float = 0.0,
+        error_statuses: Tuple[int, ...] = (500,),
+        stream_interval: float = LLM_STANDIN_STREAM_INTERVAL_MS / 1000,
+        stream_chunk_chars: int = LLM_STANDIN_STREAM_CHUNK_CHARS,
+        seed: Optional[int] = None,
+    ):
+        self.store = store
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.stream_interval = stream_interval
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self._rng = random.Random(seed)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith(CHAT_COMPLETIONS_PATH):
+            return _error(404, f"LLM stand-in does not support {request.url.path}")
+
+        body = json.loads(await request.aread())
+        await asyncio.sleep(self.latency.sample(self._rng))
+
+        if self._rng.random() < self.error_rate:
+            return _error(self._rng.choice(self.error_statuses), "Injected error from LLM stand-in")
+
+        recording = self.store.find(body, self._rng)
+        if recording is None:
+            return _error(404, "No recorded response for this request")
+
+        completion = _completion(recording, body.get("model"))
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=self._stream(completion),
+            )
+        return httpx.Response(200, json=completion)
+
+    async def _stream(self, completion: Dict) -> AsyncIterator[bytes]:
+        """応答を分割してSSEのチャンクとして返す"""
+        content = completion["choices"][0]["message"]["content"] or ""
+        base = {k: completion[k] for k in ("id", "created", "model")}
+        for i in range(0, len(content), self.stream_chunk_chars):
+            if i:
+                await asyncio.sleep(self.stream_interval)
+            chunk = {
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": content[i:i + self.stream_chunk_chars]},
+                    "finish_reason": None,
+                }],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+        done = {
+            **base,
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(done)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
+
+def _content_from_sse(raw: bytes) -> str:
+    """ストリーミング応答（SSE）から本文を組み立てる"""
+    parts = []
+    for line in raw.decode("utf-8").splitlines():
+        if not line.startswith("data: ") or line == "data: [DONE]":
+            continue
+        for choice in json.loads(line[len("data: "):]).get("choices", []):
+            parts.append(choice.get("delta", {}).get("content") or "")
+    return "".join(parts)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """OpenAI APIの応答を記録するトランスポート"""
+
+    def __init__(self, store: RecordingStore, transport: httpx.AsyncBaseTransport):
+        self.store = store
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request_body = await request.aread()
+        response = await self.transport.handle_async_request(request)
+        if response.status_code != 200 or not request.url.path.endswith(CHAT_COMPLETIONS_PATH):
+            return response
+
+        # 記録のため応答を最後まで読み込む（ストリーミングも一括で返る）
+        raw = await response.aread()
+        await response.aclose()
+        try:
+            body = json.loads(request_body)
+            if body.get("stream"):
+                content = _content_from_sse(raw)
+            else:
+                content = json.loads(raw)["choices"][0]["message"]["content"] or ""
+            self.store.append(Recording(
+                key=request_key(body),
+                prompt=prompt_key(body),
+                model=body.get("model", ""),
+                content=content,
+            ))
+        except Exception as e:
+            logger.warning(f"Failed to record LLM response: {e}")
+
+        headers = [
+            (name, value) for name, value in response.headers.items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=raw, request=request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def create_standin_transport(
+    limits: Optional[httpx.Limits] = None
+) -> Optional[httpx.AsyncBaseTransport]:
+    """LLM_STANDIN_MODE に応じたトランスポートを生成（off の場合はNone）"""
+    if LLM_STANDIN_MODE == "off":
+        return None
+
+    store = RecordingStore(LLM_STANDIN_RECORDINGS_PATH)
+    if LLM_STANDIN_MODE == "record":
+        logger.info(f"Recording LLM responses to {LLM_STANDIN_RECORDINGS_PATH}")
+        return RecordingTransport(store, httpx.AsyncHTTPTransport(limits=limits or httpx.Limits()))
+    if LLM_STANDIN_MODE == "replay":
+        logger.warning(f"Replaying {len(store)} recorded LLM responses from {LLM_STANDIN_RECORDINGS_PATH}")
+        return ReplayTransport(
+            store,
+            LatencyModel(LLM_STANDIN_LATENCY),
+            error_rate=LLM_STANDIN_ERROR_RATE,
+            error_statuses=tuple(int(s) for s in LLM_STANDIN_ERROR_STATUSES.split(",") if s.strip()),
+            seed=int(LLM_STANDIN_SEED) if LLM_STANDIN_SEED else None,
+        )
+    raise ValueError(f"Invalid LLM_STANDIN_MODE: {LLM_STANDIN_MODE}")
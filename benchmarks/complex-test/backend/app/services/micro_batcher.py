@@ -0,0 +1,106 @@
+"""
+マイクロバッチ処理
+
+短時間（max_wait_seconds）に届いたリクエストを最大 max_batch_size 件までまとめて
+1回の処理（handler）に渡し、結果をそれぞれの呼び出し元に返します。
+Botの定期チェックなどで同時に多数のメッセージが届いた場合に、
+LLMへのリクエスト数とレート制限への負荷を減らすために使用します。
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """一定時間・一定件数ごとにリクエストをまとめて処理"""
+
+    def __init__(
+        self,
+        handler: Callable[[List[T]], Awaitable[List[R]]],
+        max_batch_size: int,
+        max_wait_seconds: float,
+    ):
+        """
+        Args:
+            handler: まとめたリクエストを処理し、同じ順序で結果を返す非同期関数
+            max_batch_size: 1回にまとめる最大件数（到達した時点で即座に処理）
+            max_wait_seconds: 最初のリクエストから処理開始までの最大待機時間（秒）
+        """
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+
+        self._pending: List[Tuple[T, "asyncio.Future[R]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+
+    async def submit(self, item: T) -> R:
+        """リクエストを登録し、バッチ処理の結果を待つ"""
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[R]" = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """待機中のリクエストをまとめて処理を開始"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            # 上限を超えた分は次のバッチとして待機
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_seconds, self._flush)
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, "asyncio.Future[R]"]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Micro-batch of {len(batch)} items failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # 呼び出し元がキャンセル済みの場合は結果を捨てる
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        """バッチ数・平均バッチサイズなどの統計"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0,
+            "failures": self.failures,
+        }
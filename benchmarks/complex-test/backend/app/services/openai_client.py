@@ -0,0 +1,76 @@
+"""
+共有OpenAIクライアント
+
+AsyncOpenAI クライアントをプロセス内で1つだけ生成し、HTTPコネクションプールを
+全リクエストで共有します。LLM呼び出し中もイベントループをブロックしないため、
+ワーカーあたりのチャット処理は同時実行数に応じてスケールします。
+
+openai パッケージは起動時間に影響するため、クライアントは初回利用時に生成し、
+アプリケーション終了時（lifespan）に close_openai_client() でコネクションを閉じます。
+
+LLM_STANDIN_MODE を指定すると、応答の記録・再生を行うローカル代替に切り替わります
+（llm_standin を参照）。
+"""
+import os
+from typing import Optional, TYPE_CHECKING
+
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+load_dotenv()
+
+# 1リクエストあたりのタイムアウト（秒）。接続確立は短く打ち切る
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+
+# SDK内での再試行回数（接続エラー・429・5xx）
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# コネクションプール設定
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+_client: Optional["AsyncOpenAI"] = None
+
+
+def get_openai_client() -> "AsyncOpenAI":
+    """共有AsyncOpenAIクライアントを取得（未生成なら生成）"""
+    global _client
+    if _client is None:
+        import httpx
+        from openai import AsyncOpenAI
+        from app.services.llm_standin import LLM_STANDIN_MODE, create_standin_transport
+
+        timeout = httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS)
+        limits = httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        api_key = os.getenv("OPENAI_API_KEY")
+        if LLM_STANDIN_MODE == "replay" and not api_key:
+            # 再生時はAPIキーを使用しない
+            api_key = "llm-standin"
+
+        _client = AsyncOpenAI(
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                timeout=timeout,
+                limits=limits,
+                transport=create_standin_transport(limits),
+            ),
+        )
+    return _client
+
+
+async def close_openai_client() -> None:
+    """共有クライアントのコネクションプールを閉じる（アプリケーション終了時）"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
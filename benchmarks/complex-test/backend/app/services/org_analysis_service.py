@@ -8,21 +8,19 @@ from app.db.models import User, StressCheck, Department, UserRole
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Any, Literal
 import os
-import openai
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+
+# OpenAIクライアントは全サービスで共有し、ReportLab は初回利用時に読み込む
+from app.services.openai_client import get_openai_client
+from app.services.llm_governor import LLMPriority, llm_governor
 
 
 class OrgAnalysisService:
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.openai_client = openai.AsyncOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+
+    @property
+    def openai_client(self):
+        return get_openai_client()
 
     async def get_org_analysis(self) -> Dict[str, Any]:
         """組織全体の分析データを取得"""
@@ -227,7 +225,9 @@ class OrgAnalysisService:
 """
 
         try:
-            response = await self.openai_client.chat.completions.create(
+            response = await llm_governor.call(
+                LLMPriority.BATCH,
+                self.openai_client.chat.completions.create,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "あなたは組織のメンタルヘルス専門家です。データに基づいた具体的な分析と提案を行います。"},
@@ -263,6 +263,11 @@ class OrgAnalysisService:
     async def generate_pdf_report(self) -> str:
         """組織分析PDFレポートを生成"""
 
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
         # 分析データを取得
         data = await self.get_org_analysis()
 
@@ -416,7 +421,9 @@ class OrgAnalysisService:
         prompt = f"{dept.name}のストレススコアは{avg_score:.1f}で、高リスク者が{high_risk_count}名います。この部署への具体的なアドバイスを1-2文で述べてください。"
 
         try:
-            response = await self.openai_client.chat.completions.create(
+            response = await llm_governor.call(
+                LLMPriority.BATCH,
+                self.openai_client.chat.completions.create,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "組織のメンタルヘルス専門家として回答してください。"},
@@ -1,7 +1,12 @@
 """PDF生成サービス"""
-from io import BytesIO
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date
-from typing import List, Dict
+from typing import List, Dict, Iterator
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -10,18 +15,49 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 
-pdfmetrics.registerFont(UnicodeCIDFont('HeiseiMin-W3'))
-pdfmetrics.registerFont(UnicodeCIDFont('HeiseiKakuGo-W5'))
+# 出力バッファ設定（閾値を超えたPDFはディスクに退避し、チャンク単位で送信）
+PDF_SPOOL_MAX_BYTES = int(os.getenv("PDF_SPOOL_MAX_BYTES", str(1024 * 1024)))
+PDF_STREAM_CHUNK_BYTES = int(os.getenv("PDF_STREAM_CHUNK_BYTES", str(64 * 1024)))
+
+# 部署別レポート一括生成の並列数（ReportLabはCPU処理のためプロセスプールで描画）
+REPORT_RENDER_MAX_WORKERS = int(os.getenv("REPORT_RENDER_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+_render_executor = None
+
 FONT_MINCHO = 'HeiseiMin-W3'
 FONT_GOTHIC = 'HeiseiKakuGo-W5'
+_fonts_registered = False
+
+def register_japanese_fonts():
+    """CIDフォントを初回利用時に登録（起動時のインポートコストを避ける）"""
+    global _fonts_registered
+    if _fonts_registered: return
+    pdfmetrics.registerFont(UnicodeCIDFont(FONT_MINCHO))
+    pdfmetrics.registerFont(UnicodeCIDFont(FONT_GOTHIC))
+    _fonts_registered = True
 
 def get_japanese_styles():
+    register_japanese_fonts()
     styles = getSampleStyleSheet()
     styles.add(ParagraphStyle(name='JapaneseTitle', fontName=FONT_GOTHIC, fontSize=18, leading=24, alignment=1, spaceAfter=20))
     styles.add(ParagraphStyle(name='JapaneseHeading', fontName=FONT_GOTHIC, fontSize=14, leading=18, spaceBefore=12, spaceAfter=8))
     styles.add(ParagraphStyle(name='JapaneseBody', fontName=FONT_MINCHO, fontSize=10, leading=16, spaceAfter=6))
     return styles
 
+def create_output_buffer():
+    """PDF出力先を作成（PDF_SPOOL_MAX_BYTESを超えると一時ファイルに退避）"""
+    return tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES, mode="w+b")
+
+def iter_pdf_chunks(buffer, chunk_size: int = PDF_STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """PDFバッファを先頭からチャンク単位で読み出し、読み終えたらクローズ"""
+    try:
+        buffer.seek(0)
+        while True:
+            chunk = buffer.read(chunk_size)
+            if not chunk: break
+            yield chunk
+    finally:
+        buffer.close()
+
 def create_header(title, subtitle=None):
     styles = get_japanese_styles()
     elements = [Paragraph(title, styles['JapaneseTitle'])]
@@ -38,7 +74,7 @@ def stress_level(score, max_score=4.0):
 
 class StressCheckPDFGenerator:
     def generate_individual_report(self, user_name, period, total_score, is_high_stress, job_stress_score, stress_reaction_score, support_score, satisfaction_score, answers=None):
-        buffer = BytesIO()
+        buffer = create_output_buffer()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=20*mm, leftMargin=20*mm, topMargin=20*mm, bottomMargin=20*mm)
         styles = get_japanese_styles()
         elements = create_header("ストレスチェック結果報告書", f"実施期間: {period.strftime('%Y年%m月')}")
@@ -57,7 +93,7 @@ class StressCheckPDFGenerator:
 
 class GroupAnalysisPDFGenerator:
     def generate_company_report(self, company_name, period, total_employees, high_stress_count, completion_rate, average_stress_score, department_stats, recommendations):
-        buffer = BytesIO()
+        buffer = create_output_buffer()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=20*mm, leftMargin=20*mm, topMargin=20*mm, bottomMargin=20*mm)
         styles = get_japanese_styles()
         elements = create_header("ストレスチェック集団分析報告書", f"{company_name} | 対象期間: {period.strftime('%Y年%m月')}")
@@ -87,8 +123,17 @@ class GroupAnalysisPDFGenerator:
 
 class DepartmentReportPDFGenerator:
     def generate_department_report(self, company_name, department_name, period, employee_count, high_stress_count, average_score, job_stress_avg, stress_reaction_avg, support_avg, satisfaction_avg, trend_data=None, comparison_data=None):
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=20*mm, leftMargin=20*mm, topMargin=20*mm, bottomMargin=20*mm)
+        buffer = create_output_buffer()
+        self.write_department_report(buffer, company_name, department_name, period, employee_count, high_stress_count, average_score, job_stress_avg, stress_reaction_avg, support_avg, satisfaction_avg)
+        buffer.seek(0)
+        return buffer
+
+    def write_department_report(self, output, company_name, department_name, period, employee_count, high_stress_count, average_score, job_stress_avg, stress_reaction_avg, support_avg, satisfaction_avg, trend_data=None, comparison_data=None):
+        """部署別レポートを指定の出力先（ファイルパス・ファイルオブジェクト）に描画"""
+        doc = SimpleDocTemplate(output, pagesize=A4, rightMargin=20*mm, leftMargin=20*mm, topMargin=20*mm, bottomMargin=20*mm)
+        doc.build(self._build_elements(company_name, department_name, period, employee_count, high_stress_count, average_score, job_stress_avg, stress_reaction_avg, support_avg, satisfaction_avg))
+
+    def _build_elements(self, company_name, department_name, period, employee_count, high_stress_count, average_score, job_stress_avg, stress_reaction_avg, support_avg, satisfaction_avg, trend_data=None, comparison_data=None):
         styles = get_japanese_styles()
         elements = create_header("部署別ストレスチェック分析報告書", f"{company_name} - {department_name} | {period.strftime('%Y年%m月')}")
         elements.append(Paragraph("1. 部署サマリー", styles['JapaneseHeading']))
@@ -107,9 +152,99 @@ class DepartmentReportPDFGenerator:
             for i in issues: elements.append(Paragraph(f"- {i}", styles['JapaneseBody']))
         else: elements.append(Paragraph("特に顕著な課題は見られません。", styles['JapaneseBody']))
         elements.extend([Spacer(1, 15*mm), Paragraph(f"作成日: {datetime.now().strftime('%Y年%m月%d日 %H:%M')} | StressAgent Pro", styles['JapaneseBody'])])
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
+        return elements
+
+def render_department_report_file(params: Dict) -> str:
+    """部署別レポートを一時ファイルに描画してパスを返す（ワーカープロセスで実行）"""
+    with tempfile.NamedTemporaryFile(prefix="department_report_", suffix=".pdf", delete=False) as f:
+        try:
+            DepartmentReportPDFGenerator().write_department_report(f, **params)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    return f.name
+
+def remove_rendered_files(paths: List[str]) -> None:
+    """描画済みの一時ファイルを削除"""
+    for path in paths:
+        try: os.remove(path)
+        except FileNotFoundError: pass
+
+def _remove_late_result(future) -> None:
+    """キャンセル後に描画を終えたワーカーの一時ファイルを削除"""
+    if not future.cancelled() and future.exception() is None:
+        remove_rendered_files([future.result()])
+
+def _get_render_executor() -> ProcessPoolExecutor:
+    """PDF描画用プロセスプールを初回利用時に生成"""
+    global _render_executor
+    if _render_executor is None:
+        _render_executor = ProcessPoolExecutor(max_workers=REPORT_RENDER_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _render_executor
+
+def shutdown_render_executor() -> None:
+    """PDF描画用プロセスプールを停止（アプリケーション終了時）"""
+    global _render_executor
+    if _render_executor is not None:
+        _render_executor.shutdown(cancel_futures=True)
+        _render_executor = None
+
+async def render_department_reports(reports: List[Dict]) -> List[str]:
+    """
+    部署別レポートをプロセスプールで並列描画し、一時ファイルのパスを部署の順に返す
+
+    各ワーカーが一時ファイルに直接書き出すため、PDFの内容は親プロセスのメモリを経由しません。
+    返したファイルは呼び出し元で remove_rendered_files により削除してください。
+    """
+    executor = _get_render_executor()
+    futures = [executor.submit(render_department_report_file, params) for params in reports]
+    try:
+        results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=True)
+    except asyncio.CancelledError:
+        for future in futures: future.add_done_callback(_remove_late_result)
+        raise
+    paths = [r for r in results if isinstance(r, str)]
+    error = next((r for r in results if isinstance(r, BaseException)), None)
+    if error is not None:
+        remove_rendered_files(paths)
+        raise error
+    return paths
+
+def merge_pdf_files(paths: List[str]):
+    """PDFファイルを順に結合して出力バッファに書き出す"""
+    from pypdf import PdfWriter
+    buffer = create_output_buffer()
+    writer = PdfWriter()
+    for path in paths: writer.append(path)
+    writer.write(buffer)
+    writer.close()
+    buffer.seek(0)
+    return buffer
+
+def build_zip_archive(files: List[tuple]):
+    """(アーカイブ内のファイル名, ファイルパス) のリストからZIPを作成（ファイルから順に読み込む）"""
+    buffer = create_output_buffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, path in files: archive.write(path, name)
+    buffer.seek(0)
+    return buffer
+
+async def render_department_pack(reports: List[Dict]):
+    """部署別レポートを並列描画し、1つのPDFに結合した出力バッファを返す"""
+    paths = await render_department_reports(reports)
+    try:
+        return await asyncio.to_thread(merge_pdf_files, paths)
+    finally:
+        remove_rendered_files(paths)
+
+async def render_department_archive(reports: List[Dict], names: List[str]):
+    """部署別レポートを並列描画し、names のファイル名でZIPにまとめた出力バッファを返す"""
+    paths = await render_department_reports(reports)
+    try:
+        return await asyncio.to_thread(build_zip_archive, list(zip(names, paths)))
+    finally:
+        remove_rendered_files(paths)
 
 def get_stress_check_pdf_generator(): return StressCheckPDFGenerator()
 def get_group_analysis_pdf_generator(): return GroupAnalysisPDFGenerator()
@@ -0,0 +1,140 @@
+"""
+認証済みユーザー（プリンシパル）キャッシュ
+
+get_current_user はすべてのエンドポイントで呼ばれるため、ユーザーIDごとに
+軽量なプリンシパル（id, company_id, department_id, role, email）を
+プロセス内のTTL付きLRUキャッシュに保持し、usersテーブルへの問い合わせを減らします。
+
+ORM経由でユーザーが更新・削除されると、セッションのイベントで自動的に無効化します。
+一括UPDATEや他プロセスでの更新はTTL（PRINCIPAL_CACHE_TTL_SECONDS）経過後に反映されます。
+"""
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.models import User, UserRole
+
+PRINCIPAL_CACHE_ENABLED = os.getenv("PRINCIPAL_CACHE_ENABLED", "true").lower() == "true"
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
+# コミット時に無効化するユーザーIDを保持するsession.infoのキー
+_PENDING_INVALIDATIONS_KEY = "principal_cache_invalidations"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """認証済みユーザーの軽量な表現（ルーターが参照する属性のみ）"""
+    id: uuid.UUID
+    company_id: uuid.UUID
+    department_id: Optional[uuid.UUID]
+    role: UserRole
+    email: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            company_id=user.company_id,
+            department_id=user.department_id,
+            role=user.role,
+            email=user.email,
+        )
+
+
+class PrincipalCache:
+    """TTL付きLRUキャッシュ"""
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS, max_size: int = PRINCIPAL_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[uuid.UUID, Tuple[float, Principal]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: uuid.UUID) -> Optional[Principal]:
+        """キャッシュからプリンシパルを取得（期限切れ・未登録ならNone）"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return principal
+
+    def set(self, principal: Principal) -> None:
+        """プリンシパルを登録（上限を超えた場合は最も古いものを破棄）"""
+        self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """ユーザーのキャッシュを無効化（更新・削除・ロール変更時）"""
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """すべてのキャッシュを破棄"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """ヒット率などの統計"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# シングルトンインスタンス
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_users(session: Session, flush_context) -> None:
+    """更新・削除されたユーザーを無効化し、コミット後にも再度無効化する"""
+    user_ids = {
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    if not user_ids:
+        return
+
+    # フラッシュからコミットまでの間に古い値が再キャッシュされた場合に備える
+    session.info.setdefault(_PENDING_INVALIDATIONS_KEY, set()).update(user_ids)
+    for user_id in user_ids:
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_INVALIDATIONS_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS_KEY, None)
@@ -0,0 +1,243 @@
+"""
+レート制限サービス
+
+全ワーカーで共有するバックエンド（DBテーブル）にカウンターを保持し、
+スライディングウィンドウカウンター方式で判定します。
+
+キーごとに「現在の固定窓」と「1つ前の固定窓」の回数のみを保持し、
+前の窓の回数を経過時間で按分して直近window秒間の回数を推定します
+（リクエストごとの記録を保持しないため、保存量・クエリ数は一定）。
+
+バックエンドは RATE_LIMIT_BACKEND で切り替えます:
+    database: rate_limit_counters テーブル（デフォルト、複数ワーカーで共有）
+    memory:   プロセス内（開発・テスト用）
+"""
+import logging
+import math
+from abc import ABC, abstractmethod
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import delete, select
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import RateLimitCounter
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "database")
+
+# 期限切れカウンターを削除する間隔（秒）
+RATE_LIMIT_CLEANUP_INTERVAL_SECONDS = int(os.getenv("RATE_LIMIT_CLEANUP_INTERVAL_SECONDS", "300"))
+
+# カウンターを保持する最大期間（秒）。これより長いウィンドウは使用しない
+RATE_LIMIT_MAX_WINDOW_SECONDS = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """レート制限の判定結果"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int  # 次に許可されるまでの目安（秒）
+
+
+class RateLimitBackend(ABC):
+    """レート制限カウンターの保存先"""
+
+    @abstractmethod
+    async def increment(self, key: str, window_start: int, previous_window_start: int) -> Tuple[int, int]:
+        """
+        現在の窓のカウンターを1増やし、(現在の窓の回数, 前の窓の回数) を返す
+        """
+
+    @abstractmethod
+    async def cleanup(self, before: int) -> None:
+        """window_start が before より前のカウンターを削除"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """プロセス内のカウンター（開発・テスト用。ワーカー間で共有されない）"""
+
+    def __init__(self):
+        self._counters: Dict[Tuple[str, int], int] = {}
+
+    async def increment(self, key: str, window_start: int, previous_window_start: int) -> Tuple[int, int]:
+        current = self._counters.get((key, window_start), 0) + 1
+        self._counters[(key, window_start)] = current
+        return current, self._counters.get((key, previous_window_start), 0)
+
+    async def cleanup(self, before: int) -> None:
+        for counter_key in [k for k in self._counters if k[1] < before]:
+            del self._counters[counter_key]
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """rate_limit_counters テーブルのカウンター（全ワーカーで共有）"""
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self._session_factory = session_factory
+
+    @staticmethod
+    def _upsert(dialect_name: str):
+        """INSERT ... ON CONFLICT DO UPDATE に対応したinsert関数"""
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"Unsupported rate limit database: {dialect_name}")
+        return insert
+
+    async def increment(self, key: str, window_start: int, previous_window_start: int) -> Tuple[int, int]:
+        # リクエストのトランザクションとは独立したセッションで即時にコミットする
+        async with self._session_factory() as db:
+            insert = self._upsert(db.get_bind().dialect.name)
+            statement = insert(RateLimitCounter).values(key=key, window_start=window_start, count=1)
+            statement = statement.on_conflict_do_update(
+                index_elements=[RateLimitCounter.key, RateLimitCounter.window_start],
+                set_={"count": RateLimitCounter.count + 1},
+            ).returning(RateLimitCounter.count)
+            current = (await db.execute(statement)).scalar_one()
+
+            previous = (await db.execute(
+                select(RateLimitCounter.count).where(
+                    RateLimitCounter.key == key,
+                    RateLimitCounter.window_start == previous_window_start,
+                )
+            )).scalar_one_or_none() or 0
+
+            await db.commit()
+        return current, previous
+
+    async def cleanup(self, before: int) -> None:
+        async with self._session_factory() as db:
+            await db.execute(delete(RateLimitCounter).where(RateLimitCounter.window_start < before))
+            await db.commit()
+
+
+class RateLimiter:
+    """スライディングウィンドウカウンター方式のレート制限"""
+
+    def __init__(self, backend: RateLimitBackend, clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self._clock = clock
+        self._last_cleanup = 0.0
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        """
+        リクエストを1回記録し、制限内かを判定
+
+        Args:
+            key: 制限単位のキー（"chat:<user_id>" など）
+            limit: window_seconds秒あたりの上限回数
+            window_seconds: ウィンドウ幅（秒）
+
+        Returns:
+            判定結果
+        """
+        now = self._clock()
+        window_start = int(now // window_seconds) * window_seconds
+        previous_window_start = window_start - window_seconds
+        elapsed_ratio = (now - window_start) / window_seconds
+
+        current, previous = await self.backend.increment(key, window_start, previous_window_start)
+
+        # 前の窓の回数を、現在のウィンドウに重なっている割合で按分
+        estimated = previous * (1 - elapsed_ratio) + current
+        if estimated <= limit:
+            return RateLimitResult(
+                allowed=True,
+                limit=limit,
+                remaining=max(0, int(limit - estimated)),
+                retry_after=0,
+            )
+
+        # 前の窓の寄与が減って上限内に収まるまでの時間（前の窓がなければ次の窓まで）
+        if previous > 0 and current <= limit:
+            retry_after = (estimated - limit) / previous * window_seconds
+        else:
+            retry_after = window_start + window_seconds - now
+        return RateLimitResult(
+            allowed=False,
+            limit=limit,
+            remaining=0,
+            retry_after=max(1, math.ceil(retry_after)),
+        )
+
+    async def cleanup_if_due(self) -> None:
+        """一定間隔ごとに期限切れのカウンターを削除"""
+        now = self._clock()
+        if now - self._last_cleanup < RATE_LIMIT_CLEANUP_INTERVAL_SECONDS:
+            return
+        self._last_cleanup = now
+        await self.backend.cleanup(int(now) - 2 * RATE_LIMIT_MAX_WINDOW_SECONDS)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """レート制限のシングルトンを取得（RATE_LIMIT_BACKENDに応じて初回に生成）"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        if RATE_LIMIT_BACKEND == "memory":
+            backend: RateLimitBackend = MemoryRateLimitBackend()
+        elif RATE_LIMIT_BACKEND == "database":
+            backend = DatabaseRateLimitBackend()
+        else:
+            raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}")
+        _rate_limiter = RateLimiter(backend)
+    return _rate_limiter
+
+
+async def enforce_rate_limit(key: str, limit: int, window_seconds: int, detail: str) -> None:
+    """
+    レート制限を適用し、超過時は429を送出
+
+    バックエンドの障害時はリクエストを許可します（フェイルオープン）。
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    limiter = get_rate_limiter()
+    try:
+        result = await limiter.hit(key, limit, window_seconds)
+        await limiter.cleanup_if_due()
+    except Exception as e:
+        logger.warning(f"Rate limit backend unavailable, allowing request: {e}")
+        return
+
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(result.retry_after)},
+        )
+
+
+def get_client_ip(request: Request) -> str:
+    """クライアントのIPアドレスを取得"""
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(scope: str, limit: int, window_seconds: int) -> Callable:
+    """
+    クライアントIP単位のレート制限を行う依存関数を生成
+
+    使い方:
+        @router.post("/login", dependencies=[Depends(rate_limit("auth:login", 10, 60))])
+    """
+    async def _dependency(request: Request) -> None:
+        await enforce_rate_limit(
+            f"{scope}:{get_client_ip(request)}",
+            limit,
+            window_seconds,
+            "リクエスト回数の上限に達しました。しばらくしてから再度お試しください",
+        )
+    return _dependency
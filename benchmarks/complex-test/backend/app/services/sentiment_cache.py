@@ -0,0 +1,190 @@
+"""
+感情分析結果キャッシュ
+
+Botのメッセージは「疲れた」「大丈夫です」やボタンの回答など短く重複しやすいため、
+PII除去・正規化済みのテキストをキーに分析結果を再利用し、LLM呼び出しを減らします。
+
+2段構成:
+    メモリ: プロセス内のTTL付きLRU（常に有効）
+    永続:   sentiment_cache_entries テーブル（SENTIMENT_CACHE_PERSISTENT=true の場合。
+            全ワーカーで共有され、再起動後も有効）
+
+会話履歴に依存する分析や、長文（SENTIMENT_CACHE_MAX_TEXT_LENGTH超）はキャッシュしません。
+キーにはモデル名とプロンプトのダイジェストを含めるため、プロンプト変更時は自動的に無効になります。
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, select
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import SentimentCacheEntry
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_CACHE_ENABLED = os.getenv("SENTIMENT_CACHE_ENABLED", "true").lower() == "true"
+SENTIMENT_CACHE_TTL_SECONDS = int(os.getenv("SENTIMENT_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+SENTIMENT_CACHE_MAX_SIZE = int(os.getenv("SENTIMENT_CACHE_MAX_SIZE", "5000"))
+SENTIMENT_CACHE_MAX_TEXT_LENGTH = int(os.getenv("SENTIMENT_CACHE_MAX_TEXT_LENGTH", "200"))
+SENTIMENT_CACHE_PERSISTENT = os.getenv("SENTIMENT_CACHE_PERSISTENT", "false").lower() == "true"
+
+# 期限切れの永続エントリを削除する間隔（秒）
+SENTIMENT_CACHE_CLEANUP_INTERVAL_SECONDS = 60 * 60
+
+_WHITESPACE = re.compile(r"\s+")
+# 末尾の句読点・記号（「疲れた。」「疲れた！！」を「疲れた」と同一視）
+_TRAILING_PUNCTUATION = re.compile(r"[。．.、,!！?？~〜…・♪]+$")
+
+
+def normalize_text(text: str) -> str:
+    """
+    キャッシュキー用にテキストを正規化
+
+    NFKC正規化（全角英数・半角カナの統一）、小文字化、空白の圧縮、末尾の句読点の除去を行います。
+    """
+    normalized = unicodedata.normalize("NFKC", text).lower()
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return _TRAILING_PUNCTUATION.sub("", normalized)
+
+
+class SentimentCache:
+    """感情分析結果のTTL付きLRUキャッシュ（オプションで永続テーブルを併用）"""
+
+    def __init__(
+        self,
+        namespace: str = "",
+        ttl_seconds: int = SENTIMENT_CACHE_TTL_SECONDS,
+        max_size: int = SENTIMENT_CACHE_MAX_SIZE,
+        persistent: bool = SENTIMENT_CACHE_PERSISTENT,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.persistent = persistent
+        self._session_factory = session_factory
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._last_cleanup = 0.0
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, cleaned_text: str) -> Optional[str]:
+        """PII除去済みテキストからキャッシュキーを生成（キャッシュ対象外ならNone）"""
+        normalized = normalize_text(cleaned_text)
+        if not normalized or len(normalized) > SENTIMENT_CACHE_MAX_TEXT_LENGTH:
+            return None
+        return hashlib.sha256(f"{self.namespace}\n{normalized}".encode("utf-8")).hexdigest()
+
+    async def get(self, cleaned_text: str) -> Optional[Dict]:
+        """キャッシュから分析結果を取得（未登録・期限切れ・対象外ならNone）"""
+        key = self.key(cleaned_text)
+        if key is None:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return copy.deepcopy(result)
+            del self._entries[key]
+
+        if self.persistent:
+            result = await self._load(key)
+            if result is not None:
+                self._remember(key, result)
+                self.persistent_hits += 1
+                return copy.deepcopy(result)
+
+        self.misses += 1
+        return None
+
+    async def set(self, cleaned_text: str, result: Dict) -> None:
+        """分析結果を登録"""
+        key = self.key(cleaned_text)
+        if key is None:
+            return
+
+        self._remember(key, copy.deepcopy(result))
+        if self.persistent:
+            await self._store(key, result)
+
+    def _remember(self, key: str, result: Dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _load(self, key: str) -> Optional[Dict]:
+        """永続テーブルから取得（障害時はキャッシュなしとして扱う）"""
+        try:
+            async with self._session_factory() as db:
+                stored = (await db.execute(
+                    select(SentimentCacheEntry.result).where(
+                        SentimentCacheEntry.key == key,
+                        SentimentCacheEntry.expires_at > int(time.time()),
+                    )
+                )).scalar_one_or_none()
+        except Exception as e:
+            logger.warning(f"Sentiment cache lookup failed: {e}")
+            return None
+        return json.loads(stored) if stored is not None else None
+
+    async def _store(self, key: str, result: Dict) -> None:
+        """永続テーブルに登録（障害時は登録しない）"""
+        now = int(time.time())
+        try:
+            async with self._session_factory() as db:
+                dialect_name = db.get_bind().dialect.name
+                if dialect_name == "postgresql":
+                    from sqlalchemy.dialects.postgresql import insert
+                elif dialect_name == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    raise RuntimeError(f"Unsupported sentiment cache database: {dialect_name}")
+
+                values = {"result": json.dumps(result, ensure_ascii=False), "expires_at": now + self.ttl_seconds}
+                await db.execute(
+                    insert(SentimentCacheEntry)
+                    .values(key=key, **values)
+                    .on_conflict_do_update(index_elements=[SentimentCacheEntry.key], set_=values)
+                )
+                if now - self._last_cleanup >= SENTIMENT_CACHE_CLEANUP_INTERVAL_SECONDS:
+                    self._last_cleanup = now
+                    await db.execute(delete(SentimentCacheEntry).where(SentimentCacheEntry.expires_at <= now))
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Sentiment cache store failed: {e}")
+
+    def clear(self) -> None:
+        """メモリ上のキャッシュを破棄"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """ヒット率などの統計"""
+        hits = self.memory_hits + self.persistent_hits
+        lookups = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self.persistent,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_hit_rate": self.memory_hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
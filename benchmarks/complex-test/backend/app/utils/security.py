@@ -2,8 +2,13 @@
 セキュリティ関連ユーティリティ（JWT、パスワードハッシュ）
 """
 import re
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import os
@@ -23,8 +28,18 @@ ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("JWT_REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
+# 復号済みトークンのキャッシュ（同じトークンの署名検証を繰り返さない）
+JWT_DECODE_CACHE_ENABLED = os.getenv("JWT_DECODE_CACHE_ENABLED", "true").lower() == "true"
+JWT_DECODE_CACHE_MAX_SIZE = int(os.getenv("JWT_DECODE_CACHE_MAX_SIZE", "10000"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# パスワードハッシュ用ワーカー数（bcryptはGILを解放するためスレッドで並列化できる）
+# 一括処理（CSVインポート）用
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# ログイン・登録用（一括処理の待ち行列に並ばないよう専用のプールで実行）
+PASSWORD_AUTH_HASH_WORKERS = int(os.getenv("PASSWORD_AUTH_HASH_WORKERS", str(os.cpu_count() or 1)))
+
 # パスワード複雑性要件
 PASSWORD_MIN_LENGTH = 8
 PASSWORD_REQUIRE_UPPERCASE = True
@@ -68,6 +83,109 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHashPool:
+    """
+    パスワードハッシュ処理用の有界スレッドプール
+
+    同時実行数はワーカー数で制限され、超過分はプールのキューで待機します。
+    キュー待ち時間・実行時間を計測し、stats()で参照できます。
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.completed = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """スレッドプールを取得（初回利用時に生成）"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.name
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """ワーカースレッドで実行し、キュー待ち時間と実行時間を記録"""
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+
+        def _timed_call():
+            started_at = time.perf_counter()
+            result = func(*args)
+            return result, started_at - submitted_at, time.perf_counter() - started_at
+
+        self.pending += 1
+        try:
+            result, queue_seconds, run_seconds = await loop.run_in_executor(
+                self._get_executor(), _timed_call
+            )
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        self.total_queue_seconds += queue_seconds
+        self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+        self.total_run_seconds += run_seconds
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """キュー待ち時間などの統計"""
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "completed": self.completed,
+            "avg_queue_ms": self.total_queue_seconds / self.completed * 1000 if self.completed else 0.0,
+            "max_queue_ms": self.max_queue_seconds * 1000,
+            "avg_run_ms": self.total_run_seconds / self.completed * 1000 if self.completed else 0.0,
+        }
+
+
+bulk_hash_pool = PasswordHashPool("password-hash", PASSWORD_HASH_WORKERS)
+auth_hash_pool = PasswordHashPool("password-auth", PASSWORD_AUTH_HASH_WORKERS)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """パスワード検証（ワーカースレッドで実行し、イベントループをブロックしない）"""
+    return await auth_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """パスワードハッシュ化（ワーカースレッドで実行し、イベントループをブロックしない）"""
+    return await auth_hash_pool.run(get_password_hash, password)
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    複数のパスワードをワーカースレッドで並列にハッシュ化
+
+    イベントループをブロックせず、スループットはCPUコア数に応じて向上します。
+
+    Args:
+        passwords: 平文パスワードのリスト
+
+    Returns:
+        入力と同じ順序のハッシュ値のリスト
+    """
+    return list(await asyncio.gather(*(
+        bulk_hash_pool.run(get_password_hash, password)
+        for password in passwords
+    )))
+
+
+def password_hash_stats() -> Dict[str, Dict[str, float]]:
+    """パスワードハッシュ用プールの統計"""
+    return {
+        "auth": auth_hash_pool.stats(),
+        "bulk": bulk_hash_pool.stats(),
+    }
+
+
 def _create_token(data: dict, token_type: str, expires_delta: Optional[timedelta] = None) -> str:
     """JWTトークン作成"""
     to_encode = data.copy()
@@ -93,10 +211,95 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     return _create_token(data, "refresh", expires_delta)
 
 
+class TokenDecodeCache:
+    """
+    復号済みJWTクレームのLRUキャッシュ
+
+    キーはトークンのSHA-256ダイジェスト（トークン自体は保持しない）。
+    署名検証に成功したトークンのみを登録し、各エントリはクレームの exp で失効します。
+    exp を持たないトークンや nbf 付きのトークンはキャッシュしません。
+    """
+
+    def __init__(self, max_size: int = JWT_DECODE_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """キャッシュからクレームを取得（期限切れ・未登録ならNone）"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(payload)
+
+    def set(self, token: str, payload: dict) -> None:
+        """検証済みのクレームを登録（上限を超えた場合は最も古いものを破棄）"""
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)) or "nbf" in payload:
+            return
+
+        key = self._key(token)
+        self._entries[key] = (float(expires_at), dict(payload))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """すべてのキャッシュを破棄"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """ヒット率などの統計"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+# シングルトンインスタンス
+token_decode_cache = TokenDecodeCache()
+
+
+def _verify_token(token: str) -> dict:
+    """JWTトークンの署名と有効期限を検証（キャッシュ済みなら検証を省略）"""
+    if JWT_DECODE_CACHE_ENABLED:
+        payload = token_decode_cache.get(token)
+        if payload is not None:
+            return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if JWT_DECODE_CACHE_ENABLED:
+        token_decode_cache.set(token, payload)
+    return payload
+
+
 def _decode_token(token: str, expected_type: str) -> Optional[dict]:
     """JWTトークン復号化"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _verify_token(token)
         if payload.get("type") != expected_type:
             return None
         return payload
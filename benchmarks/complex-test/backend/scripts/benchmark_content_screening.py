@@ -0,0 +1,83 @@
+"""
+不適切コンテンツ判定ベンチマーク
+
+無作為に生成した判定語（デフォルト5,000語）と1,000文字のメッセージで、
+判定語ごとの部分文字列検索（従来の実装）と Aho-Corasick オートマトンの
+スループットを比較します。メッセージは判定語を含まない（全文を走査する）最悪ケースです。
+
+使い方:
+    python scripts/benchmark_content_screening.py
+    python scripts/benchmark_content_screening.py --keywords 20000 --length 2000 --messages 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.content_screening import AhoCorasick, normalize_for_screening  # noqa: E402
+
+# 判定語用（漢字・カタカナ）とメッセージ用（ひらがな・句読点）で文字を分け、一致しないようにする
+KEYWORD_CHARS = [chr(c) for c in range(0x4E00, 0x4E00 + 2000)] + [chr(c) for c in range(0x30A1, 0x30F6)]
+MESSAGE_CHARS = [chr(c) for c in range(0x3041, 0x3096)] + list("、。　！？")
+
+
+def substring_scan(keywords: list, text: str) -> bool:
+    """従来の実装（判定語ごとに部分文字列を検索）"""
+    text_lower = text.lower()
+    return any(keyword in text_lower for keyword in keywords)
+
+
+def measure(func, messages: list, min_seconds: float = 1.0) -> float:
+    """
+    全メッセージの判定を min_seconds 以上繰り返し、1秒あたりの判定件数を返す
+    """
+    count = 0
+    started_at = time.perf_counter()
+    while True:
+        for message in messages:
+            if func(message):
+                raise AssertionError("unexpected match")
+        count += len(messages)
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= min_seconds:
+            return count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="不適切コンテンツ判定ベンチマーク")
+    parser.add_argument("--keywords", type=int, default=5000, help="判定語の数")
+    parser.add_argument("--length", type=int, default=1000, help="メッセージの文字数")
+    parser.add_argument("--messages", type=int, default=100, help="メッセージの種類数")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    keywords = list({
+        "".join(rng.choice(KEYWORD_CHARS) for _ in range(rng.randint(2, 6)))
+        for _ in range(args.keywords)
+    })
+    messages = [
+        "".join(rng.choice(MESSAGE_CHARS) for _ in range(args.length))
+        for _ in range(args.messages)
+    ]
+
+    started_at = time.perf_counter()
+    automaton = AhoCorasick(normalize_for_screening(k) for k in keywords)
+    build_ms = (time.perf_counter() - started_at) * 1000
+
+    print(f"Keywords: {len(keywords)}, message length: {args.length} chars")
+    print(f"Automaton build: {build_ms:.1f} ms")
+
+    naive = measure(lambda m: substring_scan(keywords, m), messages)
+    aho = measure(lambda m: automaton.contains(normalize_for_screening(m)), messages)
+
+    print(f"Substring scan:  {naive:>10,.0f} messages/s ({1e6 / naive:,.1f} us/message)")
+    print(f"Aho-Corasick:    {aho:>10,.0f} messages/s ({1e6 / aho:,.1f} us/message)")
+    print(f"Speedup:         {aho / naive:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
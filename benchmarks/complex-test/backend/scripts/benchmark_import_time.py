@@ -0,0 +1,97 @@
+"""
+起動時間ベンチマーク（python -X importtime）
+
+`import app.main` を別プロセスで実行し、インポート時間を集計します。
+重いモジュール（ReportLab / OpenAI）が起動時に読み込まれていないこと、
+合計インポート時間が予算内であることを確認し、回帰時は終了コード1を返します。
+
+使い方:
+    python scripts/benchmark_import_time.py
+    python scripts/benchmark_import_time.py --budget-ms 1500 --top 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 起動時に読み込まれてはならないトップレベルパッケージ
+DEFERRED_PACKAGES = ("reportlab", "openai")
+
+
+def measure_import_time(module: str = "app.main") -> Dict[str, int]:
+    """
+    モジュールをインポートし、各モジュールの累積インポート時間を取得
+
+    Args:
+        module: インポート対象のモジュール
+
+    Returns:
+        {モジュール名: 累積インポート時間(μs)}
+    """
+    env = os.environ.copy()
+    env.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+    env.setdefault("PYTHONPATH", BACKEND_DIR)
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} のインポートに失敗しました:\n{result.stderr}")
+
+    timings: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        # 形式: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            timings[name.strip()] = int(cumulative)
+        except ValueError:
+            continue
+    return timings
+
+
+def find_deferred_imports(timings: Dict[str, int]) -> List[str]:
+    """起動時に読み込まれた遅延対象パッケージを返す"""
+    return sorted(
+        name for name in timings
+        if name.split(".")[0] in DEFERRED_PACKAGES
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="起動時インポート時間ベンチマーク")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=None, help="合計インポート時間の上限(ms)")
+    parser.add_argument("--top", type=int, default=15, help="表示する上位モジュール数")
+    args = parser.parse_args()
+
+    timings = measure_import_time(args.module)
+    total_ms = timings.get(args.module, 0) / 1000
+
+    print(f"{args.module}: {total_ms:.1f} ms（{len(timings)} modules）")
+    for name, cumulative in sorted(timings.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    deferred = find_deferred_imports(timings)
+    if deferred:
+        print(f"NG: 起動時に遅延対象モジュールが読み込まれています: {', '.join(deferred[:10])}")
+        failed = True
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"NG: インポート時間が予算を超過しています（{total_ms:.1f} ms > {args.budget_ms:.1f} ms）")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+JWT復号ベンチマーク
+
+同じアクセストークンを繰り返し復号し、復号キャッシュの有無でスループットを比較します。
+ブラウザが同一トークンを何度も送る状況を想定し、--tokens で異なるトークンの数を指定できます。
+
+使い方:
+    python scripts/benchmark_jwt_decode.py
+    python scripts/benchmark_jwt_decode.py --iterations 50000 --tokens 100
+"""
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+
+from app.utils import security  # noqa: E402
+
+
+def measure(tokens: list, iterations: int, use_cache: bool) -> float:
+    """
+    トークンを順に復号し、1秒あたりの復号回数を返す
+
+    Args:
+        tokens: 復号するトークン
+        iterations: 復号回数
+        use_cache: 復号キャッシュを使用するか
+
+    Returns:
+        1秒あたりの復号回数
+    """
+    security.JWT_DECODE_CACHE_ENABLED = use_cache
+    security.token_decode_cache.clear()
+
+    started_at = time.perf_counter()
+    for i in range(iterations):
+        if security.decode_access_token(tokens[i % len(tokens)]) is None:
+            raise RuntimeError("トークンの復号に失敗しました")
+    return iterations / (time.perf_counter() - started_at)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="JWT復号ベンチマーク")
+    parser.add_argument("--iterations", type=int, default=20000, help="復号回数")
+    parser.add_argument("--tokens", type=int, default=10, help="異なるトークンの数")
+    args = parser.parse_args()
+
+    tokens = [
+        security.create_access_token({"sub": f"user-{i}", "role": "employee"})
+        for i in range(args.tokens)
+    ]
+
+    uncached = measure(tokens, args.iterations, use_cache=False)
+    cached = measure(tokens, args.iterations, use_cache=True)
+
+    print(f"iterations={args.iterations} tokens={args.tokens}")
+    print(f"  キャッシュなし: {uncached:12,.0f} decodes/s")
+    print(f"  キャッシュあり: {cached:12,.0f} decodes/s（{cached / uncached:.1f}倍）")
+    print(f"  hit_rate: {security.token_decode_cache.stats()['hit_rate']:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+LLM経路の負荷試験（オフライン）
+
+OpenAI APIのローカル代替（LLM_STANDIN_MODE=replay）を使用し、感情分析・
+カウンセラー応答（通常・ストリーミング）・改善提案の各経路のスループットと
+レイテンシーを計測します。ネットワーク接続やAPIキーは不要です。
+
+--recordings を省略した場合は、現在のプロンプトに対応する合成の応答を一時ファイルに
+生成して使用します。実際の応答で計測する場合は LLM_STANDIN_MODE=record で
+記録したファイルを指定してください。
+
+使い方:
+    python scripts/benchmark_llm_paths.py
+    python scripts/benchmark_llm_paths.py --requests 500 --concurrency 50 --latency lognormal:800:0.5
+    python scripts/benchmark_llm_paths.py --paths sentiment --error-rate 0.05 --recordings llm_recordings.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+
+PATHS = ("sentiment", "counselor", "counselor_stream", "recommendations")
+
+MESSAGES = [
+    "今週は会議が多くて自分の作業が進みませんでした",
+    "新しいプロジェクトの進め方について上司と相談しました",
+    "最近は通勤時間が長くて少し負担に感じています",
+    "チームの雰囲気は悪くないのですが、締め切りが重なっています",
+]
+
+
+def synthesize_recordings(path: str) -> None:
+    """現在のプロンプトに対応する合成の応答を書き出す"""
+    from app.services import ai_service
+    from app.services.llm_standin import Recording, RecordingStore, prompt_key
+
+    def prompt(system: str) -> str:
+        return prompt_key({"messages": [{"role": "system", "content": system}]})
+
+    analysis = {
+        "sentiment": -0.3,
+        "topics": ["業務量"],
+        "urgency": 2,
+        "reply_suggestion": "お疲れ様です。無理をしすぎないでくださいね。",
+        "risk_flags": [],
+    }
+    store = RecordingStore(path)
+    store.append(Recording(
+        key="synthetic-sentiment", prompt=prompt(ai_service.SYSTEM_PROMPT),
+        model=ai_service.SENTIMENT_MODEL, content=json.dumps(analysis, ensure_ascii=False),
+    ))
+    store.append(Recording(
+        key="synthetic-sentiment-batch", prompt=prompt(ai_service.BATCH_SYSTEM_PROMPT),
+        model=ai_service.SENTIMENT_MODEL,
+        content=json.dumps({"results": [
+            {"id": i, **analysis} for i in range(ai_service.SENTIMENT_BATCH_MAX_SIZE)
+        ]}, ensure_ascii=False),
+    ))
+    store.append(Recording(
+        key="synthetic-counselor", prompt=prompt(ai_service.COUNSELOR_SYSTEM_PROMPT),
+        model="gpt-4o-mini",
+        content="お話しいただきありがとうございます。忙しい日が続くと、心も体も疲れてしまいますよね。"
+                "まずは少しでも休める時間をつくることを大切にしてください。",
+    ))
+    store.append(Recording(
+        key="synthetic-recommendations", prompt=prompt(ai_service.RECOMMENDATION_SYSTEM_PROMPT),
+        model="gpt-4o-mini",
+        content=json.dumps({"recommendations": [
+            {"title": "残業時間の見直し", "description": "業務の優先順位を整理し、月間の残業時間の上限を設定する",
+             "department_name": None, "priority": "high"},
+            {"title": "1on1の定期実施", "description": "上司と部下の面談を月1回実施し、負担を早期に把握する",
+             "department_name": None, "priority": "medium"},
+        ]}, ensure_ascii=False),
+    ))
+
+
+async def run_path(path: str, index: int) -> None:
+    from app.services import ai_service
+
+    message = f"{MESSAGES[index % len(MESSAGES)]}（{index}）"
+    if path == "sentiment":
+        await ai_service.analyze_sentiment(message)
+    elif path == "counselor":
+        await ai_service.generate_counselor_response(message)
+    elif path == "counselor_stream":
+        async for _ in ai_service.stream_counselor_response(message):
+            pass
+    elif path == "recommendations":
+        await ai_service.generate_improvement_recommendations(
+            [{"department_name": "開発部", "average_score": 60.0, "high_stress_count": 3, "employee_count": 20}],
+            {"total_employees": 20, "high_stress_count": 3, "average_score": 60.0},
+        )
+
+
+async def measure(path: str, requests: int, concurrency: int) -> dict:
+    """
+    経路を同時実行数 concurrency で requests 回呼び出し、統計を返す
+
+    Returns:
+        スループット（件/秒）とレイテンシー（ミリ秒）
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started_at = time.perf_counter()
+            await run_path(path, index)
+            latencies.append((time.perf_counter() - started_at) * 1000)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "max": latencies[-1],
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    from app.services.llm_governor import llm_governor
+    from app.services.openai_client import close_openai_client
+
+    print(f"Stand-in: latency={args.latency} error_rate={args.error_rate} recordings={os.environ['LLM_STANDIN_RECORDINGS_PATH']}")
+    print(f"Requests: {args.requests} per path, concurrency {args.concurrency}, "
+          f"LLM concurrency limit {llm_governor.max_concurrency}")
+    print()
+    print(f"{'path':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    try:
+        for path in args.paths:
+            result = await measure(path, args.requests, args.concurrency)
+            print(f"{path:<18}{result['throughput']:>10.1f}{result['p50']:>10.0f}"
+                  f"{result['p95']:>10.0f}{result['max']:>10.0f}")
+    finally:
+        await close_openai_client()
+
+    stats = llm_governor.stats()
+    print()
+    print(f"LLM calls: completed={stats['completed']} failed={stats['failed']} "
+          f"rate_limited={stats['rate_limited']} rejected={stats['rejected']} circuit={stats['state']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LLM経路の負荷試験（OpenAI APIのローカル代替を使用）")
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS), help="計測する経路")
+    parser.add_argument("--requests", type=int, default=200, help="経路ごとのリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=20, help="同時リクエスト数")
+    parser.add_argument("--latency", default="lognormal:300:0.4", help="代替の応答遅延の分布（LLM_STANDIN_LATENCY）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="代替がエラーを返す割合")
+    parser.add_argument("--recordings", help="記録ファイル（省略時は合成の応答を使用）")
+    parser.add_argument("--batching", action="store_true", help="感情分析のマイクロバッチを有効化")
+    args = parser.parse_args()
+
+    # 設定はモジュールのインポート時に読み込まれるため、先に環境変数を設定する
+    recordings = args.recordings or os.path.join(tempfile.mkdtemp(), "llm_recordings.jsonl")
+    os.environ.update({
+        "LLM_STANDIN_MODE": "replay",
+        "LLM_STANDIN_RECORDINGS_PATH": recordings,
+        "LLM_STANDIN_LATENCY": args.latency,
+        "LLM_STANDIN_ERROR_RATE": str(args.error_rate),
+        "LLM_STANDIN_SEED": "42",
+        # 毎回LLMの経路を通す
+        "SENTIMENT_CACHE_ENABLED": "false",
+        "LEXICON_FAST_PATH_ENABLED": "false",
+        "SENTIMENT_BATCH_ENABLED": "true" if args.batching else "false",
+    })
+    if not args.recordings:
+        synthesize_recordings(recordings)
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 os.environ["JWT_SECRET_KEY"] = "test-secret-key-for-testing-only-do-not-use-in-production"
 os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
 os.environ["DEBUG_MODE"] = "false"
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+os.environ["SENTIMENT_BATCH_ENABLED"] = "false"
 
 from app.main import app
 from app.db.database import Base, get_db
@@ -39,6 +41,26 @@ def event_loop() -> Generator:
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_sentiment_cache():
+    """テスト間で感情分析キャッシュを共有しない"""
+    from app.services.ai_service import sentiment_cache
+    sentiment_cache.clear()
+    yield
+    sentiment_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_llm_governor(monkeypatch):
+    """テストごとに遮断状態・同時実行数を初期化したガバナーを使用"""
+    from app.services import ai_service, org_analysis_service
+    from app.services.llm_governor import LLMGovernor
+    governor = LLMGovernor()
+    monkeypatch.setattr(ai_service, "llm_governor", governor)
+    monkeypatch.setattr(org_analysis_service, "llm_governor", governor)
+    return governor
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     """テスト用データベースセッション"""
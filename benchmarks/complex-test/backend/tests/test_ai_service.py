@@ -10,9 +10,13 @@ os.environ["JWT_SECRET_KEY"] = "test-secret-key-for-testing-only"
 
 from app.services.ai_service import (
     contains_inappropriate_content,
+    should_block_message,
     analyze_sentiment,
     generate_improvement_recommendations,
-    _generate_fallback_recommendations
+    generate_counselor_response,
+    stream_counselor_response,
+    _generate_fallback_recommendations,
+    COUNSELOR_FALLBACK_REPLY,
 )
 
 
@@ -33,6 +37,12 @@ class TestContainsInappropriateContent:
         """空のテキスト"""
         assert contains_inappropriate_content("") is False
 
+    def test_self_harm_is_not_blocked(self):
+        """自傷リスクを示す発言は判定語を含んでも遮断しない"""
+        assert should_block_message("自殺したい") is False
+        assert should_block_message("もう死にたい") is False
+        assert should_block_message("暴力的な表現") is True
+
 
 class TestAnalyzeSentiment:
     """感情分析のテスト"""
@@ -47,7 +57,21 @@ class TestAnalyzeSentiment:
         assert "inappropriate_content" in result["risk_flags"]
 
     @pytest.mark.asyncio
-    @patch("app.services.ai_service.client")
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_self_harm_sets_risk_flag_instead_of_block(self, mock_client):
+        """自傷リスクを示す発言は遮断せず、self_harm_risk フラグと最高の緊急度を返す"""
+        mock_client.return_value.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+
+        result = await analyze_sentiment("もう死にたい")
+
+        assert "inappropriate_content" not in result["risk_flags"]
+        assert "self_harm_risk" in result["risk_flags"]
+        assert result["urgency"] == 5
+        assert result["source"] == "lexicon_fallback"
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.LEXICON_FAST_PATH_ENABLED", False)
+    @patch("app.services.ai_service.get_openai_client")
     async def test_api_success(self, mock_client):
         """API呼び出し成功時"""
         mock_response = MagicMock()
@@ -60,19 +84,20 @@ class TestAnalyzeSentiment:
                 "risk_flags": []
             })))
         ]
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.return_value.chat.completions.create = AsyncMock(return_value=mock_response)
 
         result = await analyze_sentiment("今日は忙しかったです")
 
         assert result["sentiment"] == 0.5
         assert "業務量" in result["topics"]
         assert result["urgency"] == 2
+        assert result["source"] == "llm"
 
     @pytest.mark.asyncio
-    @patch("app.services.ai_service.client")
+    @patch("app.services.ai_service.get_openai_client")
     async def test_api_error_returns_default(self, mock_client):
         """APIエラー時はデフォルト値を返す"""
-        mock_client.chat.completions.create.side_effect = Exception("API Error")
+        mock_client.return_value.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
 
         result = await analyze_sentiment("テストメッセージ")
 
@@ -157,7 +182,7 @@ class TestGenerateImprovementRecommendations:
         assert result == []
 
     @pytest.mark.asyncio
-    @patch("app.services.ai_service.client")
+    @patch("app.services.ai_service.get_openai_client")
     async def test_api_success(self, mock_client):
         """API呼び出し成功時"""
         mock_response = MagicMock()
@@ -172,7 +197,7 @@ class TestGenerateImprovementRecommendations:
                 ]
             })))
         ]
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.return_value.chat.completions.create = AsyncMock(return_value=mock_response)
 
         overall_stats = {
             "total_employees": 100,
@@ -196,10 +221,10 @@ class TestGenerateImprovementRecommendations:
         assert "id" in result[0]
 
     @pytest.mark.asyncio
-    @patch("app.services.ai_service.client")
+    @patch("app.services.ai_service.get_openai_client")
     async def test_api_error_returns_fallback(self, mock_client):
         """APIエラー時はフォールバック提案を返す"""
-        mock_client.chat.completions.create.side_effect = Exception("API Error")
+        mock_client.return_value.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
 
         overall_stats = {
             "total_employees": 100,
@@ -213,3 +238,215 @@ class TestGenerateImprovementRecommendations:
 
         assert len(result) > 0
         assert any("fallback" in r["id"] for r in result)
+
+
+class TestSharedClient:
+    """共有OpenAIクライアントのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_client_is_shared_and_closed(self, monkeypatch):
+        """クライアントは1つだけ生成され、終了時にプールを閉じる"""
+        from app.services import openai_client
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        monkeypatch.setattr(openai_client, "_client", None)
+
+        client = openai_client.get_openai_client()
+        assert openai_client.get_openai_client() is client
+        assert client.max_retries == openai_client.OPENAI_MAX_RETRIES
+
+        await openai_client.close_openai_client()
+        assert openai_client._client is None
+        assert client.is_closed()
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_concurrent_requests_do_not_block(self, mock_client):
+        """LLM呼び出し中もイベントループをブロックせず、並行に処理される"""
+        import asyncio
+
+        in_flight = 0
+        max_in_flight = 0
+
+        async def slow_create(**kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return MagicMock(choices=[MagicMock(message=MagicMock(content=json.dumps({"sentiment": 0.1})))])
+
+        mock_client.return_value.chat.completions.create = slow_create
+
+        results = await asyncio.gather(*(analyze_sentiment(f"メッセージ{i}") for i in range(5)))
+
+        assert max_in_flight == 5
+        assert all(r["sentiment"] == 0.1 for r in results)
+
+
+class _FakeStream:
+    """openai の AsyncStream 相当（チャンクを順に返し、途中で例外も送出できる）"""
+
+    def __init__(self, contents, error=None):
+        self._contents = contents
+        self._error = error
+        self.response = MagicMock(aclose=AsyncMock())
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for content in self._contents:
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=content))])
+        if self._error is not None:
+            raise self._error
+
+
+class TestStreamCounselorResponse:
+    """カウンセラー応答のストリーミングテスト"""
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_yields_tokens_and_closes_stream(self, mock_client):
+        stream = _FakeStream(["お疲れ", None, "様です。"])
+        mock_client.return_value.chat.completions.create = AsyncMock(return_value=stream)
+
+        tokens = [token async for token in stream_counselor_response("疲れました")]
+
+        assert tokens == ["お疲れ", "様です。"]
+        assert mock_client.return_value.chat.completions.create.await_args.kwargs["stream"] is True
+        stream.response.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_governor_slot_is_held_while_streaming(self, mock_client, fresh_llm_governor):
+        """応答を読み終えるまでガバナーの実行枠を使い、途中で閉じても解放する"""
+        stream = _FakeStream(["お疲れ", "様です。"])
+        mock_client.return_value.chat.completions.create = AsyncMock(return_value=stream)
+
+        tokens = stream_counselor_response("疲れました")
+        assert await tokens.__anext__() == "お疲れ"
+        assert fresh_llm_governor.stats()["in_flight"] == 1
+
+        await tokens.aclose()
+        assert fresh_llm_governor.stats()["in_flight"] == 0
+        stream.response.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_fallback_when_stream_fails_to_start(self, mock_client):
+        mock_client.return_value.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+
+        tokens = [token async for token in stream_counselor_response("疲れました")]
+
+        assert tokens == [COUNSELOR_FALLBACK_REPLY]
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_interrupted_stream_keeps_partial_reply(self, mock_client):
+        """途中で切断された場合は、それまでの応答で終了する"""
+        stream = _FakeStream(["お疲れ様です。"], error=Exception("connection reset"))
+        mock_client.return_value.chat.completions.create = AsyncMock(return_value=stream)
+
+        tokens = [token async for token in stream_counselor_response("疲れました")]
+
+        assert tokens == ["お疲れ様です。"]
+        stream.response.aclose.assert_awaited_once()
+
+
+class TestGenerateCounselorResponse:
+    """カウンセラー応答生成のテスト"""
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_reply(self, mock_client):
+        create = AsyncMock(return_value=MagicMock(
+            choices=[MagicMock(message=MagicMock(content="それは大変でしたね。"))]
+        ))
+        mock_client.return_value.chat.completions.create = create
+
+        reply = await generate_counselor_response("残業続きで疲れました")
+
+        assert reply == "それは大変でしたね。"
+        messages = create.await_args.kwargs["messages"]
+        assert messages[0]["role"] == "system"
+        assert messages[-1] == {"role": "user", "content": "残業続きで疲れました"}
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_fallback_on_error(self, mock_client):
+        mock_client.return_value.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+
+        assert await generate_counselor_response("疲れました") == COUNSELOR_FALLBACK_REPLY
+
+
+class TestSentimentBatch:
+    """同時期の感情分析を1回のLLM呼び出しにまとめるテスト"""
+
+    @pytest.fixture
+    def batching(self, monkeypatch):
+        from app.services import ai_service
+        from app.services.micro_batcher import MicroBatcher
+        monkeypatch.setattr(ai_service, "LEXICON_FAST_PATH_ENABLED", False)
+        monkeypatch.setattr(ai_service, "SENTIMENT_BATCH_ENABLED", True)
+        monkeypatch.setattr(ai_service, "sentiment_batcher", MicroBatcher(
+            ai_service._request_sentiment_batch, max_batch_size=16, max_wait_seconds=0.01
+        ))
+
+    @staticmethod
+    def _response(payload):
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=json.dumps(payload)))])
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_burst_is_sent_as_one_request(self, mock_client, batching):
+        import asyncio
+
+        create = AsyncMock(return_value=self._response({"results": [
+            {"id": 2, "sentiment": 0.5},
+            {"id": 0, "sentiment": -0.5, "topics": ["業務量"]},
+            {"id": 1, "sentiment": 0.0},
+        ]}))
+        mock_client.return_value.chat.completions.create = create
+
+        results = await asyncio.gather(*(
+            analyze_sentiment(text) for text in ["会議が長引きました", "普通の一日でした", "週末は旅行です"]
+        ))
+
+        create.assert_awaited_once()
+        request = json.loads(create.await_args.kwargs["messages"][1]["content"])
+        assert [m["text"] for m in request["messages"]] == ["会議が長引きました", "普通の一日でした", "週末は旅行です"]
+        assert [r["sentiment"] for r in results] == [-0.5, 0.0, 0.5]
+        assert results[0]["topics"] == ["業務量"]
+        assert all(r["source"] == "llm" for r in results)
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_missing_result_is_retried_individually(self, mock_client, batching):
+        import asyncio
+
+        create = AsyncMock(side_effect=[
+            self._response({"results": [{"id": 0, "sentiment": 0.3}]}),
+            self._response({"sentiment": -0.2}),
+        ])
+        mock_client.return_value.chat.completions.create = create
+
+        results = await asyncio.gather(analyze_sentiment("会議でした"), analyze_sentiment("移動日でした"))
+
+        assert create.await_count == 2
+        assert create.await_args_list[1].kwargs["messages"][1]["content"] == "移動日でした"
+        assert [r["sentiment"] for r in results] == [0.3, -0.2]
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_batch_failure_falls_back_without_retry(self, mock_client, batching):
+        """呼び出し自体の失敗時は個別に再試行せず、辞書ベースの結果を返す"""
+        import asyncio
+
+        create = AsyncMock(side_effect=Exception("API Error"))
+        mock_client.return_value.chat.completions.create = create
+
+        results = await asyncio.gather(analyze_sentiment("会議でした"), analyze_sentiment("移動日でした"))
+
+        create.assert_awaited_once()
+        assert all(r["source"] == "lexicon_fallback" for r in results)
@@ -0,0 +1,144 @@
+"""
+チャット履歴サービス（キーセットページング）のテスト
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db.models import ChatMessage
+from app.services import chat_history_service
+from app.services.chat_history_service import (
+    ChatHistoryCountCache,
+    build_chat_history_page_query,
+    decode_cursor,
+    encode_cursor,
+    get_chat_history_count,
+    get_chat_history_page,
+)
+
+
+def _messages(user_id, count):
+    base = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    return [
+        ChatMessage(
+            id=uuid.uuid4(), user_id=user_id, role="user", content=f"メッセージ{i}",
+            created_at=base + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def _db_returning(rows):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    return MagicMock(execute=AsyncMock(return_value=result))
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+class TestCursor:
+    """カーソルの生成と復元"""
+
+    def test_round_trip(self):
+        created_at = datetime(2026, 10, 19, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        message_id = uuid.uuid4()
+
+        cursor = encode_cursor(created_at.isoformat(), str(message_id))
+
+        assert decode_cursor(cursor) == (created_at, message_id)
+        assert "=" not in cursor
+
+    @pytest.mark.parametrize("cursor", ["", "invalid", encode_cursor("not-a-date", str(uuid.uuid4()))])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+class TestKeysetQuery:
+    """キーセットページングのクエリ"""
+
+    def test_first_page_has_no_offset(self):
+        sql = _sql(build_chat_history_page_query(uuid.uuid4(), limit=50))
+
+        assert "OFFSET" not in sql
+        assert "ORDER BY chat_messages.created_at ASC, chat_messages.id ASC" in sql
+
+    def test_next_page_seeks_past_cursor(self):
+        cursor = encode_cursor(datetime.now(timezone.utc).isoformat(), str(uuid.uuid4()))
+
+        ascending = _sql(build_chat_history_page_query(uuid.uuid4(), 50, cursor))
+        descending = _sql(build_chat_history_page_query(uuid.uuid4(), 50, cursor, descending=True))
+
+        assert "(chat_messages.created_at, chat_messages.id) >" in ascending
+        assert "(chat_messages.created_at, chat_messages.id) <" in descending
+        assert "ORDER BY chat_messages.created_at DESC, chat_messages.id DESC" in descending
+
+    def test_composite_index_matches_sort_key(self):
+        index = next(i for i in ChatMessage.__table__.indexes if i.name == "ix_chat_messages_user_created_id")
+        assert [c.name for c in index.columns] == ["user_id", "created_at", "id"]
+
+
+class TestGetChatHistoryPage:
+    """ページの取得と次のページのカーソル"""
+
+    @pytest.mark.asyncio
+    async def test_next_cursor_points_to_last_message(self):
+        user_id = uuid.uuid4()
+        rows = _messages(user_id, 3)  # limit + 1 件が返る = 次のページあり
+
+        messages, next_cursor = await get_chat_history_page(_db_returning(rows), user_id, limit=2)
+
+        assert [m["content"] for m in messages] == ["メッセージ0", "メッセージ1"]
+        assert decode_cursor(next_cursor) == (rows[1].created_at, rows[1].id)
+
+    @pytest.mark.asyncio
+    async def test_last_page_has_no_cursor(self):
+        user_id = uuid.uuid4()
+
+        messages, next_cursor = await get_chat_history_page(_db_returning(_messages(user_id, 2)), user_id, limit=2)
+
+        assert len(messages) == 2
+        assert next_cursor is None
+
+
+class TestChatHistoryCount:
+    """総数のキャッシュ"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        cache = ChatHistoryCountCache(ttl_seconds=60)
+        monkeypatch.setattr(chat_history_service, "chat_history_count_cache", cache)
+        return cache
+
+    @pytest.mark.asyncio
+    async def test_cached_count_skips_query(self):
+        user_id = uuid.uuid4()
+        result = MagicMock(scalar=MagicMock(return_value=42))
+        db = MagicMock(execute=AsyncMock(return_value=result))
+
+        assert await get_chat_history_count(db, user_id, use_cache=True) == 42
+        assert await get_chat_history_count(db, user_id, use_cache=True) == 42
+
+        db.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_saving_a_message_invalidates_count(self, fresh_cache):
+        user_id = uuid.uuid4()
+        fresh_cache.set(user_id, 10)
+        db = MagicMock(commit=AsyncMock(), refresh=AsyncMock())
+
+        await chat_history_service.save_chat_message(db, user_id, "user", "こんにちは")
+
+        assert fresh_cache.get(user_id) is None
+
+    def test_expired_count_is_dropped(self):
+        cache = ChatHistoryCountCache(ttl_seconds=0)
+        user_id = uuid.uuid4()
+        cache.set(user_id, 5)
+
+        assert cache.get(user_id) is None
@@ -0,0 +1,135 @@
+"""
+チャット処理パイプラインのテスト
+"""
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.db.models import DailyScore
+from app.services import chat_pipeline
+from app.services.chat_pipeline import ChatTurn, run_chat_turn, stream_chat_turn
+
+
+def _analysis(**overrides) -> dict:
+    analysis = {
+        "sentiment": -0.8,
+        "topics": ["業務量"],
+        "urgency": 4,
+        "reply_suggestion": "大変でしたね。",
+        "risk_flags": ["overwork"],
+    }
+    analysis.update(overrides)
+    return analysis
+
+
+class TestRunChatTurn:
+    """1回の推論で返信・保存・通知を行うテスト"""
+
+    @pytest.fixture
+    def mocks(self, monkeypatch):
+        self.analyze = AsyncMock(return_value=_analysis())
+        self.notify = AsyncMock()
+        monkeypatch.setattr(chat_pipeline, "analyze_sentiment", self.analyze)
+        monkeypatch.setattr(chat_pipeline, "check_and_notify_high_stress", self.notify)
+
+    @pytest.mark.asyncio
+    async def test_single_inference_for_reply_score_and_notification(self, mocks):
+        db = MagicMock(commit=AsyncMock())
+        user_id = uuid.uuid4()
+
+        turn = await run_chat_turn("残業続きで疲れました", db=db, user_id=user_id)
+
+        self.analyze.assert_awaited_once()
+        assert turn.reply == "大変でしたね。"
+        assert turn.blocked is False
+
+        daily_score = db.add.call_args.args[0]
+        assert isinstance(daily_score, DailyScore)
+        assert daily_score.user_id == user_id
+        assert daily_score.sentiment_score == -0.8
+        db.commit.assert_awaited_once()
+
+        self.notify.assert_awaited_once_with(
+            sentiment_score=-0.8, urgency=4, risk_flags=["overwork"], topics=["業務量"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_unlinked_user_is_not_persisted(self, mocks):
+        """ユーザーが特定できない場合は保存せず、返信と通知のみ行う"""
+        history = [{"role": "user", "content": "こんにちは"}]
+
+        turn = await run_chat_turn("疲れました", conversation_history=history)
+
+        assert turn.reply == "大変でしたね。"
+        assert self.analyze.await_args.kwargs["conversation_history"] == history
+        self.notify.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_inappropriate_content_is_blocked(self, mocks):
+        self.analyze.return_value = _analysis(
+            reply_suggestion="不適切な内容が検出されました。",
+            risk_flags=["inappropriate_content"],
+        )
+        db = MagicMock(commit=AsyncMock())
+
+        turn = await run_chat_turn("不適切な内容", db=db, user_id=uuid.uuid4())
+
+        assert turn.blocked is True
+        db.add.assert_not_called()
+        self.notify.assert_not_awaited()
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class TestStreamChatTurn:
+    """カウンセラー応答のストリーミングと保存のテスト"""
+
+    @pytest.fixture
+    def mocks(self, monkeypatch):
+        async def stream(text, history, conversation_key=None):
+            for token in ["お疲れ", "様です。"]:
+                yield token
+
+        self.run_turn = AsyncMock(return_value=ChatTurn(reply="", analysis=_analysis(source="llm")))
+        self.save = AsyncMock(side_effect=["user-message-id", "ai-message-id"])
+        monkeypatch.setattr(chat_pipeline, "stream_counselor_response", stream)
+        monkeypatch.setattr(chat_pipeline, "run_chat_turn", self.run_turn)
+        monkeypatch.setattr(chat_pipeline, "save_chat_message", self.save)
+
+    @pytest.mark.asyncio
+    async def test_streams_tokens_then_persists_reply(self, mocks):
+        user_id = uuid.uuid4()
+
+        events = [
+            event async for event in stream_chat_turn("残業続きで疲れました", user_id, session_factory=_FakeSession)
+        ]
+
+        assert events[:2] == [("token", {"content": "お疲れ"}), ("token", {"content": "様です。"})]
+        name, done = events[-1]
+        assert name == "done"
+        assert done["message"] == "お疲れ様です。"
+        assert done["message_id"] == "ai-message-id"
+        assert done["sentiment_score"] == -0.8
+        assert done["source"] == "llm"
+
+        self.run_turn.assert_awaited_once()
+        assert self.run_turn.await_args.kwargs["user_id"] == user_id
+        assert self.save.await_args_list[0].args[1:] == (user_id, "user", "残業続きで疲れました")
+        assert self.save.await_args_list[1].args[1:] == (user_id, "ai", "お疲れ様です。", -0.8)
+
+    @pytest.mark.asyncio
+    async def test_disconnect_saves_nothing(self, mocks):
+        """クライアントが途中で切断した場合は保存しない"""
+        events = stream_chat_turn("疲れました", uuid.uuid4(), session_factory=_FakeSession)
+
+        assert await events.__anext__() == ("token", {"content": "お疲れ"})
+        await events.aclose()
+
+        self.save.assert_not_awaited()
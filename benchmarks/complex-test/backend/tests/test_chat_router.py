@@ -0,0 +1,61 @@
+"""
+チャットAPI（履歴取得）のテスト
+"""
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+
+from app.db.database import get_db
+from app.db.models import UserRole
+from app.main import app
+from app.routers import chat
+from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
+
+
+class TestGetHistory:
+    """履歴取得のページング指定"""
+
+    @pytest_asyncio.fixture
+    async def client(self, monkeypatch):
+        principal = Principal(id=uuid.uuid4(), company_id=uuid.uuid4(), department_id=None,
+                              role=UserRole.EMPLOYEE, email="user@example.com")
+        self.history = AsyncMock(return_value=[])
+        self.page = AsyncMock(return_value=([], None))
+        monkeypatch.setattr(chat, "get_chat_history_db", self.history)
+        monkeypatch.setattr(chat, "get_chat_history_page_db", self.page)
+
+        async def override_get_db():
+            yield MagicMock()
+
+        app.dependency_overrides[get_current_user] = lambda: principal
+        app.dependency_overrides[get_db] = override_get_db
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            yield ac
+        app.dependency_overrides.clear()
+
+    @pytest.mark.asyncio
+    async def test_offset_with_desc_is_rejected(self, client):
+        """offsetは古い順のみ対応のため、新しい順と組み合わせると400"""
+        response = await client.get("/api/v1/chat/history", params={"offset": 10, "order": "desc"})
+
+        assert response.status_code == 400
+        self.history.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_offset_with_asc(self, client):
+        response = await client.get("/api/v1/chat/history", params={"offset": 10})
+
+        assert response.status_code == 200
+        assert self.history.await_args.kwargs["offset"] == 10
+
+    @pytest.mark.asyncio
+    async def test_desc_without_offset_uses_cursor_paging(self, client):
+        response = await client.get("/api/v1/chat/history", params={"order": "desc"})
+
+        assert response.status_code == 200
+        assert self.page.await_args.kwargs["descending"] is True
+        self.history.assert_not_awaited()
@@ -0,0 +1,85 @@
+"""
+不適切コンテンツ判定（Aho-Corasick）のテスト
+"""
+import os
+import random
+
+import pytest
+
+from app.services.content_screening import AhoCorasick, ContentScreener, load_keywords
+
+
+class TestAhoCorasick:
+    """オートマトンによる複数語の照合"""
+
+    def test_overlapping_keywords(self):
+        """失敗遷移をたどって、他の語の途中から始まる語も検出する"""
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+
+        assert automaton.find_all("ushers") == ["she", "he", "hers"]
+        assert automaton.contains("ahishers") is True
+        assert automaton.contains("hxexs") is False
+
+    def test_matches_substring_scan(self):
+        rng = random.Random(0)
+        alphabet = "あいうえお"
+        keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(30)]
+        automaton = AhoCorasick(keywords)
+
+        for _ in range(200):
+            text = "".join(rng.choice(alphabet + "かき") for _ in range(rng.randint(0, 20)))
+            expected = any(keyword in text for keyword in keywords)
+            assert automaton.contains(text) is expected
+            assert set(automaton.find_all(text)) == {k for k in keywords if k in text}
+
+    def test_empty_keywords(self):
+        automaton = AhoCorasick([])
+        assert automaton.contains("なんでも") is False
+        assert automaton.size == 0
+
+
+class TestContentScreener:
+    """判定語ファイルの読み込みと再読み込み"""
+
+    @pytest.fixture
+    def keywords_file(self, tmp_path):
+        path = tmp_path / "keywords.txt"
+        path.write_text("# コメント\n\n暴力\nＮＧワード\n", encoding="utf-8")
+        return path
+
+    def test_load_keywords_skips_comments_and_normalizes(self, keywords_file):
+        assert load_keywords(str(keywords_file)) == ["暴力", "ngワード"]
+
+    def test_contains_is_normalized(self, keywords_file):
+        screener = ContentScreener(str(keywords_file), reload_interval=0)
+
+        assert screener.contains("それはNGワードです") is True
+        assert screener.contains("ｎｇワード") is True
+        assert screener.contains("今日も頑張りました") is False
+        assert screener.contains("") is False
+
+    def test_hot_reload_when_file_changes(self, keywords_file):
+        screener = ContentScreener(str(keywords_file), reload_interval=0.001)
+        assert screener.contains("差別的な発言") is False
+
+        keywords_file.write_text("差別\n", encoding="utf-8")
+        stat = os.stat(keywords_file)
+        os.utime(keywords_file, (stat.st_atime, stat.st_mtime + 10))
+        screener._checked_at = 0.0
+
+        assert screener.contains("差別的な発言") is True
+        assert screener.contains("暴力") is False
+        assert screener.stats()["reloads"] == 2
+
+    def test_failed_reload_keeps_current_keywords(self, keywords_file):
+        screener = ContentScreener(str(keywords_file), reload_interval=0)
+        screener.load()
+
+        os.remove(keywords_file)
+
+        assert screener.load() == 2
+        assert screener.contains("暴力") is True
+
+    def test_missing_file_on_first_load_raises(self, tmp_path):
+        with pytest.raises(OSError):
+            ContentScreener(str(tmp_path / "missing.txt")).load()
@@ -0,0 +1,132 @@
+"""
+会話履歴の圧縮（トークン予算と要約）のテスト
+"""
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.conversation_history import (
+    MESSAGE_OVERHEAD_TOKENS,
+    SUMMARY_PREFIX,
+    HistorySummarizer,
+    estimate_tokens,
+    trim_history,
+)
+
+
+def _turns(start: int, count: int) -> list:
+    """1件あたり推定 10 + 4 トークンの発言を交互に生成"""
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"発言{i:03d}です。よろしく"}
+        for i in range(start, start + count)
+    ]
+
+
+MESSAGE_TOKENS = estimate_tokens("発言000です。よろしく") + MESSAGE_OVERHEAD_TOKENS
+
+
+class TestTokenEstimate:
+    """トークン数の推定と予算による切り詰め"""
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens("疲れました") == 5
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("") == 0
+
+    def test_trim_keeps_newest_within_budget(self):
+        history = _turns(0, 10)
+
+        trimmed = trim_history(history, MESSAGE_TOKENS * 3)
+
+        assert trimmed == history[-3:]
+
+
+class TestHistorySummarizer:
+    """要約の生成・再利用・再生成"""
+
+    @pytest.fixture
+    def summarize(self):
+        return AsyncMock(side_effect=lambda previous, messages: f"要約{len(messages)}件")
+
+    def _summarizer(self, summarize):
+        # 予算は10件分、再生成後は4件分の余裕を残す
+        return HistorySummarizer(summarize, token_budget=MESSAGE_TOKENS * 10, refresh_tokens=MESSAGE_TOKENS * 4)
+
+    @pytest.mark.asyncio
+    async def test_history_within_budget_is_unchanged(self, summarize):
+        summarizer = self._summarizer(summarize)
+        history = _turns(0, 10)
+
+        assert await summarizer.prepare(history, "line:u1") == history
+        summarize.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_overflow_is_replaced_by_summary(self, summarize):
+        summarizer = self._summarizer(summarize)
+        history = _turns(0, 12)
+
+        prepared = await summarizer.prepare(history, "line:u1")
+
+        # 古い6件を要約し、直近6件（予算 - 余裕）を残す
+        summarize.assert_awaited_once_with(None, history[:6])
+        assert prepared[0] == {"role": "system", "content": SUMMARY_PREFIX + "要約6件"}
+        assert prepared[1:] == history[6:]
+
+    @pytest.mark.asyncio
+    async def test_summary_is_reused_until_stale(self, summarize):
+        summarizer = self._summarizer(summarize)
+        history = _turns(0, 12)
+        await summarizer.prepare(history, "line:u1")
+
+        # 余裕の範囲内（4件）で増えた場合は再生成しない
+        history += _turns(12, 4)
+        prepared = await summarizer.prepare(history, "line:u1")
+        assert summarize.await_count == 1
+        assert prepared[1:] == history[6:]
+        assert summarizer.stats()["hits"] == 1
+
+        # 予算を超えたら、前回の要約と新たにあふれた発言だけで再生成
+        history += _turns(16, 2)
+        prepared = await summarizer.prepare(history, "line:u1")
+        assert summarize.await_count == 2
+        assert summarize.await_args.args == ("要約6件", history[6:12])
+        assert prepared[1:] == history[12:]
+
+    @pytest.mark.asyncio
+    async def test_without_key_history_is_trimmed(self, summarize):
+        summarizer = self._summarizer(summarize)
+        history = _turns(0, 12)
+
+        prepared = await summarizer.prepare(history)
+
+        assert prepared == history[2:]
+        summarize.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_summary_failure_falls_back_to_trimming(self):
+        summarizer = self._summarizer(AsyncMock(return_value=None))
+        history = _turns(0, 12)
+
+        prepared = await summarizer.prepare(history, "line:u1")
+
+        assert prepared == history[2:]
+        assert summarizer.stats()["failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_refresh(self):
+        """同じ会話の分析と応答生成が並行しても、要約は1回だけ生成する"""
+        async def slow_summarize(previous, messages):
+            await asyncio.sleep(0.01)
+            return "要約"
+
+        summarize = AsyncMock(side_effect=slow_summarize)
+        summarizer = self._summarizer(summarize)
+        history = _turns(0, 12)
+
+        results = await asyncio.gather(
+            summarizer.prepare(history, "web:u1"), summarizer.prepare(history, "web:u1")
+        )
+
+        summarize.assert_awaited_once()
+        assert results[0] == results[1]
@@ -0,0 +1,253 @@
+"""
+CSVインポートジョブサービスのテスト
+"""
+import io
+import os
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.db.models import CSVImportJob, CSVImportJobStatus
+from app.models.csv_import import DuplicateEntry
+from app.services import csv_import_job_service
+from app.services.csv_import_job_service import (
+    HEADER_ROW_NUMBER,
+    iter_pending_chunks,
+    persist_upload,
+    process_import_job,
+    to_job_response,
+)
+
+HEADER = "email,name,employee_id,department\n"
+
+
+def _csv_text(count: int, invalid_rows: tuple = ()) -> str:
+    lines = []
+    for i in range(count):
+        row_number = i + 2
+        email = "invalid" if row_number in invalid_rows else f"user{i}@example.com"
+        lines.append(f"{email},社員{i},EMP{i:04d},営業部\n")
+    return HEADER + "".join(lines)
+
+
+def _job(file_path: str, **overrides) -> CSVImportJob:
+    params = dict(
+        id=uuid.uuid4(),
+        company_id=uuid.uuid4(),
+        created_by=uuid.uuid4(),
+        filename="employees.csv",
+        file_path=file_path,
+        skip_errors=True,
+        chunk_size=2,
+        status=CSVImportJobStatus.RUNNING,
+        total_rows=0,
+        validated_rows=0,
+        hashed_rows=0,
+        inserted_rows=0,
+        skipped_rows=0,
+        committed_chunks=0,
+        last_row_number=HEADER_ROW_NUMBER,
+        error_details=None,
+    )
+    params.update(overrides)
+    return CSVImportJob(**params)
+
+
+class TestPersistUpload:
+    """アップロードファイル保存のテスト"""
+
+    def test_persist_upload(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(csv_import_job_service, "CSV_IMPORT_UPLOAD_DIR", str(tmp_path))
+        raw = io.BytesIO(_csv_text(3).encode("utf-8"))
+        raw.read(10)  # 読み込み途中でも先頭から保存される
+        job_id = uuid.uuid4()
+
+        path = persist_upload(raw, job_id)
+
+        assert path == os.path.join(str(tmp_path), f"{job_id}.csv")
+        with open(path, "rb") as f:
+            assert f.read() == raw.getvalue()
+        assert not os.path.exists(f"{path}.part")
+
+
+class TestIterPendingChunks:
+    """チャンク分割のテスト"""
+
+    def test_chunks_with_skipped_rows(self):
+        raw = io.BytesIO(_csv_text(5).encode("utf-8"))  # 行番号2〜6
+
+        chunks = list(iter_pending_chunks(raw, {3}, HEADER_ROW_NUMBER, chunk_size=2))
+
+        assert [[r["row_number"] for r in rows] for rows, _, _ in chunks] == [[2, 4], [5, 6]]
+        assert [skipped for _, skipped, _ in chunks] == [1, 0]
+        assert [last for _, _, last in chunks] == [4, 6]
+
+    def test_resume_after_checkpoint(self):
+        """チェックポイント以前の行は返さない"""
+        raw = io.BytesIO(_csv_text(5).encode("utf-8"))
+
+        chunks = list(iter_pending_chunks(raw, set(), 4, chunk_size=10))
+
+        assert len(chunks) == 1
+        rows, skipped, last_row_number = chunks[0]
+        assert [r["row_number"] for r in rows] == [5, 6]
+        assert skipped == 0
+        assert last_row_number == 6
+
+    def test_trailing_skipped_rows_are_checkpointed(self):
+        """末尾がスキップ行のみでもチェックポイントを進める"""
+        raw = io.BytesIO(_csv_text(3).encode("utf-8"))
+
+        chunks = list(iter_pending_chunks(raw, {4}, HEADER_ROW_NUMBER, chunk_size=2))
+
+        assert chunks[-1] == ([], 1, 4)
+
+
+class TestProcessImportJob:
+    """ジョブ実行のテスト"""
+
+    @pytest.fixture
+    def inserted(self, monkeypatch):
+        """ハッシュ化・登録・重複チェックを差し替え、登録されたメールアドレスを記録"""
+        inserted = []
+
+        async def fake_insert(db, records):
+            inserted.extend(r["email"] for r in records)
+            self.records.extend(records)
+
+        async def fake_hash(passwords):
+            return ["hashed"] * len(passwords)
+
+        monkeypatch.setattr(csv_import_job_service, "insert_user_chunk", fake_insert)
+        monkeypatch.setattr(csv_import_job_service, "hash_passwords", fake_hash)
+        monkeypatch.setattr(
+            csv_import_job_service, "check_duplicates", AsyncMock(return_value=([], []))
+        )
+        self.department_id = uuid.uuid4()
+        self.resolve_departments = AsyncMock(return_value={"営業部": self.department_id})
+        monkeypatch.setattr(csv_import_job_service, "resolve_departments", self.resolve_departments)
+        self.records = []
+        return inserted
+
+    def _write_csv(self, tmp_path, text: str) -> str:
+        path = tmp_path / "upload.csv"
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    @pytest.mark.asyncio
+    async def test_processes_all_chunks(self, tmp_path, inserted):
+        path = self._write_csv(tmp_path, _csv_text(5, invalid_rows=(3,)))
+        job = _job(path)
+        db = AsyncMock()
+
+        await process_import_job(db, job)
+
+        assert job.status == CSVImportJobStatus.COMPLETED
+        assert inserted == ["user0@example.com", "user2@example.com", "user3@example.com", "user4@example.com"]
+        assert job.total_rows == 5
+        assert job.validated_rows == 5
+        assert job.hashed_rows == 4
+        assert job.inserted_rows == 4
+        assert job.skipped_rows == 1
+        assert job.last_row_number == 6
+        assert job.error_details["validation_errors"][0]["row_number"] == 3
+        assert not os.path.exists(path)  # 完了後にファイルを削除
+
+    @pytest.mark.asyncio
+    async def test_sets_department_id(self, tmp_path, inserted):
+        """部署は登録対象の行からまとめて解決し、一括登録時にdepartment_idを設定する"""
+        path = self._write_csv(tmp_path, _csv_text(3, invalid_rows=(3,)))
+        job = _job(path)
+
+        await process_import_job(AsyncMock(), job)
+
+        self.resolve_departments.assert_awaited_once()
+        assert list(self.resolve_departments.await_args.args[2]) == ["営業部", "営業部"]
+        assert {r["department_id"] for r in self.records} == {self.department_id}
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, tmp_path, inserted, monkeypatch):
+        """チェックポイント以降の行のみ登録し、自身が登録済みの行はDB重複として扱わない"""
+        path = self._write_csv(tmp_path, _csv_text(4))
+        job = _job(path, last_row_number=3, inserted_rows=2, hashed_rows=2, committed_chunks=1)
+        monkeypatch.setattr(
+            csv_import_job_service, "check_duplicates",
+            AsyncMock(return_value=([], [DuplicateEntry(row_number=2, email="user0@example.com", duplicate_type="database")]))
+        )
+
+        await process_import_job(AsyncMock(), job)
+
+        assert inserted == ["user2@example.com", "user3@example.com"]
+        assert job.status == CSVImportJobStatus.COMPLETED
+        assert job.inserted_rows == 4
+        assert job.skipped_rows == 0
+        assert job.committed_chunks == 2
+
+    @pytest.mark.asyncio
+    async def test_resume_advances_updated_at(self, tmp_path, inserted):
+        """再開時の再バリデーション中も、チェックポイントごとに更新日時を進める"""
+        path = self._write_csv(tmp_path, _csv_text(4))
+        stale = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        job = _job(path, last_row_number=5, validated_rows=4, inserted_rows=4, hashed_rows=4,
+                   committed_chunks=2, updated_at=stale)
+        heartbeats = []
+
+        async def commit():
+            heartbeats.append(job.updated_at)
+
+        await process_import_job(AsyncMock(commit=commit), job)
+
+        # 1パス目の各チャンク（進捗カウンタは変わらない）でも更新日時が進む
+        assert job.validated_rows == 4
+        assert len(heartbeats) >= 2
+        assert all(updated_at > stale for updated_at in heartbeats[:2])
+
+    @pytest.mark.asyncio
+    async def test_fails_on_errors_without_skip(self, tmp_path, inserted):
+        path = self._write_csv(tmp_path, _csv_text(3, invalid_rows=(2,)))
+        job = _job(path, skip_errors=False)
+
+        await process_import_job(AsyncMock(), job)
+
+        assert job.status == CSVImportJobStatus.FAILED
+        assert inserted == []
+        assert job.skipped_rows == 3
+
+
+    @pytest.mark.asyncio
+    async def test_resume_without_skip_fails_on_new_duplicates(self, tmp_path, inserted, monkeypatch):
+        """skip_errors=Falseのジョブは、再開までに重複となった行があれば中止する"""
+        path = self._write_csv(tmp_path, _csv_text(4))
+        job = _job(path, skip_errors=False, last_row_number=3, inserted_rows=2, hashed_rows=2,
+                   committed_chunks=1, error_details={"validation_errors": [], "duplicates": []})
+        monkeypatch.setattr(
+            csv_import_job_service, "check_duplicates",
+            AsyncMock(return_value=([], [DuplicateEntry(row_number=5, email="user3@example.com", duplicate_type="database")]))
+        )
+
+        await process_import_job(AsyncMock(), job)
+
+        assert job.status == CSVImportJobStatus.FAILED
+        assert inserted == []
+        assert job.inserted_rows == 2
+        assert job.skipped_rows == 2
+        assert job.error_details["duplicates"][0]["row_number"] == 5
+
+
+class TestJobResponse:
+    """進捗レスポンスのテスト"""
+
+    def test_to_job_response(self):
+        job = _job("/tmp/x.csv", inserted_rows=10, skipped_rows=2, error_details={
+            "validation_errors": [],
+            "duplicates": [{"row_number": 5, "email": "a@example.com", "duplicate_type": "database"}],
+        })
+
+        response = to_job_response(job)
+
+        assert response.job_id == str(job.id)
+        assert response.status == "running"
+        assert response.inserted_rows == 10
+        assert response.duplicates[0].row_number == 5
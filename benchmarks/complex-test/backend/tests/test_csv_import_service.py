@@ -0,0 +1,331 @@
+"""
+CSVインポートサービスのテスト
+"""
+import io
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.db.models import UserRole
+from app.services import csv_import_service
+from app.services.csv_import_service import (
+    detect_encoding,
+    iter_validated_rows,
+    validate_email,
+    build_user_records,
+    insert_user_chunk,
+    find_existing_emails,
+    check_duplicates,
+    scan_csv_preview,
+    resolve_departments,
+)
+
+HEADER = "email,name,employee_id,department\n"
+
+
+def _csv_bytes(body: str, encoding: str = "utf-8") -> io.BytesIO:
+    return io.BytesIO((HEADER + body).encode(encoding))
+
+
+class TestDetectEncoding:
+    """エンコーディング判定のテスト"""
+
+    def test_utf8(self):
+        assert detect_encoding("山田太郎".encode("utf-8")) == "utf-8-sig"
+
+    def test_shift_jis(self):
+        assert detect_encoding("山田太郎".encode("shift-jis")) == "shift-jis"
+
+    def test_multibyte_split_at_chunk_boundary(self):
+        """先頭チャンクの末尾で分断されたマルチバイト文字はエラーにしない"""
+        data = "営業部".encode("utf-8")
+        assert detect_encoding(data[:-1]) == "utf-8-sig"
+
+    def test_invalid_encoding(self):
+        with pytest.raises(HTTPException) as exc_info:
+            detect_encoding(b"\xff\xfe\xfd\xfc")
+        assert exc_info.value.status_code == 400
+
+
+class TestIterValidatedRows:
+    """ストリーミングパースのテスト"""
+
+    def test_valid_rows(self):
+        raw = _csv_bytes("user1@example.com,山田太郎,EMP001,営業部\nuser2@example.com,佐藤花子,EMP002,開発部\n")
+
+        rows = list(iter_validated_rows(raw))
+
+        assert len(rows) == 2
+        row, errors = rows[0]
+        assert row["row_number"] == 2
+        assert row["email"] == "user1@example.com"
+        assert row["department"] == "営業部"
+        assert row["is_valid"] is True
+        assert errors == []
+
+    def test_shift_jis_file(self):
+        raw = _csv_bytes("user1@example.com,山田太郎,EMP001,営業部\n", encoding="shift-jis")
+
+        row, errors = next(iter_validated_rows(raw))
+
+        assert row["name"] == "山田太郎"
+        assert errors == []
+
+    def test_utf8_bom_file(self):
+        raw = io.BytesIO(b"\xef\xbb\xbf" + (HEADER + "user1@example.com,山田太郎,EMP001,営業部\n").encode("utf-8"))
+
+        row, errors = next(iter_validated_rows(raw))
+
+        assert row["email"] == "user1@example.com"
+        assert errors == []
+
+    def test_invalid_rows_are_reported(self):
+        raw = _csv_bytes("invalid-email,,EMP001,営業部\n")
+
+        row, errors = next(iter_validated_rows(raw))
+
+        assert row["is_valid"] is False
+        assert {e.column for e in errors} == {"email", "name"}
+
+    def test_short_row_does_not_crash(self):
+        """列が不足している行はエラーとして扱う"""
+        raw = _csv_bytes("user1@example.com\n")
+
+        row, errors = next(iter_validated_rows(raw))
+
+        assert row["is_valid"] is False
+        assert {e.column for e in errors} == {"name", "employee_id", "department"}
+
+    def test_quoted_newline_across_chunks(self, monkeypatch):
+        """引用符内の改行を含む行を正しくパースする"""
+        monkeypatch.setattr(csv_import_service, "CSV_SNIFF_BYTES", 16)
+        raw = _csv_bytes('user1@example.com,"山田\n太郎",EMP001,営業部\n')
+
+        row, _ = next(iter_validated_rows(raw))
+
+        assert row["name"] == "山田\n太郎"
+
+    def test_missing_columns(self):
+        raw = io.BytesIO("email,name\nuser1@example.com,山田太郎\n".encode("utf-8"))
+
+        with pytest.raises(HTTPException) as exc_info:
+            list(iter_validated_rows(raw))
+        assert "employee_id" in exc_info.value.detail
+
+    def test_can_iterate_multiple_times(self):
+        """同じファイルを複数回走査でき、元ファイルは閉じられない"""
+        raw = _csv_bytes("user1@example.com,山田太郎,EMP001,営業部\n")
+
+        first = list(iter_validated_rows(raw))
+        second = list(iter_validated_rows(raw))
+
+        assert first == second
+        assert raw.closed is False
+
+    def test_large_file_streams_lazily(self):
+        """全行を読み込む前に最初の行を返す"""
+        body = "".join(f"user{i}@example.com,社員{i},EMP{i:06d},営業部\n" for i in range(20000))
+        raw = _csv_bytes(body)
+
+        rows = iter_validated_rows(raw)
+        row, _ = next(rows)
+        rows.close()
+
+        assert row["row_number"] == 2
+        assert raw.tell() < len(raw.getvalue())
+
+
+class TestScanCSVPreview:
+    """プレビュー用走査のテスト"""
+
+    def test_keeps_only_sample_rows(self):
+        body = "".join(f"user{i}@example.com,社員{i},EMP{i:04d},営業部\n" for i in range(50))
+        body += "invalid,社員,EMP9999,営業部\n"
+
+        sample_rows, total_rows, invalid_row_numbers, email_entries = scan_csv_preview(_csv_bytes(body), 10)
+
+        assert [r["row_number"] for r in sample_rows] == list(range(2, 12))
+        assert total_rows == 51
+        assert invalid_row_numbers == {52}
+        assert len(email_entries) == 51
+        assert set(email_entries[0]) == {"row_number", "email"}  # 行データ本体は保持しない
+
+
+class TestValidateEmail:
+    """メールアドレス形式チェックのテスト"""
+
+    def test_valid(self):
+        assert validate_email("user@example.com") is True
+
+    def test_invalid(self):
+        assert validate_email("user@") is False
+
+
+class TestBulkInsert:
+    """一括登録のテスト"""
+
+    @staticmethod
+    def _mock_db(dialect_name: str, driver: str) -> AsyncMock:
+        db = AsyncMock()
+        db.get_bind = MagicMock(return_value=MagicMock(dialect=MagicMock(driver=driver)))
+        db.get_bind.return_value.dialect.name = dialect_name
+        return db
+
+    def _records(self, count: int = 2) -> list:
+        rows = [{"email": f"user{i}@example.com"} for i in range(count)]
+        return build_user_records(rows, [f"hash{i}" for i in range(count)], uuid.uuid4())
+
+    def test_build_user_records(self):
+        company_id = uuid.uuid4()
+        records = build_user_records([{"email": "user@example.com"}], ["hashed"], company_id)
+
+        assert records[0]["company_id"] == company_id
+        assert records[0]["hashed_password"] == "hashed"
+        assert records[0]["role"] == UserRole.EMPLOYEE
+        assert isinstance(records[0]["id"], uuid.UUID)
+
+    @pytest.mark.asyncio
+    async def test_insert_uses_executemany_on_non_postgres(self):
+        """PostgreSQL以外では INSERT ... VALUES のバッチで登録"""
+        db = self._mock_db("sqlite", "aiosqlite")
+        records = self._records()
+
+        await insert_user_chunk(db, records)
+
+        db.execute.assert_awaited_once()
+        assert db.execute.await_args.args[1] == records
+
+    @pytest.mark.asyncio
+    async def test_insert_uses_copy_on_asyncpg(self):
+        """PostgreSQL(asyncpg)ではCOPYで登録し、Enumは格納値に変換"""
+        db = self._mock_db("postgresql", "asyncpg")
+        raw_connection = MagicMock()
+        raw_connection.driver_connection.copy_records_to_table = AsyncMock()
+        connection = AsyncMock()
+        connection.get_raw_connection.return_value = raw_connection
+        db.connection.return_value = connection
+
+        await insert_user_chunk(db, self._records())
+
+        copy = raw_connection.driver_connection.copy_records_to_table
+        copy.assert_awaited_once()
+        assert copy.await_args.args[0] == "users"
+        records = copy.await_args.kwargs["records"]
+        assert len(records) == 2
+        assert records[0][-1] == "employee"
+        db.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_empty_chunk_is_noop(self):
+        db = self._mock_db("sqlite", "aiosqlite")
+
+        await insert_user_chunk(db, [])
+
+        db.execute.assert_not_awaited()
+
+
+class TestDuplicateCheck:
+    """重複チェックのテスト"""
+
+    @staticmethod
+    def _mock_db(existing: set) -> AsyncMock:
+        """IN句に含まれるメールアドレスのうち登録済みのものを返すDB"""
+        db = AsyncMock()
+        db.get_bind = MagicMock(return_value=MagicMock(dialect=MagicMock(driver="aiosqlite")))
+        db.get_bind.return_value.dialect.name = "sqlite"
+
+        async def execute(statement):
+            batch = statement.whereclause.right.value
+            result = MagicMock()
+            result.scalars.return_value.all.return_value = [e for e in batch if e in existing]
+            return result
+
+        db.execute.side_effect = execute
+        return db
+
+    @pytest.mark.asyncio
+    async def test_selects_only_lowercased_email(self):
+        """Userオブジェクトではなく lower(email) のみを取得する"""
+        db = self._mock_db(set())
+
+        await find_existing_emails(db, ["User@Example.com"])
+
+        statement = db.execute.await_args.args[0]
+        sql = str(statement)
+        assert sql.startswith("SELECT lower(users.email)")
+        assert "users.hashed_password" not in sql
+        assert statement.whereclause.right.value == ["user@example.com"]
+
+    @pytest.mark.asyncio
+    async def test_batches_in_clause(self, monkeypatch):
+        monkeypatch.setattr(csv_import_service, "CSV_DUPLICATE_CHECK_BATCH_SIZE", 2)
+        db = self._mock_db({"user3@example.com"})
+        emails = [f"user{i}@example.com" for i in range(5)] + ["USER0@example.com"]
+
+        existing = await find_existing_emails(db, emails)
+
+        assert existing == {"user3@example.com"}
+        assert db.execute.await_count == 3  # 重複を除いた5件を2件ずつ
+
+    @pytest.mark.asyncio
+    async def test_empty(self):
+        db = self._mock_db(set())
+
+        assert await find_existing_emails(db, []) == set()
+        db.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_check_duplicates(self):
+        db = self._mock_db({"exists@example.com"})
+        rows = [
+            {"row_number": 2, "email": "new@example.com"},
+            {"row_number": 3, "email": "NEW@example.com"},
+            {"row_number": 4, "email": "Exists@example.com"},
+        ]
+
+        csv_duplicates, db_duplicates = await check_duplicates(rows, "company", db)
+
+        assert [d.row_number for d in csv_duplicates] == [3]
+        assert [d.row_number for d in db_duplicates] == [4]
+
+
+class TestResolveDepartments:
+    """部署の一括解決のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_creates_missing_departments_in_one_insert(self):
+        company_id = uuid.uuid4()
+        existing_id = uuid.uuid4()
+        db = AsyncMock()
+        db.get_bind = MagicMock(return_value=MagicMock(dialect=MagicMock(driver="aiosqlite")))
+        db.get_bind.return_value.dialect.name = "sqlite"
+        select_result = MagicMock()
+        select_result.all.return_value = [("営業部", existing_id)]
+        db.execute.side_effect = [select_result, MagicMock()]
+
+        department_ids = await resolve_departments(db, company_id, ["営業部", "開発部", "開発部", ""])
+
+        assert department_ids["営業部"] == existing_id
+        assert isinstance(department_ids["開発部"], uuid.UUID)
+        assert db.execute.await_count == 2  # 既存部署の取得 + 一括INSERT
+        inserted = db.execute.await_args_list[1].args[1]
+        assert inserted == [{"id": department_ids["開発部"], "company_id": company_id, "name": "開発部"}]
+
+    @pytest.mark.asyncio
+    async def test_no_departments(self):
+        db = AsyncMock()
+
+        assert await resolve_departments(db, uuid.uuid4(), []) == {}
+        db.execute.assert_not_awaited()
+
+    def test_build_user_records_sets_department_id(self):
+        department_id = uuid.uuid4()
+
+        records = build_user_records(
+            [{"email": "a@example.com", "department": "営業部"}, {"email": "b@example.com", "department": "未登録"}],
+            ["h1", "h2"], uuid.uuid4(), {"営業部": department_id}
+        )
+
+        assert [r["department_id"] for r in records] == [department_id, None]
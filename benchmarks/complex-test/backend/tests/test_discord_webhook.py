@@ -0,0 +1,51 @@
+"""
+Discord Webhook（AI相談モード）のテスト
+"""
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.routers import discord_webhook
+from app.services.chat_pipeline import ChatTurn
+
+
+class TestHandleChatMessage:
+    """相談モードのメッセージ処理"""
+
+    @pytest.fixture
+    def mocks(self, monkeypatch):
+        self.linked_user_id = uuid.uuid4()
+        result = MagicMock(scalar_one_or_none=MagicMock(return_value=self.linked_user_id))
+        self.db = MagicMock(execute=AsyncMock(return_value=result))
+        session = MagicMock(
+            __aenter__=AsyncMock(return_value=self.db),
+            __aexit__=AsyncMock(return_value=False),
+        )
+        monkeypatch.setattr(discord_webhook, "AsyncSessionLocal", MagicMock(return_value=session))
+
+        self.run_turn = AsyncMock(return_value=ChatTurn(reply="大変でしたね。", analysis={}))
+        self.send = AsyncMock()
+        monkeypatch.setattr(discord_webhook, "run_chat_turn", self.run_turn)
+        monkeypatch.setattr(discord_webhook.discord_service, "send_message", self.send)
+        monkeypatch.setattr(discord_webhook, "user_sessions", {})
+
+    @pytest.mark.asyncio
+    async def test_linked_user_score_is_saved(self, mocks):
+        """連携済みユーザーはDiscord IDから特定し、日次スコアを保存する"""
+        await discord_webhook.handle_chat_message("C1", "1234", "残業続きで疲れました")
+
+        self.run_turn.assert_awaited_once()
+        assert self.run_turn.await_args.kwargs["db"] is self.db
+        assert self.run_turn.await_args.kwargs["user_id"] == self.linked_user_id
+        self.send.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_end_does_not_open_session(self, mocks):
+        discord_webhook.user_sessions["1234"] = {"mode": "chat"}
+
+        await discord_webhook.handle_chat_message("C1", "1234", "終了")
+
+        discord_webhook.AsyncSessionLocal.assert_not_called()
+        self.run_turn.assert_not_awaited()
+        assert "1234" not in discord_webhook.user_sessions
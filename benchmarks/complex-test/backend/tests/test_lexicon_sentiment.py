@@ -0,0 +1,140 @@
+"""
+辞書ベース感情分析のテスト
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.ai_service import analyze_sentiment, sentiment_cache
+from app.services.lexicon_sentiment import merge_risk_signals, score_text
+
+
+class TestScoreText:
+    """スコアリングのテスト"""
+
+    def test_polarity(self):
+        assert score_text("疲れた").sentiment < 0
+        assert score_text("元気です！").sentiment > 0
+        assert score_text("会議でした").sentiment == 0.0
+        assert score_text("会議でした").hits == 0
+
+    def test_negation_flips_polarity(self):
+        assert score_text("楽しくない").sentiment < 0
+        assert score_text("大丈夫じゃない").sentiment < 0
+        assert score_text("大丈夫じゃない").is_obvious is False
+
+    def test_intensifier(self):
+        assert score_text("とても疲れた").sentiment < score_text("疲れた").sentiment
+
+    def test_risk_flags_and_topics(self):
+        result = score_text("残業続きでよく眠れなかった")
+
+        assert "overwork" in result.risk_flags
+        assert "sleep_deprivation" in result.risk_flags
+        assert "業務量" in result.topics
+        assert "睡眠" in result.topics
+        assert result.urgency >= 3
+        assert result.is_obvious is False  # リスク検出時はLLMで分析
+
+    def test_urgent_signal(self):
+        result = score_text("もう消えたい")
+
+        assert result.urgent
+        assert result.urgency == 5
+        assert "相談" in result.reply()
+
+    def test_merge_keeps_urgent_signals(self):
+        """LLMが見落としたリスクを補完する"""
+        analysis = {"sentiment": -0.2, "urgency": 1, "risk_flags": []}
+
+        merged = merge_risk_signals(analysis, score_text("もう消えたい"))
+
+        assert merged["urgency"] == 5
+        assert merged["risk_flags"] == ["self_harm_risk"]
+
+
+class TestAnalyzeSentimentFastPath:
+    """analyze_sentiment の即答・期限切れ時の代替のテスト"""
+
+    def _response(self, **overrides):
+        analysis = {"sentiment": -0.3, "topics": [], "urgency": 1, "reply_suggestion": "大変でしたね", "risk_flags": []}
+        analysis.update(overrides)
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=json.dumps(analysis)))])
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_obvious_message_skips_llm(self, mock_client):
+        create = AsyncMock()
+        mock_client.return_value.chat.completions.create = create
+
+        result = await analyze_sentiment("疲れた")
+
+        assert result["source"] == "lexicon"
+        assert result["sentiment"] < 0
+        create.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.SENTIMENT_LLM_DEADLINE_SECONDS", 0.01)
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_slow_llm_falls_back_to_lexicon(self, mock_client):
+        """期限内に応答がなければ辞書ベースで応答し、後から届いた結果はキャッシュする"""
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.05)
+            return self._response()
+
+        mock_client.return_value.chat.completions.create = slow_create
+        message = "最近残業続きで、上司ともうまくいかなくてしんどいです"
+
+        result = await analyze_sentiment(message)
+
+        assert result["source"] == "lexicon_fallback"
+        assert result["sentiment"] < 0
+        assert "overwork" in result["risk_flags"]
+
+        await asyncio.sleep(0.1)
+        assert sentiment_cache.stats()["size"] == 1
+        cached = await analyze_sentiment(message)
+        assert cached["source"] == "cache"
+        assert cached["reply_suggestion"] == "大変でしたね"
+        assert "overwork" in cached["risk_flags"]
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.SENTIMENT_LLM_DEADLINE_SECONDS", 0.01)
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_slow_llm_with_history_is_cancelled(self, mock_client, fresh_llm_governor):
+        """会話履歴つきの分析は結果をキャッシュしないため、期限後にLLM呼び出しを中止する"""
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow_create(**kwargs):
+            started.set()
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return self._response()
+
+        mock_client.return_value.chat.completions.create = slow_create
+        history = [{"role": "user", "content": "こんにちは"}, {"role": "assistant", "content": "こんにちは"}]
+
+        result = await analyze_sentiment("最近残業続きでしんどいです", conversation_history=history)
+
+        assert result["source"] == "lexicon_fallback"
+        assert started.is_set()
+        await asyncio.wait_for(cancelled.wait(), 0.5)
+        await asyncio.sleep(0)
+        assert fresh_llm_governor.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_llm_error_keeps_local_signals(self, mock_client):
+        mock_client.return_value.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+
+        result = await analyze_sentiment("最近ずっと眠れないし、もう限界かもしれません")
+
+        assert result["source"] == "lexicon_fallback"
+        assert result["urgency"] >= 3
+        assert "sleep_deprivation" in result["risk_flags"]
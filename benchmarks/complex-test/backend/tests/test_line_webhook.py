@@ -0,0 +1,74 @@
+"""
+LINE Webhook（AI相談モード）のテスト
+"""
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.routers import line_webhook
+from app.services.chat_pipeline import ChatTurn
+
+
+class TestHandleChatMessage:
+    """相談モードのメッセージ処理"""
+
+    @pytest.fixture
+    def mocks(self, monkeypatch):
+        self.analysis = {"sentiment": -0.6, "topics": ["業務量"], "urgency": 3,
+                         "reply_suggestion": "大変でしたね。", "risk_flags": []}
+        self.run_turn = AsyncMock(return_value=ChatTurn(reply="大変でしたね。", analysis=self.analysis))
+        self.counselor = AsyncMock(return_value="それは大変でしたね。少し休めていますか？")
+        self.reply = AsyncMock()
+        monkeypatch.setattr(line_webhook, "run_chat_turn", self.run_turn)
+        monkeypatch.setattr(line_webhook, "generate_counselor_response", self.counselor)
+        monkeypatch.setattr(line_webhook.line_service, "reply_message", self.reply)
+        monkeypatch.setattr(line_webhook, "user_sessions", {})
+
+        result = MagicMock(scalar_one_or_none=MagicMock(return_value=uuid.uuid4()))
+        self.db = MagicMock(execute=AsyncMock(return_value=result))
+
+    @pytest.mark.asyncio
+    async def test_reply_is_counselor_response(self, mocks):
+        await line_webhook.handle_chat_message("token", "U1", "残業続きで疲れました", self.db)
+
+        self.run_turn.assert_awaited_once()
+        self.counselor.assert_awaited_once()
+        assert self.reply.await_args.args[1][0]["text"] == "それは大変でしたね。少し休めていますか？"
+
+        history = line_webhook.user_sessions["U1"]["history"]
+        assert history[-1] == {"role": "assistant", "content": "それは大変でしたね。少し休めていますか？"}
+
+    @pytest.mark.asyncio
+    async def test_analysis_runs_concurrently_with_counselor(self, mocks):
+        """感情分析の完了を待たずにカウンセラー応答の生成を開始する"""
+        analysis_started = asyncio.Event()
+        counselor_started = asyncio.Event()
+
+        async def run_turn(*args, **kwargs):
+            analysis_started.set()
+            await asyncio.wait_for(counselor_started.wait(), timeout=1)
+            return ChatTurn(reply="大変でしたね。", analysis=self.analysis)
+
+        async def counselor(*args, **kwargs):
+            counselor_started.set()
+            await asyncio.wait_for(analysis_started.wait(), timeout=1)
+            return "それは大変でしたね。"
+
+        self.run_turn.side_effect = run_turn
+        self.counselor.side_effect = counselor
+
+        await line_webhook.handle_chat_message("token", "U1", "残業続きで疲れました", self.db)
+
+        assert self.reply.await_args.args[1][0]["text"] == "それは大変でしたね。"
+
+    @pytest.mark.asyncio
+    async def test_blocked_message_is_not_sent_to_counselor(self, mocks, monkeypatch):
+        monkeypatch.setattr(line_webhook, "should_block_message", lambda text: True)
+        self.run_turn.return_value = ChatTurn(reply="不適切な内容が検出されました。", analysis={}, blocked=True)
+
+        await line_webhook.handle_chat_message("token", "U1", "暴力", self.db)
+
+        self.counselor.assert_not_awaited()
+        assert self.reply.await_args.args[1][0]["text"] == "不適切な内容が検出されました。"
@@ -0,0 +1,244 @@
+"""
+LLM呼び出しガバナーのテスト
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.ai_service import analyze_sentiment
+from app.services.llm_governor import CircuitState, LLMGovernor, LLMPriority, LLMUnavailableError
+
+
+class APIError(Exception):
+    """OpenAIのAPIStatusError相当（status_code / response.headers を持つ）"""
+
+    def __init__(self, status_code: int, retry_after: str = None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class TestConcurrency:
+    """同時実行数と優先度のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_global_cap(self):
+        governor = LLMGovernor(max_concurrency=2)
+        in_flight = 0
+        max_in_flight = 0
+
+        async def call():
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        await asyncio.gather(*(governor.call(LLMPriority.INTERACTIVE, call) for _ in range(6)))
+
+        assert max_in_flight == 2
+        assert governor.stats()["completed"] == 6
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_runs_first(self):
+        governor = LLMGovernor(max_concurrency=1)
+        started, release = asyncio.Event(), asyncio.Event()
+        order = []
+
+        async def blocker():
+            started.set()
+            await release.wait()
+
+        async def record(name):
+            order.append(name)
+
+        running = asyncio.create_task(governor.call(LLMPriority.INTERACTIVE, blocker))
+        await started.wait()
+        waiting = [
+            asyncio.create_task(governor.call(priority, record, priority.name))
+            for priority in (LLMPriority.BATCH, LLMPriority.DASHBOARD, LLMPriority.INTERACTIVE)
+        ]
+        await asyncio.sleep(0)
+        assert governor.stats()["queued"] == {"interactive": 1, "dashboard": 1, "batch": 1}
+
+        release.set()
+        await asyncio.gather(running, *waiting)
+
+        assert order == ["INTERACTIVE", "DASHBOARD", "BATCH"]
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        governor = LLMGovernor(max_concurrency=1, queue_timeout=0.01)
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def blocker():
+            started.set()
+            await release.wait()
+
+        running = asyncio.create_task(governor.call(LLMPriority.BATCH, blocker))
+        await started.wait()
+
+        with pytest.raises(LLMUnavailableError):
+            await governor.call(LLMPriority.INTERACTIVE, AsyncMock())
+
+        release.set()
+        await running
+        assert governor.stats()["timed_out"] == 1
+        assert governor.stats()["queued"]["interactive"] == 0
+
+
+class TestRateLimitBackoff:
+    """429時の適応的バックオフのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_halves_limit_and_waits(self):
+        governor = LLMGovernor(max_concurrency=8)
+
+        with pytest.raises(APIError):
+            await governor.call(LLMPriority.INTERACTIVE, AsyncMock(side_effect=APIError(429, retry_after="0.05")))
+
+        assert governor.limit == 4
+        assert governor.stats()["backoff_remaining_seconds"] > 0
+
+        started_at = asyncio.get_running_loop().time()
+        await governor.call(LLMPriority.INTERACTIVE, AsyncMock())
+        assert asyncio.get_running_loop().time() - started_at >= 0.04
+        assert governor.limit == 5  # 成功で1ずつ回復
+
+
+class TestCircuitBreaker:
+    """サーキットブレーカーのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_opens_and_recovers(self):
+        now = [1000.0]
+        governor = LLMGovernor(failure_threshold=2, reset_seconds=30, clock=lambda: now[0])
+        failing = AsyncMock(side_effect=APIError(500))
+
+        for _ in range(2):
+            with pytest.raises(APIError):
+                await governor.call(LLMPriority.INTERACTIVE, failing)
+        assert governor.state == CircuitState.OPEN
+
+        # 遮断中はプロバイダーを呼ばずに即座に失敗
+        func = AsyncMock()
+        with pytest.raises(LLMUnavailableError):
+            await governor.call(LLMPriority.INTERACTIVE, func)
+        func.assert_not_awaited()
+
+        # 一定時間後に1件だけ試行し、成功すれば復旧
+        now[0] += 31
+        await governor.call(LLMPriority.INTERACTIVE, func)
+        assert governor.state == CircuitState.CLOSED
+        assert governor.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_trip(self):
+        governor = LLMGovernor(failure_threshold=1)
+
+        with pytest.raises(APIError):
+            await governor.call(LLMPriority.INTERACTIVE, AsyncMock(side_effect=APIError(400)))
+
+        assert governor.state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_open_circuit_uses_fallback(self, mock_client, fresh_llm_governor):
+        """遮断中は既存のフォールバック結果を返す"""
+        create = AsyncMock()
+        mock_client.return_value.chat.completions.create = create
+        fresh_llm_governor.state = CircuitState.OPEN
+        fresh_llm_governor._opened_at = fresh_llm_governor._clock()
+
+        result = await analyze_sentiment("最近眠れません")
+
+        assert result["sentiment"] == 0.0
+        assert result["reply_suggestion"] == "お疲れ様です。"
+        create.assert_not_awaited()
+
+
+class _Stream:
+    """ストリーミング応答相当（チャンクを順に返し、途中で例外も送出できる）"""
+
+    def __init__(self, chunks, error=None):
+        self._chunks = chunks
+        self._error = error
+        self.response = MagicMock(aclose=AsyncMock())
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            yield chunk
+        if self._error is not None:
+            raise self._error
+
+
+class TestStreaming:
+    """ストリーミング呼び出しの実行枠と成否の記録"""
+
+    @pytest.mark.asyncio
+    async def test_slot_is_held_until_stream_is_consumed(self):
+        governor = LLMGovernor(max_concurrency=1)
+        stream = _Stream(["a", "b"])
+        in_flight = []
+
+        async for _ in governor.stream(LLMPriority.INTERACTIVE, AsyncMock(return_value=stream)):
+            in_flight.append(governor.stats()["in_flight"])
+
+        assert in_flight == [1, 1]
+        assert governor.stats()["in_flight"] == 0
+        assert governor.stats()["completed"] == 1
+        stream.response.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_streams_respect_cap(self):
+        governor = LLMGovernor(max_concurrency=1)
+        second_started = asyncio.Event()
+
+        async def consume(stream, on_start=None):
+            async for _ in governor.stream(LLMPriority.INTERACTIVE, AsyncMock(return_value=stream)):
+                if on_start is not None:
+                    on_start.set()
+                await asyncio.sleep(0.01)
+
+        first = asyncio.create_task(consume(_Stream(["a", "b", "c"])))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(consume(_Stream(["d"]), second_started))
+
+        # 1件目のストリームが終わるまで2件目は開始しない
+        await asyncio.sleep(0.015)
+        assert not second_started.is_set()
+        assert governor.stats()["queued"]["interactive"] == 1
+
+        await asyncio.gather(first, second)
+        assert second_started.is_set()
+
+    @pytest.mark.asyncio
+    async def test_mid_stream_failure_trips_circuit(self):
+        governor = LLMGovernor(failure_threshold=1)
+        stream = _Stream(["a"], error=APIError(500))
+
+        received = []
+        with pytest.raises(APIError):
+            async for chunk in governor.stream(LLMPriority.INTERACTIVE, AsyncMock(return_value=stream)):
+                received.append(chunk)
+
+        assert received == ["a"]
+        assert governor.state == CircuitState.OPEN
+        assert governor.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_closing_early_releases_slot(self):
+        """呼び出し元が途中で閉じた場合は、成否を記録せずに実行枠を解放する"""
+        governor = LLMGovernor()
+        stream = _Stream(["a", "b", "c"])
+        chunks = governor.stream(LLMPriority.INTERACTIVE, AsyncMock(return_value=stream))
+
+        assert await chunks.__anext__() == "a"
+        assert governor.stats()["in_flight"] == 1
+        await chunks.aclose()
+
+        assert governor.stats()["in_flight"] == 0
+        assert governor.stats()["completed"] == 0
+        assert governor.stats()["failed"] == 0
+        stream.response.aclose.assert_awaited_once()
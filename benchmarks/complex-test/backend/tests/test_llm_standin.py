@@ -0,0 +1,159 @@
+"""
+OpenAI API のローカル代替（記録・再生）のテスト
+"""
+import json
+import random
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, InternalServerError, NotFoundError
+
+from app.services.llm_standin import (
+    LatencyModel,
+    Recording,
+    RecordingStore,
+    RecordingTransport,
+    ReplayTransport,
+    prompt_key,
+    request_key,
+)
+
+SENTIMENT_MESSAGES = [
+    {"role": "system", "content": "感情分析をしてください"},
+    {"role": "user", "content": "疲れました"},
+]
+
+
+def _client(transport: httpx.AsyncBaseTransport) -> AsyncOpenAI:
+    return AsyncOpenAI(
+        api_key="test",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=transport),
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecordingStore(str(tmp_path / "recordings.jsonl"))
+    body = {"model": "gpt-4o-mini", "messages": SENTIMENT_MESSAGES}
+    store.append(Recording(
+        key=request_key(body), prompt=prompt_key(body), model="gpt-4o-mini",
+        content=json.dumps({"sentiment": -0.6}),
+    ))
+    return store
+
+
+class TestLatencyModel:
+    """遅延の分布の指定"""
+
+    def test_fixed_and_uniform(self):
+        rng = random.Random(0)
+        assert LatencyModel("fixed:200").sample(rng) == 0.2
+        assert 0.1 <= LatencyModel("uniform:100:300").sample(rng) <= 0.3
+
+    def test_lognormal_median(self):
+        rng = random.Random(0)
+        model = LatencyModel("lognormal:500:0.5")
+        samples = sorted(model.sample(rng) for _ in range(2000))
+        assert 0.45 < samples[1000] < 0.55
+
+    def test_invalid_spec(self):
+        with pytest.raises(ValueError):
+            LatencyModel("normal:100")
+
+
+class TestReplayTransport:
+    """記録した応答の再生"""
+
+    @pytest.mark.asyncio
+    async def test_replays_recorded_response(self, store):
+        client = _client(ReplayTransport(store, LatencyModel("fixed:0")))
+
+        response = await client.chat.completions.create(model="gpt-4o-mini", messages=SENTIMENT_MESSAGES)
+
+        assert json.loads(response.choices[0].message.content) == {"sentiment": -0.6}
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_same_system_prompt(self, store):
+        """同一リクエストの記録がなければ、同じシステムプロンプトの記録を返す"""
+        client = _client(ReplayTransport(store, LatencyModel("fixed:0")))
+        messages = [SENTIMENT_MESSAGES[0], {"role": "user", "content": "眠れません"}]
+
+        response = await client.chat.completions.create(model="gpt-4o-mini", messages=messages)
+
+        assert json.loads(response.choices[0].message.content) == {"sentiment": -0.6}
+
+    @pytest.mark.asyncio
+    async def test_unknown_prompt_is_not_found(self, store):
+        client = _client(ReplayTransport(store, LatencyModel("fixed:0")))
+
+        with pytest.raises(NotFoundError):
+            await client.chat.completions.create(
+                model="gpt-4o-mini", messages=[{"role": "system", "content": "別の用途"}]
+            )
+
+    @pytest.mark.asyncio
+    async def test_injected_errors(self, store):
+        client = _client(ReplayTransport(store, LatencyModel("fixed:0"), error_rate=1.0, error_statuses=(500,)))
+
+        with pytest.raises(InternalServerError):
+            await client.chat.completions.create(model="gpt-4o-mini", messages=SENTIMENT_MESSAGES)
+
+    @pytest.mark.asyncio
+    async def test_streams_recorded_response_in_chunks(self, store):
+        client = _client(ReplayTransport(
+            store, LatencyModel("fixed:0"), stream_interval=0, stream_chunk_chars=5
+        ))
+
+        stream = await client.chat.completions.create(
+            model="gpt-4o-mini", messages=SENTIMENT_MESSAGES, stream=True
+        )
+        chunks = [chunk.choices[0].delta.content async for chunk in stream if chunk.choices[0].delta.content]
+
+        assert len(chunks) > 1
+        assert json.loads("".join(chunks)) == {"sentiment": -0.6}
+
+
+class TestRecordingTransport:
+    """OpenAI APIの応答の記録"""
+
+    @pytest.mark.asyncio
+    async def test_records_and_replays(self, tmp_path):
+        def upstream(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={
+                "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "お疲れ様です。"},
+                             "finish_reason": "stop"}],
+            })
+
+        path = str(tmp_path / "recordings.jsonl")
+        client = _client(RecordingTransport(RecordingStore(path), httpx.MockTransport(upstream)))
+
+        response = await client.chat.completions.create(model="gpt-4o-mini", messages=SENTIMENT_MESSAGES)
+        assert response.choices[0].message.content == "お疲れ様です。"
+
+        replay = _client(ReplayTransport(RecordingStore(path), LatencyModel("fixed:0")))
+        response = await replay.chat.completions.create(model="gpt-4o-mini", messages=SENTIMENT_MESSAGES)
+        assert response.choices[0].message.content == "お疲れ様です。"
+
+    @pytest.mark.asyncio
+    async def test_records_streamed_response(self, tmp_path):
+        def upstream(request: httpx.Request) -> httpx.Response:
+            events = [
+                {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o-mini",
+                 "choices": [{"index": 0, "delta": {"content": part}, "finish_reason": None}]}
+                for part in ("お疲れ", "様です。")
+            ]
+            body = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body.encode())
+
+        store = RecordingStore(str(tmp_path / "recordings.jsonl"))
+        client = _client(RecordingTransport(store, httpx.MockTransport(upstream)))
+
+        stream = await client.chat.completions.create(
+            model="gpt-4o-mini", messages=SENTIMENT_MESSAGES, stream=True
+        )
+        chunks = [chunk.choices[0].delta.content async for chunk in stream]
+
+        assert "".join(chunks) == "お疲れ様です。"
+        assert store.find({"model": "gpt-4o-mini", "messages": SENTIMENT_MESSAGES}, random.Random()).content == "お疲れ様です。"
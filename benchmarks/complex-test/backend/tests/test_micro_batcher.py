@@ -0,0 +1,84 @@
+"""
+マイクロバッチ処理のテスト
+"""
+import asyncio
+
+import pytest
+
+from app.services.micro_batcher import MicroBatcher
+
+
+class TestMicroBatcher:
+    """リクエストをまとめて処理し、結果を呼び出し元に返すテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_items_share_one_batch(self):
+        calls = []
+
+        async def handler(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(handler, max_batch_size=10, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        assert results == [0, 2, 4, 6, 8]
+        assert calls == [[0, 1, 2, 3, 4]]
+        assert batcher.stats()["average_batch_size"] == 5
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_without_waiting(self):
+        """件数の上限に達したら待機時間を待たずに処理する"""
+        calls = []
+
+        async def handler(items):
+            calls.append(list(items))
+            return items
+
+        batcher = MicroBatcher(handler, max_batch_size=3, max_wait_seconds=10)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(3))), timeout=1
+        )
+
+        assert results == [0, 1, 2]
+        assert calls == [[0, 1, 2]]
+
+    @pytest.mark.asyncio
+    async def test_overflow_goes_to_next_batch(self):
+        calls = []
+
+        async def handler(items):
+            calls.append(list(items))
+            return items
+
+        batcher = MicroBatcher(handler, max_batch_size=2, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        assert results == [0, 1, 2, 3, 4]
+        assert calls == [[0, 1], [2, 3], [4]]
+
+    @pytest.mark.asyncio
+    async def test_handler_error_is_raised_to_every_caller(self):
+        async def handler(items):
+            raise RuntimeError("upstream error")
+
+        batcher = MicroBatcher(handler, max_batch_size=10, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert batcher.stats()["failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_result_count_mismatch_is_an_error(self):
+        async def handler(items):
+            return items[:1]
+
+        batcher = MicroBatcher(handler, max_batch_size=10, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(2)), return_exceptions=True)
+
+        assert all(isinstance(r, ValueError) for r in results)
@@ -0,0 +1,130 @@
+"""
+PDF生成サービスのテスト
+"""
+import os
+import zipfile
+from datetime import date
+from io import BytesIO
+
+import pytest
+
+from app.services import pdf_generator
+from app.services.pdf_generator import (
+    create_output_buffer,
+    iter_pdf_chunks,
+    get_department_report_pdf_generator,
+    render_department_reports,
+    render_department_pack,
+    render_department_archive,
+    remove_rendered_files,
+)
+
+
+class TestOutputBuffer:
+    """PDF出力バッファのテスト"""
+
+    def test_spills_to_disk_above_threshold(self, monkeypatch):
+        """閾値を超えると一時ファイルに退避される"""
+        monkeypatch.setattr(pdf_generator, "PDF_SPOOL_MAX_BYTES", 1024)
+        buffer = create_output_buffer()
+
+        buffer.write(b"x" * 512)
+        assert buffer._rolled is False
+
+        buffer.write(b"x" * 1024)
+        assert buffer._rolled is True
+        buffer.close()
+
+    def test_iter_pdf_chunks(self):
+        """チャンク単位で全データを読み出し、最後にクローズする"""
+        data = bytes(range(256)) * 10
+        buffer = BytesIO(data)
+
+        chunks = list(iter_pdf_chunks(buffer, chunk_size=100))
+
+        assert b"".join(chunks) == data
+        assert all(len(c) <= 100 for c in chunks)
+        assert buffer.closed is True
+
+    def test_generated_report_streams_valid_pdf(self):
+        """生成したPDFをストリーミングで読み出せる"""
+        buffer = get_department_report_pdf_generator().generate_department_report(
+            company_name="テスト株式会社",
+            department_name="開発部",
+            period=date(2026, 1, 1),
+            employee_count=10,
+            high_stress_count=2,
+            average_score=60.0,
+            job_stress_avg=2.5,
+            stress_reaction_avg=2.0,
+            support_avg=3.0,
+            satisfaction_avg=3.0,
+        )
+
+        content = b"".join(iter_pdf_chunks(buffer))
+
+        assert content.startswith(b"%PDF")
+        assert content.rstrip().endswith(b"%%EOF")
+
+
+class TestDepartmentReportPack:
+    """部署別レポート一括生成のテスト"""
+
+    @staticmethod
+    def _report_params(department_name: str) -> dict:
+        return {
+            "company_name": "テスト株式会社",
+            "department_name": department_name,
+            "period": date(2026, 1, 1),
+            "employee_count": 5,
+            "high_stress_count": 1,
+            "average_score": 55.0,
+            "job_stress_avg": 3.2,
+            "stress_reaction_avg": 2.1,
+            "support_avg": 1.5,
+            "satisfaction_avg": 2.8,
+        }
+
+    @pytest.mark.asyncio
+    async def test_render_department_reports_to_files(self):
+        """部署ごとのPDFを並列描画し、一時ファイルに書き出す"""
+        reports = [self._report_params("開発部"), self._report_params("営業部")]
+
+        paths = await render_department_reports(reports)
+        try:
+            assert len(paths) == 2
+            for path in paths:
+                with open(path, "rb") as f:
+                    assert f.read(4) == b"%PDF"
+        finally:
+            remove_rendered_files(paths)
+
+        assert not any(os.path.exists(path) for path in paths)
+
+    @pytest.mark.asyncio
+    async def test_render_department_archive(self, monkeypatch):
+        """部署ごとのPDFをZIPにまとめ、一時ファイルは削除する"""
+        removed = []
+        def remove(paths):
+            removed.extend(paths)
+            remove_rendered_files(paths)
+        monkeypatch.setattr(pdf_generator, "remove_rendered_files", remove)
+        reports = [self._report_params("開発部"), self._report_params("営業部")]
+
+        archive = await render_department_archive(reports, ["a.pdf", "b.pdf"])
+
+        with zipfile.ZipFile(archive) as zf:
+            assert zf.namelist() == ["a.pdf", "b.pdf"]
+            assert all(zf.read(name).startswith(b"%PDF") for name in zf.namelist())
+        assert len(removed) == 2
+        assert not any(os.path.exists(path) for path in removed)
+
+    @pytest.mark.asyncio
+    async def test_render_department_pack_merges_into_one_pdf(self):
+        """全部署を1つのPDFに結合できる"""
+        reports = [self._report_params("開発部"), self._report_params("営業部")]
+
+        data = b"".join(iter_pdf_chunks(await render_department_pack(reports)))
+
+        assert data.startswith(b"%PDF")
+        assert b"/Count 2" in data  # 1部署1ページ
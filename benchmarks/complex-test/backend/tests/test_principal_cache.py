@@ -0,0 +1,137 @@
+"""
+プリンシパルキャッシュのテスト
+"""
+import os
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-for-testing-only")
+
+from app.db.models import User, UserRole
+from app.services import principal_cache as principal_cache_module
+from app.services.principal_cache import Principal, PrincipalCache
+
+
+def _principal(**overrides) -> Principal:
+    params = dict(
+        id=uuid.uuid4(),
+        company_id=uuid.uuid4(),
+        department_id=None,
+        role=UserRole.EMPLOYEE,
+        email="user@example.com",
+    )
+    params.update(overrides)
+    return Principal(**params)
+
+
+class TestPrincipalCache:
+    """TTL付きLRUキャッシュのテスト"""
+
+    def test_hit_and_miss(self):
+        cache = PrincipalCache(ttl_seconds=60, max_size=10)
+        principal = _principal()
+
+        assert cache.get(principal.id) is None
+        cache.set(principal)
+        assert cache.get(principal.id) == principal
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_expires_after_ttl(self, monkeypatch):
+        cache = PrincipalCache(ttl_seconds=10, max_size=10)
+        principal = _principal()
+        now = [1000.0]
+        monkeypatch.setattr(principal_cache_module.time, "monotonic", lambda: now[0])
+
+        cache.set(principal)
+        now[0] += 11
+
+        assert cache.get(principal.id) is None
+        assert cache.stats()["size"] == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = PrincipalCache(ttl_seconds=60, max_size=2)
+        first, second, third = _principal(), _principal(), _principal()
+
+        cache.set(first)
+        cache.set(second)
+        cache.get(first.id)  # firstを最近使用に
+        cache.set(third)
+
+        assert cache.get(second.id) is None
+        assert cache.get(first.id) == first
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate(self):
+        cache = PrincipalCache(ttl_seconds=60, max_size=10)
+        principal = _principal()
+        cache.set(principal)
+
+        cache.invalidate(principal.id)
+
+        assert cache.get(principal.id) is None
+        assert cache.stats()["invalidations"] == 1
+
+
+class TestInvalidationHooks:
+    """ユーザー更新時の自動無効化のテスト"""
+
+    def test_updated_user_is_invalidated_on_flush_and_commit(self, monkeypatch):
+        cache = PrincipalCache(ttl_seconds=60, max_size=10)
+        monkeypatch.setattr(principal_cache_module, "principal_cache", cache)
+        principal = _principal(role=UserRole.ADMIN)
+        cache.set(principal)
+        session = MagicMock(dirty=[User(id=principal.id)], deleted=[], info={})
+
+        principal_cache_module._invalidate_flushed_users(session, None)
+        assert cache.get(principal.id) is None
+
+        # フラッシュ後・コミット前に古い値が再キャッシュされてもコミット時に破棄
+        cache.set(principal)
+        principal_cache_module._invalidate_committed_users(session)
+        assert cache.get(principal.id) is None
+        assert session.info == {}
+
+    def test_other_models_are_ignored(self, monkeypatch):
+        cache = PrincipalCache(ttl_seconds=60, max_size=10)
+        monkeypatch.setattr(principal_cache_module, "principal_cache", cache)
+        principal = _principal()
+        cache.set(principal)
+        session = MagicMock(dirty=[object()], deleted=[], info={})
+
+        principal_cache_module._invalidate_flushed_users(session, None)
+
+        assert cache.get(principal.id) == principal
+
+
+class TestGetCurrentUser:
+    """get_current_user のキャッシュ利用のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_second_request_is_served_from_cache(self, monkeypatch):
+        from app.routers import auth
+        from app.utils.security import create_access_token
+
+        cache = PrincipalCache(ttl_seconds=60, max_size=10)
+        monkeypatch.setattr(auth, "principal_cache", cache)
+
+        user_id, company_id = uuid.uuid4(), uuid.uuid4()
+        row = MagicMock(id=user_id, company_id=company_id, department_id=None,
+                        role=UserRole.ADMIN, email="admin@example.com")
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(one_or_none=MagicMock(return_value=row))
+        token = create_access_token({"sub": str(user_id), "role": "admin"})
+
+        first = await auth.get_current_user(authorization=f"Bearer {token}", access_token=None, db=db)
+        second = await auth.get_current_user(authorization=f"Bearer {token}", access_token=None, db=db)
+
+        assert first == second
+        assert first.company_id == company_id
+        assert first.role == UserRole.ADMIN
+        assert db.execute.await_count == 1
+        assert cache.stats()["hits"] == 1
@@ -0,0 +1,144 @@
+"""
+レート制限サービスのテスト
+"""
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.models import RateLimitCounter
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import (
+    DatabaseRateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimiter,
+    enforce_rate_limit,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSlidingWindow:
+    """スライディングウィンドウカウンターのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_blocks_after_limit(self):
+        limiter = RateLimiter(MemoryRateLimitBackend(), clock=FakeClock(1000.0))
+
+        results = [await limiter.hit("k", 3, 60) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert [r.remaining for r in results[:3]] == [2, 1, 0]
+        assert results[3].retry_after > 0
+
+    @pytest.mark.asyncio
+    async def test_previous_window_is_weighted(self):
+        """前の窓の回数は現在のウィンドウと重なる割合で数える"""
+        clock = FakeClock(960.0)  # 窓 [960, 1020)
+        limiter = RateLimiter(MemoryRateLimitBackend(), clock=clock)
+        for _ in range(4):
+            await limiter.hit("k", 4, 60)
+
+        # 次の窓の中間: 前の窓の4回 × 0.5 = 2回分が残る
+        clock.now = 1050.0
+        assert (await limiter.hit("k", 4, 60)).allowed  # 2 + 1
+        assert (await limiter.hit("k", 4, 60)).allowed  # 2 + 2
+        blocked = await limiter.hit("k", 4, 60)         # 2 + 3
+        assert not blocked.allowed
+        # 前の窓の寄与が1回分減るまで: 60秒 × 1/4
+        assert blocked.retry_after == 15
+
+        # 2つ前の窓は数えない
+        clock.now = 1090.0
+        assert (await limiter.hit("k", 4, 60)).allowed
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self):
+        limiter = RateLimiter(MemoryRateLimitBackend(), clock=FakeClock(1000.0))
+
+        assert (await limiter.hit("a", 1, 60)).allowed
+        assert not (await limiter.hit("a", 1, 60)).allowed
+        assert (await limiter.hit("b", 1, 60)).allowed
+
+
+class TestBackendInterface:
+    """バックエンドの実装漏れの検出"""
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class IncompleteBackend(RateLimitBackend):
+            async def increment(self, key, window_start, previous_window_start):
+                return 1, 0
+
+        with pytest.raises(TypeError):
+            IncompleteBackend()
+
+
+class TestDatabaseBackend:
+    """DBバックエンドのテスト"""
+
+    @pytest_asyncio.fixture
+    async def session_factory(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(RateLimitCounter.__table__.create)
+        yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_increment_and_cleanup(self, session_factory):
+        backend = DatabaseRateLimitBackend(session_factory)
+
+        assert await backend.increment("k", 60, 0) == (1, 0)
+        assert await backend.increment("k", 60, 0) == (2, 0)
+        assert await backend.increment("k", 120, 60) == (1, 2)
+
+        await backend.cleanup(before=120)
+
+        assert await backend.increment("k", 180, 120) == (1, 1)
+        assert await backend.increment("k", 120, 60) == (2, 0)
+
+    @pytest.mark.asyncio
+    async def test_limiters_share_counters(self, session_factory):
+        """同じテーブルを使うリミッター（ワーカー）間で回数を共有する"""
+        clock = FakeClock(1000.0)
+        worker_a = RateLimiter(DatabaseRateLimitBackend(session_factory), clock=clock)
+        worker_b = RateLimiter(DatabaseRateLimitBackend(session_factory), clock=clock)
+
+        assert (await worker_a.hit("k", 2, 60)).allowed
+        assert (await worker_b.hit("k", 2, 60)).allowed
+        assert not (await worker_a.hit("k", 2, 60)).allowed
+
+
+class TestEnforceRateLimit:
+    """enforce_rate_limit のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_raises_429_with_retry_after(self, monkeypatch):
+        limiter = RateLimiter(MemoryRateLimitBackend(), clock=FakeClock(1000.0))
+        monkeypatch.setattr(rate_limiter_module, "_rate_limiter", limiter)
+
+        await enforce_rate_limit("k", 1, 60, "上限です")
+        with pytest.raises(HTTPException) as exc_info:
+            await enforce_rate_limit("k", 1, 60, "上限です")
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.detail == "上限です"
+        assert int(exc_info.value.headers["Retry-After"]) > 0
+
+    @pytest.mark.asyncio
+    async def test_allows_when_backend_fails(self, monkeypatch):
+        """バックエンド障害時はリクエストを許可する"""
+        class BrokenBackend(MemoryRateLimitBackend):
+            async def increment(self, *args):
+                raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(rate_limiter_module, "_rate_limiter", RateLimiter(BrokenBackend()))
+
+        await enforce_rate_limit("k", 1, 60, "上限です")
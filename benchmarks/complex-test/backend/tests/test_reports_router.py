@@ -0,0 +1,126 @@
+"""
+レポートAPI（部署別レポート一括ダウンロード）のテスト
+"""
+import io
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+
+from app.db.database import get_db
+from app.db.models import UserRole
+from app.main import app
+from app.routers import reports
+from app.routers.auth import get_current_user
+from app.services import pdf_generator
+from app.services.principal_cache import Principal
+
+
+def _result(scalar=None, scalars=(), rows=()) -> MagicMock:
+    return MagicMock(
+        scalar_one_or_none=MagicMock(return_value=scalar),
+        scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=list(scalars)))),
+        all=MagicMock(return_value=list(rows)),
+    )
+
+
+def _check(period: date, total_score: int = 80, is_high_stress: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(period=period, answers={}, total_score=total_score, is_high_stress=is_high_stress)
+
+
+class TestDepartmentReportPack:
+    """部署別レポート一括ダウンロード"""
+
+    @pytest_asyncio.fixture
+    async def client(self, monkeypatch):
+        self.company = SimpleNamespace(id=uuid.uuid4(), name="テスト株式会社")
+        self.sales = SimpleNamespace(id=uuid.uuid4(), name="営業部")
+        self.dev = SimpleNamespace(id=uuid.uuid4(), name="開発部")
+        self.hr = SimpleNamespace(id=uuid.uuid4(), name="人事部")
+        # 営業部は最新が2026年4月、開発部は前回（2025年10月）が最新、人事部は未実施
+        checks = [
+            (_check(date(2026, 4, 1), is_high_stress=True), self.sales.id),
+            (_check(date(2026, 4, 1)), self.sales.id),
+            (_check(date(2025, 10, 1)), self.dev.id),
+        ]
+        self.db = MagicMock(execute=AsyncMock(side_effect=[
+            _result(scalar=self.company),
+            _result(scalars=[self.hr, self.sales, self.dev]),
+            _result(rows=[(self.sales.id, 2), (self.dev.id, 1), (self.hr.id, 3)]),
+            _result(rows=checks),
+        ]))
+
+        principal = Principal(id=uuid.uuid4(), company_id=self.company.id, department_id=None,
+                              role=UserRole.ADMIN, email="admin@example.com")
+
+        async def override_get_db():
+            yield self.db
+
+        monkeypatch.setattr(reports, "calculate_stress_scores", lambda answers: {
+            "job_stress_score": 1.0, "stress_reaction_score": 2.0,
+            "support_score": 3.0, "satisfaction_score": 4.0,
+        })
+        self.render_pack = AsyncMock(return_value=io.BytesIO(b"%PDF-pack"))
+        self.render_archive = AsyncMock(return_value=io.BytesIO(b"PK-archive"))
+        monkeypatch.setattr(pdf_generator, "render_department_pack", self.render_pack)
+        monkeypatch.setattr(pdf_generator, "render_department_archive", self.render_archive)
+
+        app.dependency_overrides[get_current_user] = lambda: principal
+        app.dependency_overrides[get_db] = override_get_db
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            yield ac
+        app.dependency_overrides.clear()
+
+    def _url(self, fmt: str) -> str:
+        return f"/api/v1/reports/company/{self.company.id}/departments/pdf-pack?format={fmt}"
+
+    @pytest.mark.asyncio
+    async def test_pdf_uses_each_departments_latest_period(self, client):
+        response = await client.get(self._url("pdf"))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert "department_reports_202604.pdf" in response.headers["content-disposition"]
+        assert response.content == b"%PDF-pack"
+
+        rendered = self.render_pack.await_args.args[0]
+        assert [(r["department_name"], r["period"]) for r in rendered] == [
+            ("営業部", date(2026, 4, 1)),
+            ("開発部", date(2025, 10, 1)),
+        ]
+        assert rendered[0]["high_stress_count"] == 1
+        assert rendered[0]["employee_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_zip_names_entries_by_department_period(self, client):
+        response = await client.get(self._url("zip"))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert "department_reports_202604.zip" in response.headers["content-disposition"]
+        assert response.content == b"PK-archive"
+
+        rendered, names = self.render_archive.await_args.args
+        assert [r["department_name"] for r in rendered] == ["営業部", "開発部"]
+        assert names == [
+            "department_report_営業部_202604.pdf",
+            "department_report_開発部_202510.pdf",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_no_checks_in_any_department(self, client):
+        self.db.execute.side_effect = [
+            _result(scalar=self.company),
+            _result(scalars=[self.sales]),
+            _result(rows=[]),
+            _result(rows=[]),
+        ]
+
+        response = await client.get(self._url("zip"))
+
+        assert response.status_code == 400
+        self.render_archive.assert_not_awaited()
@@ -84,6 +84,72 @@ class TestPasswordHashing:
 
         assert hash1 != hash2
 
+    @pytest.mark.asyncio
+    async def test_hash_passwords_in_parallel(self):
+        """複数パスワードを並列にハッシュ化し、入力順に返す"""
+        from app.utils.security import hash_passwords, verify_password
+
+        passwords = [f"TempPassword{i}" for i in range(4)]
+        hashed = await hash_passwords(passwords)
+
+        assert len(hashed) == len(passwords)
+        for password, hashed_password in zip(passwords, hashed):
+            assert verify_password(password, hashed_password) is True
+
+    @pytest.mark.asyncio
+    async def test_hash_passwords_empty(self):
+        """空リストの場合は空リストを返す"""
+        from app.utils.security import hash_passwords
+
+        assert await hash_passwords([]) == []
+
+    @pytest.mark.asyncio
+    async def test_verify_password_async_records_metrics(self):
+        """ログイン用プールで検証し、キュー待ち時間を記録する"""
+        from app.utils.security import (
+            get_password_hash_async,
+            verify_password_async,
+            auth_hash_pool,
+        )
+
+        completed = auth_hash_pool.completed
+        hashed = await get_password_hash_async("TestPassword123!")
+
+        assert await verify_password_async("TestPassword123!", hashed) is True
+        assert await verify_password_async("wrong_password", hashed) is False
+
+        stats = auth_hash_pool.stats()
+        assert stats["completed"] == completed + 3
+        assert stats["pending"] == 0
+        assert stats["max_queue_ms"] >= 0
+        assert stats["avg_run_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_pool_caps_concurrency(self):
+        """同時実行数はワーカー数までに制限され、超過分はキューで待機する"""
+        import asyncio
+        import threading
+        import time
+        from app.utils.security import PasswordHashPool
+
+        pool = PasswordHashPool("test-hash", max_workers=2)
+        lock = threading.Lock()
+        running = [0, 0]  # 現在の実行数, 最大実行数
+
+        def work():
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        await asyncio.gather(*(pool.run(work) for _ in range(6)))
+
+        assert running[1] == 2
+        assert pool.stats()["completed"] == 6
+        assert pool.stats()["max_queue_ms"] > 0
+
 
 class TestJWT:
     """JWTトークンのテスト"""
@@ -137,3 +203,59 @@ class TestJWT:
 
         decoded = decode_access_token("invalid-token")
         assert decoded is None
+
+
+class TestTokenDecodeCache:
+    """復号済みトークンキャッシュのテスト"""
+
+    def test_second_decode_skips_verification(self, monkeypatch):
+        """同じトークンの2回目以降は署名検証を行わない"""
+        from app.utils import security
+
+        cache = security.TokenDecodeCache(max_size=10)
+        monkeypatch.setattr(security, "token_decode_cache", cache)
+        monkeypatch.setattr(security, "JWT_DECODE_CACHE_ENABLED", True)
+        token = security.create_access_token({"sub": "user-123"})
+        real_decode = security.jwt.decode
+        calls = []
+        monkeypatch.setattr(security.jwt, "decode", lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+
+        first = security.decode_access_token(token)
+        second = security.decode_access_token(token)
+
+        assert first == second
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        # キャッシュ済みでもトークン種別は確認する
+        assert security.decode_refresh_token(token) is None
+
+    def test_entry_expires_with_token(self, monkeypatch):
+        """トークンの exp を過ぎたエントリは返さない"""
+        from app.utils import security
+
+        cache = security.TokenDecodeCache(max_size=10)
+        now = [1000.0]
+        monkeypatch.setattr(security.time, "time", lambda: now[0])
+
+        cache.set("token", {"sub": "user-123", "exp": 1060})
+        assert cache.get("token")["sub"] == "user-123"
+
+        now[0] = 1060.0
+        assert cache.get("token") is None
+        assert cache.stats()["size"] == 0
+
+    def test_bounded_size_and_uncacheable_tokens(self):
+        """上限を超えると古いものから破棄し、exp のないトークンは登録しない"""
+        from app.utils.security import TokenDecodeCache
+
+        cache = TokenDecodeCache(max_size=2)
+        exp = 4102444800  # 2100-01-01
+        cache.set("a", {"exp": exp})
+        cache.set("b", {"exp": exp})
+        cache.set("c", {"exp": exp})
+        cache.set("d", {"sub": "no-exp"})
+
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+        assert cache.get("d") is None
+        assert cache.stats()["evictions"] == 1
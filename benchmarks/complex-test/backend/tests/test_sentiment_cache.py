@@ -0,0 +1,149 @@
+"""
+感情分析結果キャッシュのテスト
+"""
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.models import SentimentCacheEntry
+from app.services import sentiment_cache as sentiment_cache_module
+from app.services.ai_service import analyze_sentiment, sentiment_cache
+from app.services.sentiment_cache import SentimentCache, normalize_text
+
+ANALYSIS = {
+    "sentiment": -0.4,
+    "topics": ["体調"],
+    "urgency": 2,
+    "reply_suggestion": "ゆっくり休んでくださいね。",
+    "risk_flags": [],
+}
+
+
+class TestNormalizeText:
+    """キャッシュキー用の正規化のテスト"""
+
+    def test_equivalent_texts(self):
+        assert normalize_text("疲れた") == normalize_text(" 疲れた。 ")
+        assert normalize_text("疲れた") == normalize_text("疲れた！！")
+        assert normalize_text("ＯＫです") == normalize_text("okです")
+        assert normalize_text("大丈夫　です") == normalize_text("大丈夫 です")
+
+    def test_different_texts(self):
+        assert normalize_text("疲れた") != normalize_text("疲れてない")
+
+
+class TestSentimentCache:
+    """メモリキャッシュのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_hit_after_set(self):
+        cache = SentimentCache(persistent=False)
+
+        assert await cache.get("疲れた") is None
+        await cache.set("疲れた", ANALYSIS)
+        cached = await cache.get("疲れた。")
+
+        assert cached == ANALYSIS
+        cached["topics"].append("変更")  # 呼び出し側の変更はキャッシュに影響しない
+        assert (await cache.get("疲れた"))["topics"] == ["体調"]
+        assert cache.stats()["memory_hits"] == 2
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expires_after_ttl(self, monkeypatch):
+        cache = SentimentCache(ttl_seconds=10, persistent=False)
+        now = [1000.0]
+        monkeypatch.setattr(sentiment_cache_module.time, "monotonic", lambda: now[0])
+
+        await cache.set("疲れた", ANALYSIS)
+        now[0] += 11
+
+        assert await cache.get("疲れた") is None
+
+    @pytest.mark.asyncio
+    async def test_long_text_is_not_cached(self, monkeypatch):
+        monkeypatch.setattr(sentiment_cache_module, "SENTIMENT_CACHE_MAX_TEXT_LENGTH", 5)
+        cache = SentimentCache(persistent=False)
+
+        await cache.set("今日はとても疲れました", ANALYSIS)
+
+        assert await cache.get("今日はとても疲れました") is None
+        assert cache.stats()["size"] == 0
+
+
+class TestPersistentTier:
+    """永続テーブルのテスト"""
+
+    @pytest_asyncio.fixture
+    async def session_factory(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(SentimentCacheEntry.__table__.create)
+        yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_shared_between_processes(self, session_factory):
+        """別プロセス（別インスタンス）が保存した結果を利用できる"""
+        writer = SentimentCache(persistent=True, session_factory=session_factory)
+        reader = SentimentCache(persistent=True, session_factory=session_factory)
+
+        await writer.set("大丈夫です", ANALYSIS)
+
+        assert await reader.get("大丈夫です") == ANALYSIS
+        assert await reader.get("大丈夫です") == ANALYSIS
+        assert reader.stats()["persistent_hits"] == 1
+        assert reader.stats()["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_namespace_separates_entries(self, session_factory):
+        """プロンプトが変わった場合は過去の結果を使わない"""
+        old = SentimentCache(namespace="v1", persistent=True, session_factory=session_factory)
+        new = SentimentCache(namespace="v2", persistent=True, session_factory=session_factory)
+
+        await old.set("大丈夫です", ANALYSIS)
+
+        assert await new.get("大丈夫です") is None
+
+
+class TestAnalyzeSentimentCache:
+    """analyze_sentiment のキャッシュ利用のテスト"""
+
+    @pytest.fixture(autouse=True)
+    def disable_fast_path(self, monkeypatch):
+        monkeypatch.setattr("app.services.ai_service.LEXICON_FAST_PATH_ENABLED", False)
+
+    def _response(self):
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=json.dumps(ANALYSIS)))])
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_repeated_message_skips_llm(self, mock_client):
+        create = AsyncMock(return_value=self._response())
+        mock_client.return_value.chat.completions.create = create
+
+        first = await analyze_sentiment("疲れた")
+        second = await analyze_sentiment("疲れた！")
+
+        assert first.pop("source") == "llm"
+        assert second.pop("source") == "cache"
+        assert first == second
+        assert create.await_count == 1
+
+    @pytest.mark.asyncio
+    @patch("app.services.ai_service.get_openai_client")
+    async def test_errors_and_history_are_not_cached(self, mock_client):
+        create = AsyncMock(side_effect=Exception("API Error"))
+        mock_client.return_value.chat.completions.create = create
+
+        await analyze_sentiment("疲れた")
+        create.side_effect = None
+        create.return_value = self._response()
+        await analyze_sentiment("疲れた")
+        await analyze_sentiment("疲れた", conversation_history=[{"role": "user", "content": "こんにちは"}])
+
+        assert create.await_count == 3
+        assert sentiment_cache.stats()["size"] == 1
@@ -37,6 +37,19 @@ interface CSVImportResult {
   message: string;
 }
 
+interface CSVImportJob {
+  job_id: string;
+  status: 'pending' | 'running' | 'completed' | 'failed';
+  total_rows: number;
+  validated_rows: number;
+  hashed_rows: number;
+  inserted_rows: number;
+  skipped_rows: number;
+  message: string | null;
+}
+
+const IMPORT_POLL_INTERVAL_MS = 1000;
+
 export default function CSVImportPage() {
   const router = useRouter();
   const fileInputRef = useRef<HTMLInputElement>(null);
@@ -44,6 +57,7 @@ export default function CSVImportPage() {
   const [preview, setPreview] = useState<CSVPreviewResponse | null>(null);
   const [result, setResult] = useState<CSVImportResult | null>(null);
   const [loading, setLoading] = useState(false);
+  const [importJob, setImportJob] = useState<CSVImportJob | null>(null);
   const [error, setError] = useState('');
 
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
@@ -98,13 +112,31 @@ export default function CSVImportPage() {
         { headers: { 'Content-Type': 'multipart/form-data' } }
       );
 
-      setResult(response.data);
-      if (response.data.success) {
+      // インポートはバックグラウンドで実行されるため、完了まで進捗をポーリング
+      let job: CSVImportJob = response.data;
+      setImportJob(job);
+      while (job.status === 'pending' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, IMPORT_POLL_INTERVAL_MS));
+        const progress = await apiClient.get(`/api/v1/admin/csv/import/${job.job_id}`);
+        job = progress.data;
+        setImportJob(job);
+      }
+
+      const success = job.status === 'completed';
+      setResult({
+        success,
+        total_rows: job.total_rows,
+        imported_count: job.inserted_rows,
+        skipped_count: job.skipped_rows,
+        message: job.message || '',
+      });
+      if (success) {
         setPreview(null);
       }
     } catch (err: any) {
       setError(err.response?.data?.detail || 'インポートに失敗しました');
     } finally {
+      setImportJob(null);
       setLoading(false);
     }
   };
@@ -168,6 +200,20 @@ export default function CSVImportPage() {
           </div>
         )}
 
+        {/* Import Progress */}
+        {importJob && (
+          <div className="card p-6 mb-6 animate-fade-in" data-testid="csv-import-progress">
+            <div className="flex items-center gap-3 mb-2">
+              <IconLoader className="w-5 h-5 animate-spin text-primary-500" />
+              <h2 className="font-bold text-sand-900">インポート中...</h2>
+            </div>
+            <p className="text-sm text-sand-600">
+              検証 {importJob.validated_rows} / ハッシュ化 {importJob.hashed_rows} / 登録 {importJob.inserted_rows} / スキップ {importJob.skipped_rows}
+              {importJob.total_rows > 0 && `（全${importJob.total_rows}行）`}
+            </p>
+          </div>
+        )}
+
         {/* Import Result */}
         {result && (
           <div className={`card p-6 mb-6 animate-scale-in ${result.success ? 'ring-2 ring-success/30' : 'ring-2 ring-warning/30'}`}>
@@ -2,7 +2,7 @@
 
 import { useState, useEffect, useRef } from 'react';
 import { useRouter } from 'next/navigation';
-import { chatApi, ChatResponse, ChatHistoryMessage } from '@/lib/api/chat';
+import { chatApi, ChatHistoryMessage } from '@/lib/api/chat';
 import { IconSend, IconTrash, IconBrain, IconHome, IconSparkles, IconLoader } from '@/components/ui/icons';
 
 interface Message {
@@ -33,8 +33,9 @@ export default function ChatPage() {
   useEffect(() => {
     const loadChatHistory = async () => {
       try {
-        const response = await chatApi.getHistory(100, 0);
-        const loadedMessages: Message[] = response.messages.map((msg: ChatHistoryMessage) => ({
+        // 直近100件を新しい順に取得し、表示用に古い順へ並べ替える
+        const response = await chatApi.getHistory({ limit: 100, order: 'desc' });
+        const loadedMessages: Message[] = [...response.messages].reverse().map((msg: ChatHistoryMessage) => ({
           id: msg.id,
           role: msg.role,
           content: msg.content,
@@ -71,25 +72,19 @@ export default function ChatPage() {
     setMessages(updatedMessages);
 
     try {
-      // まずAI応答を取得（成功時のみDB保存）
-      const response: ChatResponse = await chatApi.sendMessage({ content: userMessage });
+      // AI応答をトークン単位で表示（ユーザーメッセージとAI応答はサーバー側で保存）
+      let streamed = '';
+      const done = await chatApi.streamCounselor({ content: userMessage }, (token) => {
+        streamed += token;
+        setMessages([...updatedMessages, { role: 'ai', content: streamed }]);
+      });
 
       const aiMessage: Message = {
         role: 'ai',
-        content: response.message,
-        sentiment_score: response.sentiment_score,
+        content: done.message,
+        sentiment_score: done.sentiment_score,
       };
-
-      // 送信成功後にユーザーメッセージとAI応答を保存
-      await chatApi.saveMessage({ role: 'user', content: userMessage });
-      await chatApi.saveMessage({
-        role: 'ai',
-        content: response.message,
-        sentiment_score: response.sentiment_score,
-      });
-
-      const newMessages = [...updatedMessages, aiMessage];
-      setMessages(newMessages);
+      setMessages([...updatedMessages, aiMessage]);
     } catch (err: any) {
       // 失敗時はUIのメッセージも元に戻す
       setMessages(messages);
@@ -1,7 +1,7 @@
 /**
  * チャットAPI
  */
-import apiClient from './client';
+import apiClient, { streamRequest } from './client';
 
 export interface ChatMessage {
   content: string;
@@ -15,6 +15,17 @@ export interface ChatResponse {
   risk_flags: string[];
 }
 
+export interface CounselorStreamDone {
+  message_id: string;
+  user_message_id: string;
+  message: string;
+  sentiment_score: number;
+  topics: string[];
+  urgency: number;
+  risk_flags: string[];
+  source?: string;
+}
+
 export interface DailyScoreResponse {
   date: string;
   sentiment_score: number;
@@ -34,9 +45,17 @@ export interface ChatHistoryMessage {
 
 export interface ChatHistoryResponse {
   messages: ChatHistoryMessage[];
-  total: number;
+  total?: number | null;
   limit: number;
   offset: number;
+  next_cursor?: string | null;
+}
+
+export interface ChatHistoryParams {
+  limit?: number;
+  cursor?: string;
+  order?: 'asc' | 'desc';
+  include_total?: boolean;
 }
 
 export interface SaveChatMessageRequest {
@@ -61,15 +80,63 @@ export const chatApi = {
     return response.data;
   },
 
+  // カウンセラー応答をServer-Sent Eventsで受信（メッセージはサーバー側で保存される）
+  streamCounselor: async (
+    data: ChatMessage,
+    onToken: (content: string) => void,
+  ): Promise<CounselorStreamDone> => {
+    const response = await streamRequest('/api/v1/chat/counselor/stream', {
+      method: 'POST',
+      headers: { Accept: 'text/event-stream' },
+      body: JSON.stringify(data),
+    });
+
+    const reader = response.body!.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let done: CounselorStreamDone | null = null;
+
+    while (true) {
+      const { value, done: finished } = await reader.read();
+      if (finished) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const raw = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let event = 'message';
+        let payload = '';
+        for (const line of raw.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) payload += line.slice(6);
+        }
+        if (!payload) continue;
+
+        const parsed = JSON.parse(payload);
+        if (event === 'token') onToken(parsed.content);
+        else if (event === 'done') done = parsed as CounselorStreamDone;
+      }
+    }
+
+    if (!done) {
+      throw { response: { status: 502, data: { detail: '応答が途中で切断されました' } } };
+    }
+    return done;
+  },
+
   getDailyScores: async (): Promise<DailyScoreResponse[]> => {
     const response = await apiClient.get<DailyScoreResponse[]>('/api/v1/chat/daily-scores');
     return response.data;
   },
 
   // チャット履歴API
-  getHistory: async (limit: number = 50, offset: number = 0): Promise<ChatHistoryResponse> => {
+  // 次のページは next_cursor を cursor に指定して取得
+  getHistory: async (params: ChatHistoryParams = {}): Promise<ChatHistoryResponse> => {
     const response = await apiClient.get<ChatHistoryResponse>('/api/v1/chat/history', {
-      params: { limit, offset }
+      params: { limit: 50, ...params }
     });
     return response.data;
   },
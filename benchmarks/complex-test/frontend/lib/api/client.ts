@@ -21,6 +21,28 @@ type RetryConfig = AxiosRequestConfig & {
 let isRefreshing = false;
 let refreshPromise: Promise<void> | null = null;
 
+// アクセストークンを更新（同時に複数のリクエストが401になっても更新は1回）
+const refreshSession = (): Promise<void> => {
+  if (!isRefreshing) {
+    isRefreshing = true;
+    refreshPromise = apiClient
+      .post('/api/v1/auth/refresh', null, { _skipAuthRefresh: true } as RetryConfig)
+      .then(() => {})
+      .finally(() => {
+        isRefreshing = false;
+      });
+  }
+  return refreshPromise as Promise<void>;
+};
+
+const redirectToLogin = () => {
+  if (typeof window !== 'undefined') {
+    if (!window.location.pathname.includes('/login')) {
+      window.location.href = '/login';
+    }
+  }
+};
+
 // レスポンスインターセプター: エラーハンドリング
 apiClient.interceptors.response.use(
   (response) => response,
@@ -30,38 +52,58 @@ apiClient.interceptors.response.use(
 
     if (shouldRefresh) {
       originalRequest._retry = true;
-      if (!isRefreshing) {
-        isRefreshing = true;
-        refreshPromise = apiClient
-          .post('/api/v1/auth/refresh', null, { _skipAuthRefresh: true } as RetryConfig)
-          .then(() => {})
-          .finally(() => {
-            isRefreshing = false;
-          });
-      }
-
       try {
-        await refreshPromise;
+        await refreshSession();
         return apiClient(originalRequest);
       } catch {
-        if (typeof window !== 'undefined') {
-          if (!window.location.pathname.includes('/login')) {
-            window.location.href = '/login';
-          }
-        }
+        redirectToLogin();
       }
     }
 
     if (error.response?.status === 401) {
-      if (typeof window !== 'undefined') {
-        if (!window.location.pathname.includes('/login')) {
-          window.location.href = '/login';
-        }
-      }
+      redirectToLogin();
     }
 
     return Promise.reject(error);
   }
 );
 
+/**
+ * ストリーミング応答（Server-Sent Events など）用のリクエスト
+ *
+ * axiosはブラウザでレスポンスをストリームとして読めないため fetch を使い、
+ * apiClient と同じベースURL・Cookie認証・401時のトークン更新を適用する。
+ * エラー時は axios のエラーと同じ形（{ response: { status, data } }）で失敗する。
+ */
+export const streamRequest = async (
+  url: string,
+  init: RequestInit & { headers?: Record<string, string> } = {},
+): Promise<Response> => {
+  const send = () =>
+    fetch(`${API_URL}${url}`, {
+      ...init,
+      headers: { 'Content-Type': 'application/json', ...init.headers },
+      credentials: 'include',
+    });
+
+  let response = await send();
+  if (response.status === 401) {
+    try {
+      await refreshSession();
+      response = await send();
+    } catch {
+      // 更新に失敗した場合は下の401の処理に進む
+    }
+  }
+  if (response.status === 401) {
+    redirectToLogin();
+  }
+
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => ({}));
+    throw { response: { status: response.status, data } };
+  }
+  return response;
+};
+
 export default apiClient;